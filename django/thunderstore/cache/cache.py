@@ -1,18 +1,147 @@
 import hashlib
+import math
+import random
 import time
 import warnings
-from typing import Any, Callable, Optional
+from contextvars import ContextVar
+from dataclasses import dataclass
+from threading import Thread
+from typing import Any, Callable, Optional, Tuple, Union
 from urllib.parse import quote
 
 from django.conf import settings
 from django.core.cache import cache
+from django.db import close_old_connections, connections
 from redis.exceptions import LockError
 
-from thunderstore.cache.enums import CacheBustCondition
+from thunderstore.cache.codec import get_cache_codec
+from thunderstore.cache.enums import validate_cache_bust_condition
+from thunderstore.cache.index import register_cache_key
+from thunderstore.cache.local import MISSING, local_cache
+from thunderstore.cache.metrics import (
+    HIT_METRIC,
+    LOCAL_HIT_METRIC,
+    LOCK_CONTENTION_METRIC,
+    LOCK_WAIT_SECONDS_METRIC,
+    MISS_METRIC,
+    REGENERATION_METRIC,
+    REGENERATION_SECONDS_METRIC,
+    STALE_METRIC,
+    record_cache_metric,
+    record_cache_payload_size,
+)
+from thunderstore.cache.singleflight import single_flight
+from thunderstore.core.utils import capture_exception
 from thunderstore.repository.mixins import CommunityMixin
 
 DEFAULT_CACHE_EXPIRY = 60 * 5
 CACHE_LOCK_TIMEOUT = 30
+# Controls how eagerly entries are recomputed ahead of their expiry, values
+# above 1 favor earlier recomputation
+XFETCH_BETA = 1.0
+
+_stale_cache_age: ContextVar[Optional[float]] = ContextVar(
+    "stale_cache_age", default=None
+)
+
+
+def get_old_cache_key(key: str) -> str:
+    return f"old.{key}"
+
+
+def get_cache_metadata_key(key: str) -> str:
+    return f"meta.{key}"
+
+
+@dataclass
+class CacheEntryMetadata:
+    created_at: float
+    # How long generating the entry took, in seconds
+    cost: float
+    expires_at: Optional[float]
+
+
+def should_recompute_early(
+    metadata: Optional[CacheEntryMetadata], now: Optional[float] = None
+) -> bool:
+    """
+    Decide whether an entry should be recomputed before it expires, using the
+    XFetch algorithm. Entries which were expensive to generate are more likely
+    to be recomputed early, and the probability grows as the expiry nears, so
+    that a single request usually refreshes a busy key before it expires.
+    """
+    if metadata is None or metadata.expires_at is None:
+        return False
+    if now is None:
+        now = time.time()
+    # 1 - random() is in (0, 1], which keeps the logarithm defined
+    gap = -metadata.cost * XFETCH_BETA * math.log(1.0 - random.random())
+    return now + gap >= metadata.expires_at
+
+
+def generate_timed(generator: Callable) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    generated = generator()
+    return generated, time.perf_counter() - start
+
+
+def get_stale_cache_age() -> Optional[float]:
+    """
+    Get the age of the oldest stale cache entry served in the current context,
+    or None if only fresh entries have been served.
+    """
+    return _stale_cache_age.get()
+
+
+def record_stale_cache_age(age: float) -> None:
+    current = _stale_cache_age.get()
+    if current is None or age > current:
+        _stale_cache_age.set(age)
+
+
+def get_cache_entry_version(version=None) -> int:
+    """
+    Get the cache key version to store entries under, which is the codec's
+    unless given explicitly.
+    """
+    return get_cache_codec().version if version is None else version
+
+
+def get_cached_value(key: str, version=None) -> Any:
+    """
+    Get a value stored by `set_cache_entry` without regenerating it.
+    """
+    version = get_cache_entry_version(version)
+    return get_cache_codec().decode(cache.get(key, version=version))
+
+
+def set_cache_entry(
+    key: str,
+    old_key: str,
+    generated: Any,
+    timeout: Optional[int],
+    old_timeout: Optional[int],
+    version=None,
+    cost: float = 0.0,
+) -> None:
+    version = get_cache_entry_version(version)
+    now = time.time()
+    metadata = CacheEntryMetadata(
+        created_at=now,
+        cost=cost,
+        expires_at=None if timeout is None else now + timeout,
+    )
+    encoded, size = get_cache_codec().encode(generated)
+    record_cache_payload_size(key, size)
+    record_cache_metric(key, REGENERATION_METRIC)
+    record_cache_metric(key, REGENERATION_SECONDS_METRIC, cost)
+    cache.set(key, encoded, timeout=timeout, version=version)
+    register_cache_key(key, timeout=timeout, version=version)
+    cache.set_many(
+        {old_key: encoded, get_cache_metadata_key(key): metadata},
+        timeout=old_timeout,
+        version=version,
+    )
 
 
 def try_regenerate_cache(
@@ -23,10 +152,14 @@ def try_regenerate_cache(
     old_timeout: int,
     version=None,
 ) -> Any:
+    wait_start = time.perf_counter()
     with cache.lock(
         f"lock.cachegenerate.{key}", timeout=CACHE_LOCK_TIMEOUT, blocking_timeout=None
     ):
-        generated = generator()
+        record_cache_metric(
+            key, LOCK_WAIT_SECONDS_METRIC, time.perf_counter() - wait_start
+        )
+        generated, cost = generate_timed(generator)
         if generated is None:
             # TODO: Use some empty object instead which can be used to
             #       recognize None was cached
@@ -34,12 +167,14 @@ def try_regenerate_cache(
                 "Attempted to set 'None' to cache, replacing with empty string",
             )
             generated = ""
-        cache.set(key, generated, timeout=timeout, version=version)
-        cache.set(
-            old_key,
-            generated,
-            timeout=old_timeout,
+        set_cache_entry(
+            key=key,
+            old_key=old_key,
+            generated=generated,
+            timeout=timeout,
+            old_timeout=old_timeout,
             version=version,
+            cost=cost,
         )
         return generated
 
@@ -47,7 +182,7 @@ def try_regenerate_cache(
 def regenerate_cache(
     key: str, generator: Callable, timeout: int, old_timeout: int, version=None
 ):
-    old_key = f"old.{key}"
+    old_key = get_old_cache_key(key)
     try:
         return try_regenerate_cache(
             key=key,
@@ -57,17 +192,147 @@ def regenerate_cache(
             old_timeout=old_timeout,
             version=version,
         )
-    except (LockError, AttributeError):
+    except (LockError, AttributeError) as e:
+        if isinstance(e, LockError):
+            record_cache_metric(key, LOCK_CONTENTION_METRIC)
         # Lock was taken by another thread, check fallback version
-        generated = cache.get(old_key, version=version)
-        if generated is None:
+        generated = get_cached_value(old_key, version=version)
+        if generated is not None:
+            record_cache_metric(key, STALE_METRIC)
+        else:
             # Finally fall back to generating it on this thread
-            generated = generator()
-            cache.set(key, generated, timeout=timeout, version=version)
-            cache.set(old_key, generated, timeout=None, version=version)
+            generated, cost = generate_timed(generator)
+            set_cache_entry(
+                key=key,
+                old_key=old_key,
+                generated=generated,
+                timeout=timeout,
+                old_timeout=None,
+                version=version,
+                cost=cost,
+            )
         return generated
 
 
+def schedule_cache_regeneration(
+    key: str, generator: Callable, timeout: int, old_timeout: int, version=None
+) -> Optional[Thread]:
+    """
+    Regenerate a cache entry in a background thread, which is a greenlet when
+    running under gevent. Only a single regeneration is scheduled at a time
+    for each key, further attempts are ignored while the lock is held.
+    """
+    lock = cache.lock(
+        f"lock.cachegenerate.{key}",
+        timeout=CACHE_LOCK_TIMEOUT,
+        thread_local=False,
+    )
+    if not lock.acquire(blocking=False):
+        return None
+
+    # Threads get database connections of their own, which Django's request
+    # cycle doesn't clean up, so that's done here instead
+    def regenerate():
+        close_old_connections()
+        try:
+            generated, cost = generate_timed(generator)
+            set_cache_entry(
+                key=key,
+                old_key=get_old_cache_key(key),
+                generated="" if generated is None else generated,
+                timeout=timeout,
+                old_timeout=old_timeout,
+                version=version,
+                cost=cost,
+            )
+        except Exception as e:  # pragma: no cover
+            capture_exception(e)
+        finally:
+            try:
+                lock.release()
+            except LockError:  # pragma: no cover
+                # The lock has already expired
+                pass
+            connections.close_all()
+
+    thread = Thread(target=regenerate, daemon=True)
+    thread.start()
+    return thread
+
+
+def get_stale_or_regenerate_cache(
+    key: str, generator: Callable, timeout: int, old_timeout: int, version=None
+):
+    """
+    Return the stale copy of an entry immediately if one exists, scheduling
+    the regeneration in the background. Otherwise regenerate synchronously.
+    """
+    if not hasattr(cache, "lock"):
+        return regenerate_cache(key, generator, timeout, old_timeout, version)
+
+    old_key = get_old_cache_key(key)
+    metadata_key = get_cache_metadata_key(key)
+    stale = cache.get_many(
+        [old_key, metadata_key], version=get_cache_entry_version(version)
+    )
+    if stale.get(old_key) is None:
+        return regenerate_cache(key, generator, timeout, old_timeout, version)
+
+    schedule_cache_regeneration(key, generator, timeout, old_timeout, version)
+    record_cache_metric(key, STALE_METRIC)
+    if metadata_key in stale:
+        record_stale_cache_age(time.time() - stale[metadata_key].created_at)
+    return get_cache_codec().decode(stale[old_key])
+
+
+def recompute_cache_early(
+    key: str,
+    current: Any,
+    generator: Callable,
+    timeout: int,
+    old_timeout: int,
+    version=None,
+) -> Any:
+    """
+    Recompute an entry which hasn't expired yet. Failures are reported but
+    the current value is still served, as it's valid for a while longer.
+    """
+    try:
+        generated, cost = generate_timed(generator)
+    except Exception as e:
+        capture_exception(e)
+        return current
+    if generated is None:
+        return current
+    set_cache_entry(
+        key=key,
+        old_key=get_old_cache_key(key),
+        generated=generated,
+        timeout=timeout,
+        old_timeout=old_timeout,
+        version=version,
+        cost=cost,
+    )
+    return generated
+
+
+def cache_get(key: str, expiry: Optional[int] = None, use_local_cache: bool = False):
+    """
+    Get a value from the cache without generating it if it's missing. Hits
+    and misses are recorded like with `cache_get_or_set`.
+    """
+    if use_local_cache:
+        result = local_cache.get(key)
+        if result is not MISSING:
+            record_cache_metric(key, LOCAL_HIT_METRIC)
+            return result
+    result = get_cached_value(key)
+    record_cache_metric(key, MISS_METRIC if result is None else HIT_METRIC)
+    if result is not None and use_local_cache:
+        local_cache.set(key, result, timeout=expiry)
+    return result
+
+
 def cache_get_or_set_by_key(
     condition: str,
     cache_key: str,
@@ -76,6 +341,8 @@ def cache_get_or_set_by_key(
     default_args=(),
     default_kwargs=None,
     expiry=DEFAULT_CACHE_EXPIRY,
+    stale_while_revalidate: bool = False,
+    use_local_cache: bool = False,
 ):
     if default_kwargs is None:
         default_kwargs = {}
@@ -91,12 +358,35 @@ def cache_get_or_set_by_key(
         default_args=default_args,
         default_kwargs=default_kwargs,
         expiry=expiry,
+        stale_while_revalidate=stale_while_revalidate,
+        use_local_cache=use_local_cache,
     )
 
 
 def cache_get_or_set(
-    key, default, default_args=(), default_kwargs=None, expiry: Optional[int] = None
+    key,
+    default,
+    default_args=(),
+    default_kwargs=None,
+    expiry: Optional[int] = None,
+    stale_while_revalidate: bool = False,
+    use_local_cache: bool = False,
 ):
+    """
+    Get a value from the cache, generating it with the default callable if
+    it's missing.
+
+    If stale_while_revalidate is set, a missing entry is served from its
+    stale copy (if one exists) and regenerated in the background instead of
+    blocking the caller.
+
+    Entries are recomputed probabilistically shortly before they expire, see
+    `should_recompute_early`.
+
+    If use_local_cache is set, hits are also kept in a process-local cache for
+    a short while. The same object is then shared between requests, so this
+    must only be used for values which are never mutated.
+    """
     if default_kwargs is None:
         default_kwargs = {}
 
@@ -109,18 +399,55 @@ def cache_get_or_set(
     if expiry is not None:
         old_timeout = expiry * 2
 
-    result = cache.get(key, version=None)
+    if use_local_cache:
+        result = local_cache.get(key)
+        if result is not MISSING:
+            record_cache_metric(key, LOCAL_HIT_METRIC)
+            return result
+
+    metadata_key = get_cache_metadata_key(key)
+    entries = cache.get_many([key, metadata_key], version=get_cache_entry_version())
+    result = get_cache_codec().decode(entries.get(key))
+    record_cache_metric(key, MISS_METRIC if result is None else HIT_METRIC)
+    if result is not None and should_recompute_early(entries.get(metadata_key)):
+        if stale_while_revalidate:
+            schedule_cache_regeneration(
+                key, call_default, timeout=expiry, old_timeout=old_timeout
+            )
+        else:
+            result = recompute_cache_early(
+                key=key,
+                current=result,
+                generator=call_default,
+                timeout=expiry,
+                old_timeout=old_timeout,
+            )
+    if result is not None and use_local_cache:
+        local_cache.set(key, result, timeout=expiry)
     if result is None:
-        result = regenerate_cache(
-            key=key, generator=call_default, timeout=expiry, old_timeout=old_timeout
+        regenerate = (
+            get_stale_or_regenerate_cache
+            if stale_while_revalidate
+            else regenerate_cache
+        )
+        # Concurrent misses within this process share a single regeneration
+        result = single_flight.do(
+            key,
+            lambda: regenerate(
+                key=key,
+                generator=call_default,
+                timeout=expiry,
+                old_timeout=old_timeout,
+            ),
+            timeout=CACHE_LOCK_TIMEOUT,
+            copy_result=not use_local_cache,
         )
 
     return result
 
 
 def get_cache_key(cache_bust_condition, cache_type, key, vary_on):
-    if cache_bust_condition not in CacheBustCondition.options():
-        raise ValueError(f"Invalid cache bust condition: {cache_bust_condition}")
+    validate_cache_bust_condition(cache_bust_condition)
     vary = "None"
     if vary_on:
         vary_args = ":".join(quote(str(var)) for var in vary_on)
@@ -143,6 +470,9 @@ class ManualCacheMixin(object):
     def get_extra_cache_vary(self):
         return set()
 
+    def get_cache_until(self) -> str:
+        return self.cache_until
+
     def dispatch(self, *args, **kwargs):
         def get_default(*a, **kw):
             return super(ManualCacheMixin, self).dispatch(*a, **kw).render()
@@ -152,7 +482,7 @@ class ManualCacheMixin(object):
 
         return cache_get_or_set(
             key=get_cache_key(
-                cache_bust_condition=self.cache_until,
+                cache_bust_condition=self.get_cache_until(),
                 cache_type="view",
                 key=get_view_cache_name(type(self)),
                 vary_on=args + tuple(kwargs.values()) + self.get_extra_cache_vary(),
@@ -169,12 +499,32 @@ class ManualCacheCommunityMixin(CommunityMixin, ManualCacheMixin):
         return (self.community_identifier,)
 
 
-def cache_function_result(cache_until, expiry=DEFAULT_CACHE_EXPIRY):
+def cache_function_result(
+    cache_until: Union[str, Callable[..., str]],
+    expiry=DEFAULT_CACHE_EXPIRY,
+    use_local_cache: bool = False,
+):
+    """
+    Cache the return value of the decorated function until the cache bust
+    condition is triggered or the cache expires.
+
+    :param cache_until: Either a cache bust condition or a callable which
+        receives the same arguments as the decorated function and returns
+        a (parameterized) cache bust condition.
+    :param use_local_cache: Whether to keep hits in the process-local cache,
+        only suitable for immutable return values.
+    """
+
+    def get_cache_until(*args, **kwargs) -> str:
+        if callable(cache_until):
+            return cache_until(*args, **kwargs)
+        return cache_until
+
     def decorator(original_function):
         def wrapper(*args, **kwargs):
             return cache_get_or_set(
                 key=get_cache_key(
-                    cache_bust_condition=cache_until,
+                    cache_bust_condition=get_cache_until(*args, **kwargs),
                     cache_type="func",
                     key=original_function.__name__,
                     vary_on=args + tuple(kwargs.values()),
@@ -183,18 +533,21 @@ def cache_function_result(cache_until, expiry=DEFAULT_CACHE_EXPIRY):
                 default_args=args,
                 default_kwargs=kwargs,
                 expiry=expiry,
+                use_local_cache=use_local_cache,
             )
 
         def clear_cache_with_args(*args, **kwargs):
             key = get_cache_key(
-                cache_bust_condition=cache_until,
+                cache_bust_condition=get_cache_until(*args, **kwargs),
                 cache_type="func",
                 key=original_function.__name__,
                 vary_on=args + tuple(kwargs.values()),
             )
-            old_key = f"old.{key}"
-            cache.delete(key)
-            cache.delete(old_key)
+            old_key = get_old_cache_key(key)
+            version = get_cache_entry_version()
+            cache.delete(key, version=version)
+            cache.delete(old_key, version=version)
+            local_cache.delete(key)
 
         wrapper.clear_cache_with_args = clear_cache_with_args
         return wrapper
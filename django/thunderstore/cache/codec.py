@@ -0,0 +1,151 @@
+import pickle
+import zlib
+from functools import lru_cache
+from typing import Any, Tuple
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from django_redis.serializers.pickle import PickleSerializer
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# Marks payloads stored by CodecSerializer. Pickles never start with a null
+# byte, so the marker can't be confused with one.
+PAYLOAD_MARKER = b"\x00tscodec"
+
+
+class EncodedPayload:
+    """
+    A value pickled (and possibly compressed) by a codec. CodecSerializer
+    stores it as it is, other backends pickle it again.
+    """
+
+    __slots__ = ("data", "compression")
+
+    def __init__(self, data: bytes, compression: str = ""):
+        self.data = data
+        self.compression = compression
+
+    def __getstate__(self):
+        return self.data, self.compression
+
+    def __setstate__(self, state):
+        self.data, self.compression = state
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if compression == "zlib":
+        return zlib.compress(data, 6)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def decompress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+class CodecSerializer(PickleSerializer):
+    """
+    A django-redis serializer which stores codec payloads as they are instead
+    of pickling them again. Other values are pickled as usual.
+    """
+
+    def dumps(self, value):
+        if isinstance(value, EncodedPayload):
+            return b"".join(
+                (PAYLOAD_MARKER, value.compression.encode(), b"\x00", value.data)
+            )
+        return super().dumps(value)
+
+    def loads(self, value):
+        if value.startswith(PAYLOAD_MARKER):
+            compression, _, data = value[len(PAYLOAD_MARKER) :].partition(b"\x00")
+            return EncodedPayload(data, compression.decode())
+        return super().loads(value)
+
+
+class CacheCodec:
+    """
+    Converts values to the form they're stored in the cache in. Decoding must
+    accept any value, as entries written before a codec was enabled may still
+    be present.
+    """
+
+    # The cache key version entries are stored under. Processes which store
+    # entries in another form use another version, so that they don't read
+    # entries they can't decode while both are running during a deployment.
+    version = 1
+
+    def encode(self, value: Any) -> Tuple[Any, int]:
+        """
+        :return: The value to store and its approximate size in bytes
+        """
+        raise NotImplementedError()
+
+    def decode(self, stored: Any) -> Any:
+        raise NotImplementedError()
+
+
+class PickleCodec(CacheCodec):
+    """
+    Stores values as the backend would, but pickles them up front with the
+    highest protocol so that their size can be measured.
+    """
+
+    version = 2
+
+    def encode(self, value: Any) -> Tuple[Any, int]:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        return EncodedPayload(data), len(data)
+
+    def decode(self, stored: Any) -> Any:
+        if not isinstance(stored, EncodedPayload):
+            return stored
+        data = stored.data
+        if stored.compression:
+            data = decompress(data, stored.compression)
+        return pickle.loads(data)
+
+
+class CompressingCodec(PickleCodec):
+    """
+    Compresses payloads larger than CACHE_COMPRESSION_THRESHOLD bytes, using
+    zstd if it's installed and zlib otherwise.
+    """
+
+    def __init__(self):
+        self.threshold = settings.CACHE_COMPRESSION_THRESHOLD
+        self.compression = "zstd" if ZSTD_AVAILABLE else "zlib"
+
+    def encode(self, value: Any) -> Tuple[Any, int]:
+        payload, size = super().encode(value)
+        if size <= self.threshold:
+            return payload, size
+        compressed = compress(payload.data, self.compression)
+        if len(compressed) >= size:
+            return payload, size
+        return EncodedPayload(compressed, self.compression), len(compressed)
+
+
+@lru_cache(maxsize=None)
+def get_cache_codec() -> CacheCodec:
+    return import_string(settings.CACHE_CODEC)()
+
+
+@receiver(setting_changed)
+def clear_cache_codec(setting: str, **kwargs) -> None:
+    if setting in ("CACHE_CODEC", "CACHE_COMPRESSION_THRESHOLD"):
+        get_cache_codec.cache_clear()
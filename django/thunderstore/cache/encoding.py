@@ -0,0 +1,162 @@
+import gzip
+from abc import ABC, abstractmethod
+from typing import IO, Any, Dict, Iterable, List, NamedTuple, Optional, Type
+
+from django.conf import settings
+
+try:
+    import brotli
+
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Stored files are compressed once and served many times, so compression
+# levels favor size, short of the slowest levels
+BROTLI_QUALITY = 9
+ZSTD_LEVEL = 12
+
+IDENTITY = "identity"
+
+
+class StreamCompressor(ABC):
+    """
+    Compresses data written to it into the wrapped file.
+    """
+
+    def __init__(self, file: IO[Any]):
+        self.file = file
+
+    @abstractmethod
+    def write(self, data: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+
+class GzipStreamCompressor(StreamCompressor):
+    def __init__(self, file: IO[Any]):
+        super().__init__(file)
+        # Omitting the timestamp keeps the output of identical content
+        # identical
+        self.gzip = gzip.GzipFile(fileobj=file, mode="wb", mtime=0)
+
+    def write(self, data: bytes) -> None:
+        self.gzip.write(data)
+
+    def close(self) -> None:
+        self.gzip.close()
+
+
+class BrotliStreamCompressor(StreamCompressor):
+    def __init__(self, file: IO[Any]):
+        super().__init__(file)
+        self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def write(self, data: bytes) -> None:
+        self.file.write(self.compressor.process(data))
+
+    def close(self) -> None:
+        self.file.write(self.compressor.finish())
+
+
+class ZstdStreamCompressor(StreamCompressor):
+    def __init__(self, file: IO[Any]):
+        super().__init__(file)
+        self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def write(self, data: bytes) -> None:
+        self.file.write(self.compressor.compress(data))
+
+    def close(self) -> None:
+        self.file.write(self.compressor.flush())
+
+
+class ContentEncoding(NamedTuple):
+    name: str
+    suffix: str
+    compressor: Type[StreamCompressor]
+    is_available: bool
+
+
+# In order of preference when a client accepts several equally
+CONTENT_ENCODINGS = {
+    x.name: x
+    for x in (
+        ContentEncoding("br", ".br", BrotliStreamCompressor, BROTLI_AVAILABLE),
+        ContentEncoding("zstd", ".zst", ZstdStreamCompressor, ZSTD_AVAILABLE),
+        ContentEncoding("gzip", ".gz", GzipStreamCompressor, True),
+    )
+}
+
+
+def get_content_encoding_by_suffix(name: str) -> Optional[ContentEncoding]:
+    for encoding in CONTENT_ENCODINGS.values():
+        if name.endswith(encoding.suffix):
+            return encoding
+    return None
+
+
+def get_index_content_encodings() -> List[str]:
+    """
+    Get the encodings package indexes are stored in. Gzip is always included,
+    as it's supported by every client.
+    """
+    enabled = set(settings.API_INDEX_CONTENT_ENCODINGS) | {"gzip"}
+    return [
+        x.name
+        for x in CONTENT_ENCODINGS.values()
+        if x.name in enabled and x.is_available
+    ]
+
+
+def parse_quality_values(header: str) -> Dict[str, float]:
+    """
+    Parse an Accept or Accept-Encoding header into the quality values of each
+    media range or coding.
+    """
+    result = {}
+    for item in header.split(","):
+        coding, *params = [x.strip() for x in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        result[coding.lower()] = quality
+    return result
+
+
+def choose_content_encoding(header: Optional[str], available: Iterable[str]) -> str:
+    """
+    Choose the encoding to respond with. Clients which don't send the
+    Accept-Encoding header get an uncompressed response, as do clients which
+    accept none of the available encodings.
+
+    :param available: The available encodings in order of preference
+    :return: The chosen encoding, or "identity" for no encoding
+    """
+    if not header:
+        return IDENTITY
+    accepted = parse_quality_values(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = IDENTITY, 0.0
+    for encoding in available:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
@@ -1,8 +1,70 @@
+from typing import Any, Optional, Tuple
+from urllib.parse import quote
+
 from thunderstore.core.utils import ChoiceEnum
 
+CACHE_BUST_PARAMETER_SEPARATOR = ":"
+
 
-# TODO: Support parameters in cache bust conditions (e.g. specific package update)
 class CacheBustCondition(ChoiceEnum):
     background_update_only = "manual_update_only"
     any_package_updated = "any_package_updated"
     dynamic_html_updated = "dynamic_html_updated"
+
+    # Parameterized conditions, which must be bound to a specific entity with
+    # the helper functions below before use.
+    package_updated = "package_updated"
+    community_packages_updated = "community_packages_updated"
+    namespace_packages_updated = "namespace_packages_updated"
+
+
+PARAMETERIZED_CACHE_BUST_CONDITIONS = (
+    CacheBustCondition.package_updated,
+    CacheBustCondition.community_packages_updated,
+    CacheBustCondition.namespace_packages_updated,
+)
+
+
+def parameterize_cache_bust_condition(condition: str, parameter: Any) -> str:
+    """
+    Bind a parameterized cache bust condition to a specific entity, e.g.
+    a single package or a single community.
+
+    The parameter is quoted so that it can't contain any characters with a
+    special meaning in cache keys or key patterns.
+    """
+    if condition not in PARAMETERIZED_CACHE_BUST_CONDITIONS:
+        raise ValueError(f"Cache bust condition is not parameterized: {condition}")
+    parameter = quote(str(parameter), safe="").replace(".", "%2E")
+    return f"{condition}{CACHE_BUST_PARAMETER_SEPARATOR}{parameter}"
+
+
+def split_cache_bust_condition(condition: str) -> Tuple[str, Optional[str]]:
+    base, separator, parameter = condition.partition(CACHE_BUST_PARAMETER_SEPARATOR)
+    return base, parameter if separator else None
+
+
+def validate_cache_bust_condition(condition: str) -> None:
+    base, parameter = split_cache_bust_condition(condition)
+    if base not in CacheBustCondition.options():
+        raise ValueError(f"Invalid cache bust condition: {condition}")
+    if (base in PARAMETERIZED_CACHE_BUST_CONDITIONS) != (parameter is not None):
+        raise ValueError(f"Invalid cache bust condition parameters: {condition}")
+
+
+def package_updated(package_id: int) -> str:
+    return parameterize_cache_bust_condition(
+        CacheBustCondition.package_updated, package_id
+    )
+
+
+def community_packages_updated(community_id: int) -> str:
+    return parameterize_cache_bust_condition(
+        CacheBustCondition.community_packages_updated, community_id
+    )
+
+
+def namespace_packages_updated(namespace: str) -> str:
+    return parameterize_cache_bust_condition(
+        CacheBustCondition.namespace_packages_updated, namespace
+    )
@@ -0,0 +1,104 @@
+from typing import Optional
+
+from django.core.cache import cache
+from redis.client import Script
+from redis.exceptions import RedisError
+
+from thunderstore.cache.enums import CacheBustCondition, split_cache_bust_condition
+from thunderstore.core.utils import capture_exception
+
+# How many keys are popped from an index and deleted at once
+CACHE_INDEX_BATCH_SIZE = 1000
+
+# Adds a cache key to an index set, extending the set's TTL so that it always
+# outlives the keys it contains. A negative TTL means the key never expires.
+REGISTER_CACHE_KEY_SCRIPT = """
+local existed = redis.call("EXISTS", KEYS[1])
+redis.call("SADD", KEYS[1], ARGV[1])
+local ttl = tonumber(ARGV[2])
+if ttl < 0 then
+    redis.call("PERSIST", KEYS[1])
+elseif existed == 0 then
+    redis.call("EXPIRE", KEYS[1], ttl)
+else
+    local current = redis.call("TTL", KEYS[1])
+    if current >= 0 and current < ttl then
+        redis.call("EXPIRE", KEYS[1], ttl)
+    end
+end
+"""
+
+# Created once and shared by every client. The script is passed as bytes so
+# that no client is needed for encoding it when computing its SHA.
+register_cache_key_script = Script(None, REGISTER_CACHE_KEY_SCRIPT.encode())
+
+
+def is_cache_index_supported() -> bool:
+    return hasattr(cache, "delete_pattern")
+
+
+def get_redis_client():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def get_cache_index_key(cache_bust_condition: str) -> str:
+    return cache.make_key(f"cacheindex.{cache_bust_condition}")
+
+
+def get_cache_key_condition(key: str) -> Optional[str]:
+    """
+    Parse the cache bust condition from a key built with `get_cache_key`.
+    Conditions never contain dots, so the second segment is always the full
+    condition.
+    """
+    prefix, _, remainder = key.partition(".")
+    if prefix != "cache" or not remainder:
+        return None
+    return remainder.partition(".")[0]
+
+
+def register_cache_key(key: str, timeout: Optional[int], version=None) -> None:
+    """
+    Record a cache key in the index of its cache bust condition, allowing it to
+    be invalidated without scanning the whole keyspace. Keys which are only
+    updated in the background are never invalidated, so they aren't indexed.
+    """
+    if not is_cache_index_supported():
+        return
+    condition = get_cache_key_condition(key)
+    if condition is None:
+        return
+    base, _ = split_cache_bust_condition(condition)
+    if base == CacheBustCondition.background_update_only:
+        return
+    try:
+        register_cache_key_script(
+            keys=[get_cache_index_key(condition)],
+            args=[
+                cache.make_key(key, version=version),
+                -1 if timeout is None else int(timeout),
+            ],
+            client=get_redis_client(),
+        )
+    except RedisError as e:  # pragma: no cover
+        capture_exception(e)
+
+
+def invalidate_cache_index(cache_bust_condition: str) -> int:
+    """
+    Delete every key registered under the given cache bust condition. Keys are
+    popped from the index atomically, so keys registered while the
+    invalidation is in progress are never dropped from the index without
+    being deleted.
+
+    :return: The amount of deleted index entries
+    """
+    client = get_redis_client()
+    index_key = get_cache_index_key(cache_bust_condition)
+    count = 0
+    while keys := client.spop(index_key, CACHE_INDEX_BATCH_SIZE):
+        client.delete(*keys)
+        count += len(keys)
+    return count
@@ -0,0 +1,162 @@
+import math
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from thunderstore.cache.index import get_cache_key_condition
+
+# Sentinel for local cache misses, as None is never stored in the cache
+MISSING = object()
+
+# Extra time (in seconds) generations are kept for on top of the longest time
+# local entries stored before they were bumped can live
+CACHE_GENERATION_TIMEOUT_MARGIN = 60
+
+
+def get_cache_generation_key(cache_bust_condition: str) -> str:
+    return f"cachegeneration.{cache_bust_condition}"
+
+
+class LocalCache:
+    """
+    A bounded, process-local LRU cache in front of the shared cache.
+
+    Entries are stored along with the generation of their cache bust
+    condition. The generations are stored in the shared cache and bumped on
+    every invalidation, but each process only re-reads them once per check
+    interval, so invalidations propagate to all workers within that interval.
+    Generations are only remembered for conditions which have local entries,
+    so they're bounded by the amount of entries as well.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[Any, float, int, str]]" = OrderedDict()
+        self._generations: Dict[str, Tuple[int, float]] = {}
+        self._condition_counts: Dict[str, int] = {}
+        self._lock = Lock()
+
+    @property
+    def is_enabled(self) -> bool:
+        return settings.CACHE_LOCAL_MAX_ENTRIES > 0
+
+    def get_generation(self, cache_bust_condition: str) -> int:
+        now = time.monotonic()
+        generation, checked_at = self._generations.get(cache_bust_condition, (0, None))
+        interval = settings.CACHE_LOCAL_GENERATION_CHECK_INTERVAL
+        if checked_at is None or now - checked_at >= interval:
+            key = get_cache_generation_key(cache_bust_condition)
+            generation = cache.get(key, 0)
+            with self._lock:
+                if cache_bust_condition in self._condition_counts:
+                    self._generations[cache_bust_condition] = (generation, now)
+        return generation
+
+    def _remove(self, key: str) -> None:
+        """
+        Remove an entry, forgetting the generation of its condition if it was
+        the condition's last entry. Must be called with the lock held.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        condition = entry[3]
+        count = self._condition_counts[condition] - 1
+        if count > 0:
+            self._condition_counts[condition] = count
+        else:
+            del self._condition_counts[condition]
+            self._generations.pop(condition, None)
+
+    def get(self, key: str) -> Any:
+        if not self.is_enabled:
+            return MISSING
+        condition = get_cache_key_condition(key)
+        if condition is None:
+            return MISSING
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            value, expires_at, generation, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return MISSING
+            self._entries.move_to_end(key)
+        if generation != self.get_generation(condition):
+            self.delete(key)
+            return MISSING
+        return value
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> None:
+        if not self.is_enabled:
+            return
+        condition = get_cache_key_condition(key)
+        if condition is None:
+            return
+        local_timeout = settings.CACHE_LOCAL_TIMEOUT
+        if timeout is not None:
+            local_timeout = min(local_timeout, timeout)
+        generation = self.get_generation(condition)
+        now = time.monotonic()
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, now + local_timeout, generation, condition)
+            self._condition_counts[condition] = (
+                self._condition_counts.get(condition, 0) + 1
+            )
+            self._generations.setdefault(condition, (generation, now))
+            while len(self._entries) > settings.CACHE_LOCAL_MAX_ENTRIES:
+                self._remove(next(iter(self._entries)))
+
+    def forget_generation(self, cache_bust_condition: str) -> None:
+        with self._lock:
+            self._generations.pop(cache_bust_condition, None)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._condition_counts.clear()
+
+
+local_cache = LocalCache()
+
+
+def get_cache_generation_timeout() -> int:
+    """
+    Get how long generations are kept for. A generation only has to outlive
+    the local entries stored before it was bumped, which expire within the
+    local cache timeout. Once it has expired, no remaining local entry can
+    have been stored with it.
+    """
+    return (
+        settings.CACHE_LOCAL_TIMEOUT
+        + math.ceil(settings.CACHE_LOCAL_GENERATION_CHECK_INTERVAL)
+        + CACHE_GENERATION_TIMEOUT_MARGIN
+    )
+
+
+def bump_cache_generation(cache_bust_condition: str) -> None:
+    """
+    Invalidate local cache entries of the given cache bust condition in every
+    process. Also drops this process' entries immediately.
+    """
+    if not local_cache.is_enabled:
+        return
+    # A unique value is written instead of incrementing the previous one, so
+    # a generation expiring and being bumped again can't repeat a value an
+    # entry was stored with
+    cache.set(
+        get_cache_generation_key(cache_bust_condition),
+        time.time_ns(),
+        timeout=get_cache_generation_timeout(),
+    )
+    local_cache.forget_generation(cache_bust_condition)
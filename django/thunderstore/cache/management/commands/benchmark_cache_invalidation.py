@@ -0,0 +1,90 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from thunderstore.cache.cache import cache_get_or_set, get_cache_key
+from thunderstore.cache.enums import package_updated
+from thunderstore.cache.index import (
+    get_cache_index_key,
+    get_redis_client,
+    invalidate_cache_index,
+    is_cache_index_supported,
+)
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares SCAN based pattern invalidation with index based invalidation "
+        "while a large amount of unrelated keys are present in Redis"
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--unrelated-key-count", type=int, default=1000000)
+        parser.add_argument("--entry-count", type=int, default=100)
+
+    def populate_unrelated_keys(self, prefix: str, count: int) -> None:
+        client = get_redis_client()
+        for start in range(0, count, BATCH_SIZE):
+            pipeline = client.pipeline(transaction=False)
+            for index in range(start, min(start + BATCH_SIZE, count)):
+                pipeline.set(f"{prefix}.{index}", b"", ex=60 * 60)
+            pipeline.execute()
+
+    def clear_unrelated_keys(self, prefix: str, count: int) -> None:
+        client = get_redis_client()
+        for start in range(0, count, BATCH_SIZE):
+            end = min(start + BATCH_SIZE, count)
+            client.delete(*(f"{prefix}.{index}" for index in range(start, end)))
+
+    def populate_entries(self, condition: str, count: int) -> None:
+        for index in range(count):
+            cache_get_or_set(
+                key=get_cache_key(
+                    cache_bust_condition=condition,
+                    cache_type="benchmark",
+                    key="entry",
+                    vary_on=(index,),
+                ),
+                default=lambda: "benchmark",
+                expiry=60 * 60,
+            )
+
+    def measure(self, name: str, fn) -> None:
+        start = time.perf_counter()
+        fn()
+        duration = time.perf_counter() - start
+        self.stdout.write(f"{name}: {duration * 1000:.1f} ms")
+
+    def handle(self, *args, **kwargs) -> None:
+        if not settings.DEBUG:
+            raise CommandError("Only executable in debug environments")
+        if not is_cache_index_supported():
+            raise CommandError("A Redis cache backend is required")
+
+        unrelated_count = kwargs["unrelated_key_count"]
+        entry_count = kwargs["entry_count"]
+        prefix = f"benchmark.{uuid.uuid4().hex}"
+        condition = package_updated(prefix.split(".")[1])
+
+        self.stdout.write(f"Populating {unrelated_count} unrelated keys")
+        self.populate_unrelated_keys(prefix, unrelated_count)
+        try:
+            self.populate_entries(condition, entry_count)
+            self.measure(
+                f"delete_pattern ({entry_count} entries)",
+                lambda: cache.delete_pattern(f"cache.{condition}.*"),
+            )
+            # The index still contains the keys deleted by the pattern delete
+            get_redis_client().delete(get_cache_index_key(condition))
+            self.populate_entries(condition, entry_count)
+            self.measure(
+                f"index ({entry_count} entries)",
+                lambda: invalidate_cache_index(condition),
+            )
+        finally:
+            self.clear_unrelated_keys(prefix, unrelated_count)
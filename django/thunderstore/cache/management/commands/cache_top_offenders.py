@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from thunderstore.cache.index import is_cache_index_supported
+from thunderstore.cache.metrics import (
+    COUNTER_METRICS,
+    GAUGE_METRICS,
+    HIT_METRIC,
+    LOCAL_HIT_METRIC,
+    MISS_METRIC,
+    PAYLOAD_SIZE_MAX_METRIC,
+    REGENERATION_SECONDS_METRIC,
+    STALE_METRIC,
+    flush_cache_metrics,
+    get_cache_metrics,
+    reset_cache_metrics,
+)
+
+COLUMNS = (
+    HIT_METRIC,
+    LOCAL_HIT_METRIC,
+    MISS_METRIC,
+    STALE_METRIC,
+    REGENERATION_SECONDS_METRIC,
+    PAYLOAD_SIZE_MAX_METRIC,
+)
+
+
+class Command(BaseCommand):
+    help = "Lists the cache key families with the worst cache metrics"
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--sort-by",
+            choices=COUNTER_METRICS + GAUGE_METRICS + ("miss_ratio",),
+            default=REGENERATION_SECONDS_METRIC,
+        )
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset all metrics after listing them",
+        )
+
+    def handle(self, *args, **kwargs) -> None:
+        if not is_cache_index_supported():
+            raise CommandError("A Redis cache backend is required")
+
+        flush_cache_metrics()
+        metrics = get_cache_metrics()
+        for values in metrics.values():
+            lookups = values[HIT_METRIC] + values[MISS_METRIC]
+            values["miss_ratio"] = values[MISS_METRIC] / lookups if lookups else 0
+
+        sort_by = kwargs["sort_by"]
+        families = sorted(metrics, key=lambda x: metrics[x][sort_by], reverse=True)
+        columns = tuple(dict.fromkeys((sort_by, *COLUMNS)))
+
+        self.stdout.write(
+            "  ".join(["family".ljust(60), *(x.rjust(20) for x in columns)])
+        )
+        for family in families[: kwargs["limit"]]:
+            values = metrics[family]
+            self.stdout.write(
+                "  ".join(
+                    [family.ljust(60), *(f"{values[x]:.2f}".rjust(20) for x in columns)]
+                )
+            )
+
+        if kwargs["reset"]:
+            reset_cache_metrics()
+            self.stdout.write("Cache metrics reset")
@@ -0,0 +1,240 @@
+import time
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from redis.exceptions import RedisError
+
+from thunderstore.cache.enums import split_cache_bust_condition
+from thunderstore.cache.index import get_redis_client, is_cache_index_supported
+from thunderstore.core.utils import capture_exception
+
+HIT_METRIC = "hits"
+LOCAL_HIT_METRIC = "local_hits"
+MISS_METRIC = "misses"
+STALE_METRIC = "stale"
+LOCK_CONTENTION_METRIC = "lock_contention"
+LOCK_WAIT_SECONDS_METRIC = "lock_wait_seconds"
+REGENERATION_METRIC = "regenerations"
+REGENERATION_SECONDS_METRIC = "regeneration_seconds"
+PAYLOAD_SIZE_METRIC = "payload_size"
+PAYLOAD_SIZE_MAX_METRIC = "payload_size_max"
+
+# Metrics which are summed up over time, as opposed to the payload sizes
+COUNTER_METRICS = (
+    HIT_METRIC,
+    LOCAL_HIT_METRIC,
+    MISS_METRIC,
+    STALE_METRIC,
+    LOCK_CONTENTION_METRIC,
+    LOCK_WAIT_SECONDS_METRIC,
+    REGENERATION_METRIC,
+    REGENERATION_SECONDS_METRIC,
+)
+GAUGE_METRICS = (
+    PAYLOAD_SIZE_METRIC,
+    PAYLOAD_SIZE_MAX_METRIC,
+)
+
+# Stores a value in a hash field only if it's larger than the current one
+RECORD_MAX_SCRIPT = """
+local current = tonumber(redis.call("HGET", KEYS[1], ARGV[1]) or "0")
+if tonumber(ARGV[2]) > current then
+    redis.call("HSET", KEYS[1], ARGV[1], ARGV[2])
+end
+"""
+
+
+def get_cache_key_family(key: str) -> Optional[str]:
+    """
+    Get the family of a key built with `get_cache_key`, which groups together
+    the entries of a single cached function, view or fragment regardless of
+    their vary arguments or cache bust condition parameters.
+    """
+    parts = key.split(".")
+    if parts[0] != "cache" or len(parts) < 5:
+        return None
+    condition, _ = split_cache_bust_condition(parts[1])
+    return ".".join([condition, *parts[2:-1]])
+
+
+def get_cache_metric_key(metric: str) -> str:
+    return cache.make_key(f"cachemetrics.{metric}")
+
+
+class CacheMetricsBuffer:
+    """
+    Accumulates counters in-process and flushes them to Redis periodically,
+    so that recording a cache hit doesn't cost a round trip of its own.
+    """
+
+    def __init__(self):
+        self._counters: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._last_flush = time.monotonic()
+        self._lock = Lock()
+
+    def record(self, metric: str, family: str, amount: float) -> None:
+        with self._lock:
+            self._counters[(metric, family)] += amount
+            interval = settings.CACHE_METRICS_FLUSH_INTERVAL
+            if time.monotonic() - self._last_flush < interval:
+                return
+            counters = self._counters
+            self._counters = defaultdict(float)
+            self._last_flush = time.monotonic()
+        self.write(counters)
+
+    def flush(self) -> None:
+        with self._lock:
+            counters = self._counters
+            self._counters = defaultdict(float)
+            self._last_flush = time.monotonic()
+        self.write(counters)
+
+    def write(self, counters: Dict[Tuple[str, str], float]) -> None:
+        if not counters or not is_cache_index_supported():
+            return
+        try:
+            pipeline = get_redis_client().pipeline(transaction=False)
+            for (metric, family), amount in counters.items():
+                key = get_cache_metric_key(metric)
+                if float(amount).is_integer():
+                    pipeline.hincrby(key, family, int(amount))
+                else:
+                    pipeline.hincrbyfloat(key, family, amount)
+            pipeline.execute()
+        except RedisError as e:  # pragma: no cover
+            capture_exception(e)
+
+
+metrics_buffer = CacheMetricsBuffer()
+
+
+def record_cache_metric(key: str, metric: str, amount: float = 1) -> None:
+    if not settings.CACHE_METRICS_ENABLED:
+        return
+    family = get_cache_key_family(key)
+    if family is None:
+        return
+    metrics_buffer.record(metric, family, amount)
+
+
+def flush_cache_metrics() -> None:
+    metrics_buffer.flush()
+
+
+def get_cache_metrics() -> Dict[str, Dict[str, float]]:
+    """
+    Read the metrics of every key family from Redis.
+
+    :return: The metric values by key family and metric name
+    """
+    if not is_cache_index_supported():
+        return {}
+    metrics = COUNTER_METRICS + GAUGE_METRICS
+    pipeline = get_redis_client().pipeline(transaction=False)
+    for metric in metrics:
+        pipeline.hgetall(get_cache_metric_key(metric))
+    result: Dict[str, Dict[str, float]] = defaultdict(
+        lambda: {metric: 0 for metric in metrics}
+    )
+    for metric, values in zip(metrics, pipeline.execute()):
+        for family, value in values.items():
+            result[family.decode()][metric] = float(value)
+    return dict(result)
+
+
+def reset_cache_metrics() -> None:
+    if not is_cache_index_supported():
+        return
+    get_redis_client().delete(
+        *(get_cache_metric_key(x) for x in COUNTER_METRICS + GAUGE_METRICS)
+    )
+
+
+def get_cache_traffic_metric(cache_bust_condition: str) -> str:
+    return f"traffic.{cache_bust_condition}"
+
+
+def record_cache_traffic(cache_bust_condition: str, target: str) -> None:
+    """
+    Count a request for a cache warming target, e.g. a specific ordering of a
+    package list, which was served under the given cache bust condition.
+    """
+    if not settings.CACHE_METRICS_ENABLED:
+        return
+    metrics_buffer.record(get_cache_traffic_metric(cache_bust_condition), target, 1)
+
+
+def pop_cache_traffic(cache_bust_condition: str) -> Dict[str, float]:
+    """
+    Read and reset the traffic recorded for the given cache bust condition.
+
+    :return: The request counts by cache warming target
+    """
+    if not is_cache_index_supported():
+        return {}
+    key = get_cache_metric_key(get_cache_traffic_metric(cache_bust_condition))
+    pipeline = get_redis_client().pipeline(transaction=True)
+    pipeline.hgetall(key)
+    pipeline.delete(key)
+    values, _ = pipeline.execute()
+    return {target.decode(): float(count) for target, count in values.items()}
+
+
+def record_cache_payload_size(key: str, size: int) -> None:
+    """
+    Record the encoded size of a cache entry for its key family. Entries are
+    only written on regeneration, so this isn't on the hot path.
+    """
+    if not settings.CACHE_METRICS_ENABLED:
+        return
+    family = get_cache_key_family(key)
+    if family is None or not is_cache_index_supported():
+        return
+    try:
+        pipeline = get_redis_client().pipeline(transaction=False)
+        pipeline.hset(get_cache_metric_key(PAYLOAD_SIZE_METRIC), family, size)
+        pipeline.eval(
+            RECORD_MAX_SCRIPT,
+            1,
+            get_cache_metric_key(PAYLOAD_SIZE_MAX_METRIC),
+            family,
+            size,
+        )
+        pipeline.execute()
+    except RedisError as e:  # pragma: no cover
+        capture_exception(e)
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_metric_value(value: float) -> str:
+    # Integral values are rendered as integers and others in full precision,
+    # as large counters would lose precision in shorter formats
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_prometheus_metrics(metrics: Dict[str, Dict[str, float]]) -> str:
+    """
+    Render cache metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in COUNTER_METRICS + GAUGE_METRICS:
+        if metric in COUNTER_METRICS:
+            name, kind = f"thunderstore_cache_{metric}_total", "counter"
+        else:
+            name, kind = f"thunderstore_cache_{metric}_bytes", "gauge"
+        lines.append(f"# TYPE {name} {kind}")
+        for family, values in sorted(metrics.items()):
+            label = escape_label_value(family)
+            lines.append(
+                f'{name}{{family="{label}"}} {format_metric_value(values[metric])}'
+            )
+    return "\n".join(lines) + "\n"
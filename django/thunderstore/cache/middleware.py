@@ -0,0 +1,22 @@
+from thunderstore.cache.cache import _stale_cache_age, get_stale_cache_age
+
+
+class CacheStaleAgeHeaderMiddleware:
+    """
+    Reports the age of the oldest stale cache entry used to build the
+    response, allowing stale-while-revalidate hits to be monitored.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _stale_cache_age.set(None)
+        try:
+            response = self.get_response(request)
+            age = get_stale_cache_age()
+            if age is not None:
+                response["Django-Cache-Stale-Age"] = int(age)
+            return response
+        finally:
+            _stale_cache_age.reset(token)
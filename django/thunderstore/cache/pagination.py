@@ -1,14 +1,28 @@
-from django.core.paginator import Page, Paginator
-from django.db.models import QuerySet
+from typing import List, Optional, Tuple
+
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Count, QuerySet, Window
 from django.utils.functional import cached_property
 
-from thunderstore.cache.cache import cache_get_or_set_by_key
+from thunderstore.cache.cache import (
+    DEFAULT_CACHE_EXPIRY,
+    cache_get,
+    cache_get_or_set_by_key,
+    get_cache_key,
+)
+
+# Annotation used for reading the total row count along with the page rows
+WINDOW_COUNT_ANNOTATION = "_paginator_total_count"
 
 
 class CachedPaginator(Paginator):
     """
     A paginator that caches pages and doesn't need to re-evaluate queries
     as long as cache is available
+
+    Each page is cached together with the total count, so rendering a page
+    only takes a single cache lookup. On a miss, both are computed with a
+    single query.
     """
 
     def __init__(
@@ -20,10 +34,12 @@ class CachedPaginator(Paginator):
         cache_bust_condition: str,
         orphans=0,
         allow_empty_first_page=True,
+        stale_while_revalidate: bool = False,
     ):
         self.cache_key = cache_key
         self.cache_vary = cache_vary
         self.cache_bust_condition = cache_bust_condition
+        self.stale_while_revalidate = stale_while_revalidate
         super().__init__(
             object_list,
             per_page,
@@ -31,51 +47,116 @@ class CachedPaginator(Paginator):
             allow_empty_first_page=allow_empty_first_page,
         )
 
-    def _get_page(self, *args, **kwargs):
-        return CachedPage(
-            *args,
-            cache_key=self.cache_key,
-            cache_vary=self.cache_vary,
-            cache_bust_condition=self.cache_bust_condition,
-            **kwargs,
-        )
-
     @cached_property
     def count(self):
         return cache_get_or_set_by_key(
             condition=self.cache_bust_condition,
-            cache_key=f"{self.cache_key}.count",
+            cache_key=self.count_cache_key,
             cache_vary=self.cache_vary,
             get_default=lambda: super(CachedPaginator, self).count,
+            stale_while_revalidate=self.stale_while_revalidate,
+            use_local_cache=True,
         )
 
-    def _check_object_list_is_ordered(self):
-        # TODO: Better way to override?
-        pass
+    @property
+    def count_cache_key(self) -> str:
+        return f"{self.cache_key}.count"
 
+    def get_cached_count(self) -> Optional[int]:
+        """
+        Get the total count if it's cached, without querying it otherwise.
+        """
+        return cache_get(
+            get_cache_key(
+                cache_bust_condition=self.cache_bust_condition,
+                cache_type="key",
+                key=self.count_cache_key,
+                vary_on=self.cache_vary,
+            ),
+            expiry=DEFAULT_CACHE_EXPIRY,
+            use_local_cache=True,
+        )
 
-class CachedPage(Page):
-    def __init__(
-        self,
-        object_list,
-        number,
-        paginator,
-        cache_key: str,
-        cache_vary: str,
-        cache_bust_condition: str,
-    ):
-        self.cache_key = cache_key
-        self.cache_vary = cache_vary
-        self.cache_bust_condition = cache_bust_condition
-        self._object_list = object_list
-        self.number = number
-        super().__init__(self.object_list, number, paginator)
+    def validate_number_format(self, number) -> int:
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger("That page number is not an integer")
+        if number < 1:
+            raise EmptyPage("That page number is less than 1")
+        return number
 
-    @cached_property
-    def object_list(self):
-        return cache_get_or_set_by_key(
+    def page(self, number):
+        number = self.validate_number_format(number)
+        count, object_list = cache_get_or_set_by_key(
             condition=self.cache_bust_condition,
-            cache_key=f"{self.cache_key}.page.{self.number}",
+            cache_key=f"{self.cache_key}.counted_page.{number}",
             cache_vary=self.cache_vary,
-            get_default=lambda: list(self._object_list),
+            get_default=lambda: self.get_valid_counted_page(number),
+            stale_while_revalidate=self.stale_while_revalidate,
         )
+        # The count is known now, so validating the number won't query it
+        self.__dict__["count"] = count
+        number = self.validate_number(number)
+        return Page(object_list, number, self)
+
+    def get_valid_counted_page(self, number: int) -> Tuple[int, List]:
+        """
+        Get a counted page for caching, raising instead if the page is out of
+        range so that empty pages don't get cached. The count is cached as
+        well, which allows rejecting further out of range pages cheaply.
+        """
+        count = self.get_cached_count()
+        if count is not None:
+            # Reject out of range pages without querying them
+            self.__dict__["count"] = count
+            self.validate_number(number)
+        count, rows = self.get_counted_page(number)
+        cache_get_or_set_by_key(
+            condition=self.cache_bust_condition,
+            cache_key=self.count_cache_key,
+            cache_vary=self.cache_vary,
+            get_default=lambda: count,
+            use_local_cache=True,
+        )
+        if not rows and number > 1:
+            raise EmptyPage("That page contains no results")
+        return count, rows
+
+    def get_counted_page(self, number: int) -> Tuple[int, List]:
+        """
+        Query the rows of a page along with the total row count. The count is
+        read from a window function annotation where possible, which saves a
+        separate count query.
+        """
+        bottom = (number - 1) * self.per_page
+        # Fetch the orphans too, as the count isn't known in advance
+        limit = bottom + self.per_page + self.orphans
+        queryset = self.object_list
+        count = None
+        if isinstance(queryset, QuerySet) and not queryset.query.distinct:
+            # Window functions are evaluated before DISTINCT, so they'd count
+            # duplicate rows too
+            queryset = queryset.annotate(
+                **{WINDOW_COUNT_ANNOTATION: Window(expression=Count("pk"))}
+            )
+            rows = list(queryset[bottom:limit])
+            if rows:
+                count = getattr(rows[0], WINDOW_COUNT_ANNOTATION)
+            for row in rows:
+                delattr(row, WINDOW_COUNT_ANNOTATION)
+        else:
+            rows = list(queryset[bottom:limit])
+        if count is None:
+            count = super().count
+
+        top = bottom + self.per_page
+        if top + self.orphans >= count:
+            top = count
+        return count, rows[: max(top - bottom, 0)]
+
+    def _check_object_list_is_ordered(self):
+        # TODO: Better way to override?
+        pass
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent after the entries of a cache bust condition have been invalidated, with
+# the invalidated condition as the `cache_bust_condition` argument.
+cache_invalidated = Signal()
@@ -0,0 +1,87 @@
+import pickle
+from threading import Event, Lock
+from typing import Any, Callable, Dict
+
+
+class _Flight:
+    __slots__ = ("done", "result", "failed", "waiters")
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.failed = False
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls for the same key within a process. The
+    first caller runs the function while the others wait for its result,
+    which with gevent workers means waiting on a greenlet instead of all of
+    them competing for the cross-process cache lock.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = Lock()
+
+    def do(
+        self,
+        key: str,
+        fn: Callable[[], Any],
+        timeout: float,
+        copy_result: bool = True,
+    ) -> Any:
+        """
+        :param timeout: How long to wait for another caller before running
+            the function without it
+        :param copy_result: Whether waiting callers should receive a copy of
+            the result instead of the same object, which is needed unless the
+            result is never mutated
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if not is_leader:
+            if not flight.done.wait(timeout) or flight.failed:
+                return fn()
+            if copy_result:
+                return pickle.loads(flight.result)
+            return flight.result
+
+        try:
+            result = fn()
+        except BaseException:
+            flight.failed = True
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            # No more waiters can join once the flight has been removed
+            if not flight.failed:
+                self._publish(flight, result, copy_result)
+            flight.done.set()
+        return result
+
+    def _publish(self, flight: _Flight, result: Any, copy_result: bool) -> None:
+        if not flight.waiters:
+            return
+        if not copy_result:
+            flight.result = result
+            return
+        try:
+            flight.result = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # The waiters will run the function themselves
+            flight.failed = True
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+
+single_flight = SingleFlight()
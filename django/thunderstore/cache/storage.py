@@ -1,15 +1,38 @@
+import mimetypes
+from hashlib import sha256
+from typing import IO, Any, Dict, Iterable, List, NamedTuple
+
 from django.conf import settings
+from django.core.files.storage import Storage
 from storages.backends.s3boto3 import S3Boto3Storage
 
+from thunderstore.cache.encoding import (
+    CONTENT_ENCODINGS,
+    get_content_encoding_by_suffix,
+)
 from thunderstore.utils.makemigrations import StubStorage, is_migrate_check
 
 
+class CacheS3Storage(S3Boto3Storage):
+    def get_object_parameters(self, name: str) -> Dict[str, Any]:
+        # Not every content encoding is known by mimetypes, which is used for
+        # detecting the encoding by default
+        params = super().get_object_parameters(name)
+        encoding = get_content_encoding_by_suffix(name)
+        if encoding is not None:
+            params.setdefault("ContentEncoding", encoding.name)
+            content_type, _ = mimetypes.guess_type(name[: -len(encoding.suffix)])
+            if content_type:
+                params.setdefault("ContentType", content_type)
+        return params
+
+
 def get_cache_storage():
     # Required as a placeholder stub for migrations, otherwise Django thinks
     # something keeps changing due to settings being different.
     if is_migrate_check():
         return StubStorage()
-    return S3Boto3Storage(
+    return CacheS3Storage(
         **{
             "access_key": settings.CACHE_S3_ACCESS_KEY_ID,
             "secret_key": settings.CACHE_S3_SECRET_ACCESS_KEY,
@@ -27,3 +50,111 @@ def get_cache_storage():
 
 
 CACHE_STORAGE = get_cache_storage()
+
+
+class SavedStream(NamedTuple):
+    name: str
+    checksum_sha256: str
+    size: int
+
+
+class HashingWriter:
+    """
+    Write to the wrapped file while keeping track of the checksum and size
+    of everything written.
+    """
+
+    def __init__(self, file: IO[Any]):
+        self.file = file
+        self.hash = sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.hash.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def flush(self) -> None:
+        pass
+
+
+class CompressedStreamsWriter:
+    """
+    Compress the data written to it into a file for each of the encodings as
+    it's written. With S3 storage the files are sent as multipart uploads, so
+    only a single part of each is held in memory at a time instead of the
+    whole file.
+
+    The checksums and sizes of the saved files are those of the compressed
+    files. Compressed files don't include timestamps, so identical content
+    always results in identical checksums.
+
+    :param name: The file name, which is suffixed by the encoding
+    """
+
+    def __init__(self, storage: Storage, name: str, encodings: List[str]):
+        self.storage = storage
+        self.names = {
+            encoding: storage.get_available_name(
+                f"{name}{CONTENT_ENCODINGS[encoding].suffix}"
+            )
+            for encoding in encodings
+        }
+        self.files = {
+            encoding: storage.open(x, "wb") for encoding, x in self.names.items()
+        }
+        self.writers = {
+            encoding: HashingWriter(file) for encoding, file in self.files.items()
+        }
+        self.compressors = {
+            encoding: CONTENT_ENCODINGS[encoding].compressor(writer)
+            for encoding, writer in self.writers.items()
+        }
+
+    def write(self, data: bytes) -> None:
+        for compressor in self.compressors.values():
+            compressor.write(data)
+
+    def close(self) -> Dict[str, SavedStream]:
+        """
+        Finish the files.
+
+        :return: The saved files by encoding
+        """
+        for compressor in self.compressors.values():
+            compressor.close()
+        for file in self.files.values():
+            file.close()
+        return {
+            encoding: SavedStream(
+                self.names[encoding], writer.hash.hexdigest(), writer.size
+            )
+            for encoding, writer in self.writers.items()
+        }
+
+    def abort(self) -> None:
+        # The uploads can't be cancelled through the storage API, so remove
+        # the incomplete files instead
+        for encoding, file in self.files.items():
+            file.close()
+            self.storage.delete(self.names[encoding])
+
+
+def save_compressed_streams(
+    storage: Storage, name: str, chunks: Iterable[bytes], encodings: List[str]
+) -> Dict[str, SavedStream]:
+    """
+    Compress the chunks into a file for each of the encodings as they're
+    produced, see CompressedStreamsWriter.
+
+    :param name: The file name, which is suffixed by the encoding
+    :return: The saved files by encoding
+    """
+    writer = CompressedStreamsWriter(storage, name, encodings)
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
@@ -0,0 +1,238 @@
+import re
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from django.db.models.fields.files import FieldFile
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from thunderstore.cache.encoding import IDENTITY, choose_content_encoding
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+BYTE_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header requesting a single byte range.
+
+    :return: The inclusive start and end offsets, or None if the header
+        should be ignored, such as when requesting multiple ranges
+    :raises RangeNotSatisfiable: If the range is outside of the content
+    """
+    match = BYTE_RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        # A suffix range, e.g. the last 500 bytes
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if end == "":
+        return start, size - 1
+    end = int(end)
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class StorageFileReader:
+    """
+    Read byte ranges of a stored file without loading the whole file. S3 files
+    are streamed with ranged GET requests, other storages are read through
+    the regular file API.
+    """
+
+    def __init__(self, file: FieldFile):
+        self.file = file.storage.open(file.name, "rb")
+        # Only S3 files have an object handle, and its metadata has already
+        # been loaded when opening the file
+        self.s3_object = getattr(self.file, "obj", None)
+
+    @property
+    def size(self) -> int:
+        if self.s3_object is not None:
+            return self.s3_object.content_length
+        return self.file.size
+
+    def iterate(self, start: int, end: int) -> Iterator[bytes]:
+        try:
+            if end < start:
+                return
+            if self.s3_object is not None:
+                body = self.s3_object.get(Range=f"bytes={start}-{end}")["Body"]
+                try:
+                    yield from body.iter_chunks(STREAM_CHUNK_SIZE)
+                finally:
+                    body.close()
+                return
+            self.file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = self.file.read(min(STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            self.file.close()
+
+
+def is_range_precondition_met(
+    request: HttpRequest, etag: Optional[str], last_modified: int
+) -> bool:
+    """
+    Check the If-Range header, which requires a range to be ignored unless
+    the representation is unchanged.
+    """
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # Only strong validators may be used for ranges
+        return etag is not None and if_range == etag
+    return if_range == http_date(last_modified)
+
+
+def get_stored_file_response(
+    request: HttpRequest,
+    file: FieldFile,
+    content_type: str,
+    content_encoding: str,
+    last_modified: int,
+    checksum: Optional[str] = None,
+) -> HttpResponseBase:
+    """
+    Stream a stored file, supporting conditional and single range requests.
+
+    :param last_modified: The modification time as a timestamp
+    :param checksum: A checksum of the stored file, which is used as a strong
+        ETag if available
+    """
+    etag = quote_etag(checksum) if checksum else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        reader = StorageFileReader(file)
+        size = reader.size
+        byte_range = None
+        try:
+            if "HTTP_RANGE" in request.META and is_range_precondition_met(
+                request, etag, last_modified
+            ):
+                byte_range = parse_byte_range(request.META["HTTP_RANGE"], size)
+        except RangeNotSatisfiable:
+            reader.file.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        start, end = byte_range or (0, size - 1)
+        response = StreamingHttpResponse(
+            reader.iterate(start, end),
+            status=200 if byte_range is None else 206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = str(end - start + 1)
+        if byte_range is not None:
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Encoding"] = content_encoding
+        response["Last-Modified"] = http_date(last_modified)
+        response["Accept-Ranges"] = "bytes"
+
+    if etag:
+        response["ETag"] = etag
+    return response
+
+
+def iterate_gunzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    data = decompressor.flush()
+    if data:
+        yield data
+
+
+def get_decompressed_file_response(
+    request: HttpRequest,
+    file: FieldFile,
+    content_type: str,
+    last_modified: int,
+    checksum: Optional[str] = None,
+) -> HttpResponseBase:
+    """
+    Stream a gzip compressed stored file decompressed, for clients which
+    don't accept compressed responses. Range requests are ignored as the
+    decompressed size isn't known up front.
+
+    :param last_modified: The modification time as a timestamp
+    :param checksum: A checksum of the stored file, which is used for building
+        an ETag if available
+    """
+    etag = quote_etag(f"{checksum}-identity") if checksum else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        reader = StorageFileReader(file)
+        response = StreamingHttpResponse(
+            iterate_gunzip(reader.iterate(0, reader.size - 1)),
+            content_type=content_type,
+        )
+        response["Last-Modified"] = http_date(last_modified)
+
+    if etag:
+        response["ETag"] = etag
+    return response
+
+
+def get_encoded_file_response(
+    request: HttpRequest,
+    files: Dict[str, Tuple[FieldFile, Optional[str]]],
+    content_type: str,
+    last_modified: int,
+) -> HttpResponseBase:
+    """
+    Stream the variant of a stored file the client accepts best. Variants are
+    chosen by the Accept-Encoding header, falling back to decompressing the
+    gzip variant for clients which don't accept any of them.
+
+    :param files: The stored files and their checksums by encoding, in order
+        of preference. Must include a gzip variant.
+    """
+    encoding = choose_content_encoding(
+        request.META.get("HTTP_ACCEPT_ENCODING"), files.keys()
+    )
+    if encoding == IDENTITY:
+        file, checksum = files["gzip"]
+        response = get_decompressed_file_response(
+            request,
+            file=file,
+            content_type=content_type,
+            last_modified=last_modified,
+            checksum=checksum,
+        )
+    else:
+        file, checksum = files[encoding]
+        response = get_stored_file_response(
+            request,
+            file=file,
+            content_type=content_type,
+            content_encoding=encoding,
+            last_modified=last_modified,
+            checksum=checksum,
+        )
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
@@ -1,22 +1,57 @@
+from typing import Optional
+
 from celery import shared_task
 from django.conf import settings
-from django.core.cache import cache
 
-from thunderstore.cache.enums import CacheBustCondition
+from thunderstore.cache.enums import (
+    CacheBustCondition,
+    split_cache_bust_condition,
+    validate_cache_bust_condition,
+)
+from thunderstore.cache.index import invalidate_cache_index, is_cache_index_supported
+from thunderstore.cache.local import bump_cache_generation
+from thunderstore.cache.signals import cache_invalidated
 from thunderstore.core.settings import CeleryQueues
 from thunderstore.utils.decorators import run_after_commit
 
 
+def is_cache_bust_condition_disabled(cache_bust_condition: str) -> bool:
+    base, _ = split_cache_bust_condition(cache_bust_condition)
+    disabled = settings.DISABLED_CACHE_BUST_CONDITIONS
+    return cache_bust_condition in disabled or base in disabled
+
+
 @run_after_commit
-def invalidate_cache_on_commit_async(cache_bust_condition: str):
-    if cache_bust_condition in settings.DISABLED_CACHE_BUST_CONDITIONS:
-        return
-    invalidate_cache.delay(cache_bust_condition)
+def invalidate_cache_on_commit_async(*cache_bust_conditions: str):
+    conditions = [
+        x
+        for x in dict.fromkeys(cache_bust_conditions)
+        if not is_cache_bust_condition_disabled(x)
+    ]
+    if conditions:
+        invalidate_cache.delay(*conditions)
 
 
 @shared_task(queue=CeleryQueues.BackgroundCache)
-def invalidate_cache(cache_bust_condition: str):
-    if cache_bust_condition == CacheBustCondition.background_update_only:
-        raise AttributeError("Invalid cache bust condition")
-    if hasattr(cache, "delete_pattern"):
-        cache.delete_pattern(f"cache.{cache_bust_condition}.*")
+def invalidate_cache(
+    *cache_bust_conditions: str, cache_bust_condition: Optional[str] = None
+):
+    """
+    :param cache_bust_condition: A single condition, as passed by tasks queued
+        before multiple conditions were supported
+    """
+    if cache_bust_condition is not None:
+        cache_bust_conditions = (*cache_bust_conditions, cache_bust_condition)
+    for cache_bust_condition in cache_bust_conditions:
+        validate_cache_bust_condition(cache_bust_condition)
+        base, _ = split_cache_bust_condition(cache_bust_condition)
+        if base == CacheBustCondition.background_update_only:
+            raise AttributeError("Invalid cache bust condition")
+
+    for cache_bust_condition in cache_bust_conditions:
+        bump_cache_generation(cache_bust_condition)
+        if is_cache_index_supported():
+            invalidate_cache_index(cache_bust_condition)
+        cache_invalidated.send(
+            sender=invalidate_cache, cache_bust_condition=cache_bust_condition
+        )
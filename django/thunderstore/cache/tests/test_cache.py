@@ -1,8 +1,15 @@
 import time
 from typing import Any
 
-from thunderstore.cache.cache import cache_function_result
-from thunderstore.cache.enums import CacheBustCondition
+import pytest
+
+from thunderstore.cache.cache import cache_function_result, get_cache_key
+from thunderstore.cache.enums import (
+    CacheBustCondition,
+    namespace_packages_updated,
+    package_updated,
+)
+from thunderstore.cache.tasks import invalidate_cache, invalidate_cache_on_commit_async
 
 
 def test_cache_clear_with_args() -> None:
@@ -21,3 +28,81 @@ def test_cache_clear_with_args() -> None:
     first_busted = get_time("test")
     assert first_busted > first
     assert first_busted > second
+
+
+def test_get_cache_key_parameterized_condition() -> None:
+    condition = package_updated(1)
+    assert condition == "package_updated:1"
+    key = get_cache_key(condition, "func", "test", ())
+    assert key.startswith("cache.package_updated:1.func.test.")
+    assert namespace_packages_updated("a.b*") == "namespace_packages_updated:a%2Eb%2A"
+
+
+@pytest.mark.parametrize(
+    "condition",
+    (
+        "invalid",
+        CacheBustCondition.package_updated,
+        f"{CacheBustCondition.any_package_updated}:1",
+    ),
+)
+def test_get_cache_key_invalid_condition(condition: str) -> None:
+    with pytest.raises(ValueError):
+        get_cache_key(condition, "func", "test", ())
+
+
+def test_cache_function_result_parameterized_condition() -> None:
+    @cache_function_result(lambda cache_vary: package_updated(cache_vary))
+    def get_time(cache_vary: int) -> float:
+        return time.time()
+
+    first = get_time(1)
+    time.sleep(0.01)
+    assert get_time(1) == first
+    invalidate_cache(package_updated(2))
+    assert get_time(1) == first
+    invalidate_cache(package_updated(1))
+    assert get_time(1) > first
+
+
+def test_invalidate_cache_multiple_conditions() -> None:
+    @cache_function_result(lambda cache_vary: package_updated(cache_vary))
+    def get_time(cache_vary: int) -> float:
+        return time.time()
+
+    first = (get_time(1), get_time(2))
+    time.sleep(0.01)
+    invalidate_cache(package_updated(1), package_updated(2))
+    assert get_time(1) > first[0]
+    assert get_time(2) > first[1]
+
+
+def test_invalidate_cache_legacy_keyword() -> None:
+    @cache_function_result(lambda cache_vary: package_updated(cache_vary))
+    def get_time(cache_vary: int) -> float:
+        return time.time()
+
+    first = get_time(1)
+    time.sleep(0.01)
+    # Tasks queued by earlier releases pass a single condition by keyword
+    invalidate_cache(cache_bust_condition=package_updated(1))
+    assert get_time(1) > first
+
+
+def test_invalidate_cache_rejects_background_update_only() -> None:
+    with pytest.raises(AttributeError, match="Invalid cache bust condition"):
+        invalidate_cache(package_updated(1), CacheBustCondition.background_update_only)
+
+
+def test_invalidate_cache_on_commit_async_queues_single_task(settings, mocker) -> None:
+    settings.DISABLED_CACHE_BUST_CONDITIONS = [CacheBustCondition.any_package_updated]
+    delay = mocker.patch("thunderstore.cache.tasks.invalidate_cache.delay")
+    invalidate_cache_on_commit_async.__wrapped__(
+        package_updated(1),
+        CacheBustCondition.any_package_updated,
+        package_updated(1),
+        namespace_packages_updated("test"),
+    )
+    delay.assert_called_once_with(
+        package_updated(1), namespace_packages_updated("test")
+    )
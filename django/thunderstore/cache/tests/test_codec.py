@@ -0,0 +1,123 @@
+import pytest
+from django.core.cache import cache
+
+from thunderstore.cache.cache import (
+    cache_get_or_set,
+    get_cache_entry_version,
+    get_cache_key,
+)
+from thunderstore.cache.codec import (
+    PAYLOAD_MARKER,
+    CacheCodec,
+    CodecSerializer,
+    CompressingCodec,
+    EncodedPayload,
+    PickleCodec,
+    get_cache_codec,
+)
+from thunderstore.cache.enums import community_packages_updated, package_updated
+from thunderstore.cache.index import get_redis_client
+from thunderstore.cache.metrics import (
+    PAYLOAD_SIZE_MAX_METRIC,
+    PAYLOAD_SIZE_METRIC,
+    get_cache_key_family,
+    get_cache_metric_key,
+)
+
+
+def test_pickle_codec_roundtrip() -> None:
+    codec = PickleCodec()
+    encoded, size = codec.encode({"a": [1, 2, 3]})
+    assert isinstance(encoded, EncodedPayload)
+    assert size == len(encoded.data)
+    assert codec.decode(encoded) == {"a": [1, 2, 3]}
+
+
+def test_codec_decodes_unencoded_values() -> None:
+    assert PickleCodec().decode("legacy") == "legacy"
+    assert PickleCodec().decode(None) is None
+
+
+@pytest.mark.parametrize("threshold", (0, 10**6))
+def test_compressing_codec(settings, threshold: int) -> None:
+    settings.CACHE_COMPRESSION_THRESHOLD = threshold
+    value = "a" * 10000
+    codec = CompressingCodec()
+    encoded, size = codec.encode(value)
+    assert bool(encoded.compression) == (threshold == 0)
+    assert size == len(encoded.data)
+    assert codec.decode(encoded) == value
+
+
+def test_compressing_codec_skips_incompressible(settings) -> None:
+    settings.CACHE_COMPRESSION_THRESHOLD = 0
+    encoded, _ = CompressingCodec().encode(b"")
+    assert encoded.compression == ""
+
+
+@pytest.mark.parametrize("compression", ("", "zlib"))
+def test_codec_serializer(compression: str) -> None:
+    serializer = CodecSerializer({})
+    payload = EncodedPayload(b"\x00data\x00", compression)
+    stored = serializer.dumps(payload)
+    assert stored.endswith(payload.data)
+    loaded = serializer.loads(stored)
+    assert (loaded.data, loaded.compression) == (payload.data, compression)
+    assert serializer.loads(serializer.dumps({"a": 1})) == {"a": 1}
+
+
+def test_codec_payload_stored_as_is() -> None:
+    cache.clear()
+    key = get_cache_key(package_updated(1), "test", "serializer", ())
+    cache_get_or_set(key, lambda: "value")
+    stored = get_redis_client().get(
+        cache.make_key(key, version=get_cache_entry_version())
+    )
+    assert stored.startswith(PAYLOAD_MARKER)
+    assert PickleCodec().decode(CodecSerializer({}).loads(stored)) == "value"
+
+
+def test_codec_entries_versioned() -> None:
+    cache.clear()
+    key = get_cache_key(package_updated(1), "test", "version", ())
+    cache_get_or_set(key, lambda: "value")
+    # Processes storing entries in another form don't see them
+    assert get_cache_entry_version() == PickleCodec.version != CacheCodec.version
+    assert cache.get(key, version=CacheCodec.version) is None
+    assert cache.get(key, version=get_cache_entry_version()) is not None
+
+
+def test_get_cache_codec(settings) -> None:
+    settings.CACHE_CODEC = "thunderstore.cache.codec.PickleCodec"
+    assert type(get_cache_codec()) is PickleCodec
+    assert get_cache_codec() is get_cache_codec()
+    settings.CACHE_CODEC = "thunderstore.cache.codec.CompressingCodec"
+    assert type(get_cache_codec()) is CompressingCodec
+
+
+def test_get_cache_codec_threshold_changed(settings) -> None:
+    settings.CACHE_CODEC = "thunderstore.cache.codec.CompressingCodec"
+    settings.CACHE_COMPRESSION_THRESHOLD = 10
+    assert get_cache_codec().threshold == 10
+    settings.CACHE_COMPRESSION_THRESHOLD = 20
+    assert get_cache_codec().threshold == 20
+
+
+def test_get_cache_key_family() -> None:
+    key = get_cache_key(package_updated(5), "func", "module.name", ("a",))
+    assert get_cache_key_family(key) == "package_updated.func.module.name"
+    assert get_cache_key_family("old.cache.test") is None
+
+
+def test_payload_size_recorded(settings) -> None:
+    settings.CACHE_COMPRESSION_THRESHOLD = 10**6
+    cache.clear()
+    condition = community_packages_updated(1)
+    cache_get_or_set(get_cache_key(condition, "test", "size", (1,)), lambda: "a" * 50)
+    cache_get_or_set(get_cache_key(condition, "test", "size", (2,)), lambda: "a")
+    client = get_redis_client()
+    family = "community_packages_updated.test.size"
+    latest = int(client.hget(get_cache_metric_key(PAYLOAD_SIZE_METRIC), family))
+    largest = int(client.hget(get_cache_metric_key(PAYLOAD_SIZE_MAX_METRIC), family))
+    assert latest < largest
+    assert largest > 50
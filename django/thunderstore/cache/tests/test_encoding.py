@@ -0,0 +1,114 @@
+import gzip
+from io import BytesIO
+
+import pytest
+
+from thunderstore.cache.encoding import (
+    CONTENT_ENCODINGS,
+    IDENTITY,
+    GzipStreamCompressor,
+    StreamCompressor,
+    choose_content_encoding,
+    get_index_content_encodings,
+    parse_quality_values,
+)
+from thunderstore.cache.storage import CACHE_STORAGE
+from thunderstore.cache.streaming import iterate_gunzip
+
+
+def test_parse_quality_values() -> None:
+    assert parse_quality_values("gzip, br;q=0.5, *;q=0, zstd;q=x") == {
+        "gzip": 1.0,
+        "br": 0.5,
+        "*": 0.0,
+        "zstd": 0.0,
+    }
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    (
+        (None, IDENTITY),
+        ("", IDENTITY),
+        ("identity", IDENTITY),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("gzip, br;q=0.5", "gzip"),
+        ("GZIP;Q=0.1", "gzip"),
+        ("*", "br"),
+        ("*, br;q=0", "gzip"),
+        ("gzip;q=0", IDENTITY),
+        ("deflate", IDENTITY),
+    ),
+)
+def test_choose_content_encoding(header, expected) -> None:
+    assert choose_content_encoding(header, ["br", "gzip"]) == expected
+
+
+def test_get_index_content_encodings(settings) -> None:
+    settings.API_INDEX_CONTENT_ENCODINGS = []
+    assert get_index_content_encodings() == ["gzip"]
+    settings.API_INDEX_CONTENT_ENCODINGS = ["unknown"]
+    assert get_index_content_encodings() == ["gzip"]
+
+
+def compress_gzip(chunks) -> BytesIO:
+    result = BytesIO()
+    compressor = GzipStreamCompressor(result)
+    for chunk in chunks:
+        compressor.write(chunk)
+    compressor.close()
+    return result
+
+
+def test_gzip_stream_compressor() -> None:
+    chunks = [b"a" * 1000, b"b" * 1000]
+    first, second = compress_gzip(chunks), compress_gzip(chunks)
+    assert gzip.decompress(first.getvalue()) == b"".join(chunks)
+    # No timestamp is included
+    assert first.getvalue() == second.getvalue()
+    parts = [first.getvalue()[:10], first.getvalue()[10:]]
+    assert b"".join(iterate_gunzip(parts)) == b"".join(chunks)
+
+
+def test_stream_compressor_abstract() -> None:
+    with pytest.raises(TypeError):
+        StreamCompressor(BytesIO())
+
+
+@pytest.mark.parametrize(
+    ("encoding", "module", "decompress"),
+    (
+        ("br", "brotli", lambda module, data: module.decompress(data)),
+        (
+            "zstd",
+            "zstandard",
+            lambda module, data: module.ZstdDecompressor()
+            .decompressobj()
+            .decompress(data),
+        ),
+    ),
+)
+def test_optional_stream_compressors(encoding, module, decompress) -> None:
+    module = pytest.importorskip(module)
+    chunks = [b"a" * 1000, b"b" * 1000]
+    result = BytesIO()
+    compressor = CONTENT_ENCODINGS[encoding].compressor(result)
+    for chunk in chunks:
+        compressor.write(chunk)
+    compressor.close()
+    assert decompress(module, result.getvalue()) == b"".join(chunks)
+
+
+@pytest.mark.parametrize(
+    ("name", "content_type", "content_encoding"),
+    (
+        ("index.json.gz", "application/json", "gzip"),
+        ("index.json.br", "application/json", "br"),
+        ("index.json.zst", "application/json", "zstd"),
+    ),
+)
+def test_cache_storage_content_encoding(name, content_type, content_encoding) -> None:
+    params = CACHE_STORAGE._get_write_parameters(name)
+    assert params["ContentType"] == content_type
+    assert params["ContentEncoding"] == content_encoding
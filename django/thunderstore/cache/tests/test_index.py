@@ -0,0 +1,82 @@
+from django.core.cache import cache
+
+from thunderstore.cache.cache import cache_get_or_set, get_cache_key, get_cached_value
+from thunderstore.cache.enums import CacheBustCondition, package_updated
+from thunderstore.cache.index import (
+    get_cache_index_key,
+    get_cache_key_condition,
+    get_redis_client,
+    invalidate_cache_index,
+    register_cache_key,
+)
+from thunderstore.cache.tasks import invalidate_cache
+
+
+def test_get_cache_key_condition() -> None:
+    condition = package_updated("a.b")
+    key = get_cache_key(condition, "func", "test.name", ("vary",))
+    assert get_cache_key_condition(key) == condition
+    assert get_cache_key_condition("old.cache.test") is None
+    assert get_cache_key_condition("cache") is None
+
+
+def test_register_cache_key_ttl() -> None:
+    condition = package_updated("index-ttl")
+    index_key = get_cache_index_key(condition)
+    client = get_redis_client()
+    client.delete(index_key)
+
+    register_cache_key(f"cache.{condition}.func.a", timeout=100)
+    assert 90 < client.ttl(index_key) <= 100
+    register_cache_key(f"cache.{condition}.func.b", timeout=10)
+    assert 90 < client.ttl(index_key) <= 100
+    register_cache_key(f"cache.{condition}.func.c", timeout=1000)
+    assert 990 < client.ttl(index_key) <= 1000
+    register_cache_key(f"cache.{condition}.func.d", timeout=None)
+    assert client.ttl(index_key) == -1
+    assert client.scard(index_key) == 4
+    client.delete(index_key)
+
+
+def test_invalidate_cache_index() -> None:
+    condition = package_updated("index-invalidate")
+    other = package_updated("index-other")
+    keys = [get_cache_key(condition, "func", "test", (x,)) for x in range(5)]
+    other_key = get_cache_key(other, "func", "test", ())
+    for key in keys + [other_key]:
+        cache_get_or_set(key, default=lambda: "value", expiry=60)
+
+    assert invalidate_cache_index(condition) == 5
+    assert all(get_cached_value(key) is None for key in keys)
+    assert get_cached_value(f"old.{keys[0]}") == "value"
+    assert get_cached_value(other_key) == "value"
+    assert get_redis_client().exists(get_cache_index_key(condition)) == 0
+
+    invalidate_cache(other)
+    assert get_cached_value(other_key) is None
+
+
+def test_invalidate_cache_does_not_scan(mocker) -> None:
+    delete_pattern = mocker.spy(cache, "delete_pattern")
+    invalidate_cache(CacheBustCondition.any_package_updated)
+    delete_pattern.assert_not_called()
+
+
+def test_register_cache_key_skips_background_update_only() -> None:
+    condition = CacheBustCondition.background_update_only
+    index_key = get_cache_index_key(condition)
+    client = get_redis_client()
+    client.delete(index_key)
+    register_cache_key(f"cache.{condition}.func.a", timeout=100)
+    assert client.exists(index_key) == 0
+
+
+def test_register_cache_key_reloads_flushed_script() -> None:
+    condition = package_updated("index-script")
+    index_key = get_cache_index_key(condition)
+    client = get_redis_client()
+    client.delete(index_key)
+    client.script_flush()
+    register_cache_key(f"cache.{condition}.func.a", timeout=100)
+    assert client.scard(index_key) == 1
+    client.delete(index_key)
@@ -0,0 +1,120 @@
+import pytest
+from django.core.cache import cache
+
+from thunderstore.cache.cache import (
+    cache_get_or_set,
+    get_cache_entry_version,
+    get_cache_key,
+)
+from thunderstore.cache.enums import package_updated
+from thunderstore.cache.local import (
+    MISSING,
+    get_cache_generation_key,
+    get_cache_generation_timeout,
+    local_cache,
+)
+from thunderstore.cache.tasks import invalidate_cache
+
+
+@pytest.fixture
+def local_cache_settings(settings):
+    settings.CACHE_LOCAL_MAX_ENTRIES = 2
+    settings.CACHE_LOCAL_TIMEOUT = 60
+    settings.CACHE_LOCAL_GENERATION_CHECK_INTERVAL = 60
+    cache.clear()
+    local_cache.clear()
+    yield settings
+    local_cache.clear()
+
+
+def get_key(package_id: int, name: str = "local") -> str:
+    return get_cache_key(package_updated(package_id), "test", name, ())
+
+
+def test_local_cache_disabled_by_default(settings) -> None:
+    settings.CACHE_LOCAL_MAX_ENTRIES = 0
+    local_cache.set(get_key(1), "value")
+    assert local_cache.get(get_key(1)) is MISSING
+
+
+def test_local_cache_serves_without_shared_cache(local_cache_settings) -> None:
+    key = get_key(1)
+    assert cache_get_or_set(key, lambda: "value", use_local_cache=True) == "value"
+    # Only hits from the shared cache are stored locally
+    assert local_cache.get(key) is MISSING
+    assert cache_get_or_set(key, lambda: "value", use_local_cache=True) == "value"
+    cache.delete(key, version=get_cache_entry_version())
+    assert cache_get_or_set(key, lambda: "other", use_local_cache=True) == "value"
+
+
+def test_local_cache_invalidated_by_generation(local_cache_settings) -> None:
+    key = get_key(1)
+    local_cache.set(key, "value")
+    assert local_cache.get(key) == "value"
+    invalidate_cache(package_updated(1))
+    generation_key = get_cache_generation_key(package_updated(1))
+    assert cache.get(generation_key)
+    assert 0 < cache.ttl(generation_key) <= get_cache_generation_timeout()
+    assert local_cache.get(key) is MISSING
+
+
+def test_local_cache_generation_not_bumped_when_disabled(settings) -> None:
+    settings.CACHE_LOCAL_MAX_ENTRIES = 0
+    cache.clear()
+    invalidate_cache(package_updated(1))
+    assert cache.get(get_cache_generation_key(package_updated(1))) is None
+
+
+def test_local_cache_generation_check_interval(local_cache_settings) -> None:
+    key = get_key(1)
+    local_cache.set(key, "value")
+    # Invalidation from another process isn't noticed before the next check
+    cache.set(get_cache_generation_key(package_updated(1)), 5, timeout=None)
+    assert local_cache.get(key) == "value"
+    local_cache_settings.CACHE_LOCAL_GENERATION_CHECK_INTERVAL = 0
+    assert local_cache.get(key) is MISSING
+
+
+def test_local_cache_lru_eviction(local_cache_settings) -> None:
+    first, second, third = get_key(1, "a"), get_key(1, "b"), get_key(1, "c")
+    local_cache.set(first, 1)
+    local_cache.set(second, 2)
+    assert local_cache.get(first) == 1
+    local_cache.set(third, 3)
+    assert local_cache.get(first) == 1
+    assert local_cache.get(second) is MISSING
+    assert local_cache.get(third) == 3
+
+
+def test_local_cache_timeout(local_cache_settings) -> None:
+    key = get_key(1)
+    local_cache.set(key, "value", timeout=0)
+    assert local_cache.get(key) is MISSING
+
+
+def test_local_cache_ignores_unconditioned_keys(local_cache_settings) -> None:
+    local_cache.set("unrelated", "value")
+    assert local_cache.get("unrelated") is MISSING
+
+
+def test_local_cache_generations_bounded_by_entries(local_cache_settings) -> None:
+    for package_id in range(10):
+        local_cache.set(get_key(package_id), package_id)
+        assert local_cache.get(get_key(package_id)) == package_id
+    assert set(local_cache._generations) == {package_updated(8), package_updated(9)}
+    local_cache.delete(get_key(8))
+    assert set(local_cache._generations) == {package_updated(9)}
+
+
+def test_local_cache_generation_kept_while_entries_remain(
+    local_cache_settings,
+) -> None:
+    first, second = get_key(1, "a"), get_key(1, "b")
+    local_cache.set(first, 1)
+    local_cache.set(second, 2)
+    local_cache.delete(first)
+    assert package_updated(1) in local_cache._generations
+    local_cache.set(second, 3)
+    assert local_cache.get(second) == 3
+    local_cache.delete(second)
+    assert local_cache._generations == {}
@@ -0,0 +1,139 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import Http404
+from django.test import RequestFactory
+
+from thunderstore.cache.cache import cache_get_or_set, get_cache_key
+from thunderstore.cache.enums import community_packages_updated
+from thunderstore.cache.metrics import (
+    HIT_METRIC,
+    MISS_METRIC,
+    REGENERATION_METRIC,
+    flush_cache_metrics,
+    format_metric_value,
+    get_cache_metrics,
+    record_cache_metric,
+    render_prometheus_metrics,
+    reset_cache_metrics,
+)
+from thunderstore.cache.views import cache_metrics_view
+
+FAMILY = "community_packages_updated.test.metrics"
+
+
+@pytest.fixture
+def metrics_settings(settings):
+    settings.CACHE_METRICS_ENABLED = True
+    settings.CACHE_METRICS_FLUSH_INTERVAL = 60
+    cache.clear()
+    flush_cache_metrics()
+    reset_cache_metrics()
+    return settings
+
+
+def get_key(community_id: int) -> str:
+    return get_cache_key(
+        community_packages_updated(community_id), "test", "metrics", ()
+    )
+
+
+def test_cache_metrics_recorded(metrics_settings) -> None:
+    cache_get_or_set(get_key(1), lambda: "value")
+    cache_get_or_set(get_key(2), lambda: "value")
+    cache_get_or_set(get_key(1), lambda: "value")
+    # Counters are buffered until the flush interval has passed
+    assert get_cache_metrics()[FAMILY][MISS_METRIC] == 0
+    flush_cache_metrics()
+    metrics = get_cache_metrics()[FAMILY]
+    assert metrics[HIT_METRIC] == 1
+    assert metrics[MISS_METRIC] == 2
+    assert metrics[REGENERATION_METRIC] == 2
+    assert metrics["payload_size"] > 0
+
+
+def test_cache_metrics_flush_interval(metrics_settings) -> None:
+    metrics_settings.CACHE_METRICS_FLUSH_INTERVAL = 0
+    record_cache_metric(get_key(1), HIT_METRIC)
+    record_cache_metric(get_key(1), "regeneration_seconds", 0.5)
+    metrics = get_cache_metrics()[FAMILY]
+    assert metrics[HIT_METRIC] == 1
+    assert metrics["regeneration_seconds"] == 0.5
+
+
+def test_cache_metrics_disabled(metrics_settings) -> None:
+    metrics_settings.CACHE_METRICS_ENABLED = False
+    cache_get_or_set(get_key(1), lambda: "value")
+    flush_cache_metrics()
+    assert get_cache_metrics() == {}
+
+
+def test_render_prometheus_metrics() -> None:
+    metrics = {'a"b': {metric: 1 for metric in (HIT_METRIC, MISS_METRIC)}}
+    metrics['a"b'].update(
+        {
+            "local_hits": 0,
+            "stale": 0,
+            "lock_contention": 0,
+            "lock_wait_seconds": 0.25,
+            "regenerations": 1,
+            "regeneration_seconds": 1.5,
+            "payload_size": 100,
+            "payload_size_max": 200,
+        }
+    )
+    rendered = render_prometheus_metrics(metrics)
+    assert "# TYPE thunderstore_cache_hits_total counter\n" in rendered
+    assert 'thunderstore_cache_hits_total{family="a\\"b"} 1\n' in rendered
+    assert 'thunderstore_cache_lock_wait_seconds_total{family="a\\"b"} 0.25' in rendered
+    assert 'thunderstore_cache_payload_size_max_bytes{family="a\\"b"} 200' in rendered
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    (
+        (0, "0"),
+        (1234567890123, "1234567890123"),
+        (2.0, "2"),
+        (1234567.891, "1234567.891"),
+    ),
+)
+def test_format_metric_value(value, expected) -> None:
+    assert format_metric_value(value) == expected
+
+
+@pytest.mark.parametrize(
+    ("secret", "header", "expected_status"),
+    (
+        ("", "Bearer ", 404),
+        ("secret", "", 401),
+        ("secret", "Bearer wrong", 401),
+        ("secret", "Bearer secret", 200),
+    ),
+)
+def test_cache_metrics_view(
+    metrics_settings, secret: str, header: str, expected_status: int
+) -> None:
+    metrics_settings.CACHE_METRICS_SHARED_SECRET = secret
+    cache_get_or_set(get_key(1), lambda: "value")
+    request = RequestFactory().get("/metrics/cache/", HTTP_AUTHORIZATION=header)
+    if expected_status == 404:
+        with pytest.raises(Http404):
+            cache_metrics_view(request)
+        return
+    response = cache_metrics_view(request)
+    assert response.status_code == expected_status
+    if expected_status == 200:
+        assert f'family="{FAMILY}"' in response.content.decode()
+
+
+def test_cache_top_offenders_command(metrics_settings) -> None:
+    cache_get_or_set(get_key(1), lambda: "value")
+    out = StringIO()
+    call_command("cache_top_offenders", "--sort-by", "misses", "--reset", stdout=out)
+    output = out.getvalue()
+    assert FAMILY in output
+    assert "Cache metrics reset" in output
+    assert get_cache_metrics() == {}
@@ -0,0 +1,150 @@
+import pytest
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger
+from django.db.models import Sum
+
+from thunderstore.cache.cache import get_cache_entry_version
+from thunderstore.cache.enums import community_packages_updated
+from thunderstore.cache.local import local_cache
+from thunderstore.cache.pagination import CachedPaginator
+from thunderstore.community.factories import CommunityFactory, PackageListingFactory
+from thunderstore.community.models import Community, PackageListing
+
+
+@pytest.fixture
+def listings(community: Community):
+    cache.clear()
+    return [PackageListingFactory(community_=community) for _ in range(5)]
+
+
+def get_paginator(community: Community, queryset=None, **kwargs) -> CachedPaginator:
+    if queryset is None:
+        queryset = PackageListing.objects.filter(community=community).order_by("pk")
+    return CachedPaginator(
+        queryset,
+        2,
+        cache_key="test.paginator",
+        cache_vary=str(kwargs),
+        cache_bust_condition=community_packages_updated(community.pk),
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db
+def test_cached_paginator_single_query(
+    django_assert_num_queries, community: Community, listings
+) -> None:
+    paginator = get_paginator(community)
+    with django_assert_num_queries(1):
+        page = paginator.page(2)
+    assert paginator.count == 5
+    assert paginator.num_pages == 3
+    assert list(page.object_list) == listings[2:4]
+    assert not hasattr(page.object_list[0], "_paginator_total_count")
+
+    with django_assert_num_queries(0):
+        page = get_paginator(community).page(2)
+    assert list(page.object_list) == listings[2:4]
+
+
+@pytest.mark.django_db
+def test_cached_paginator_orphans(community: Community, listings) -> None:
+    paginator = get_paginator(community, orphans=1)
+    assert list(paginator.page(2).object_list) == listings[2:]
+    assert paginator.num_pages == 2
+
+
+@pytest.mark.django_db
+def test_cached_paginator_aggregated_queryset(community: Community, listings) -> None:
+    queryset = (
+        PackageListing.objects.filter(community=community)
+        .annotate(downloads=Sum("package__versions__downloads"))
+        .order_by("pk")
+    )
+    paginator = get_paginator(community, queryset)
+    assert list(paginator.page(3).object_list) == listings[4:]
+    assert paginator.count == 5
+
+
+@pytest.mark.django_db
+def test_cached_paginator_distinct_queryset(community: Community, listings) -> None:
+    # Joining to the other communities' listings duplicates rows
+    other = CommunityFactory()
+    for listing in listings:
+        PackageListingFactory(community_=other, package_=listing.package)
+    queryset = (
+        PackageListing.objects.filter(community=community)
+        .filter(package__community_listings__community__in=[community, other])
+        .distinct()
+        .order_by("pk")
+    )
+    paginator = get_paginator(community, queryset)
+    assert list(paginator.page(1).object_list) == listings[:2]
+    assert paginator.count == 5
+
+
+@pytest.mark.django_db
+def test_cached_paginator_invalid_pages(community: Community, listings) -> None:
+    paginator = get_paginator(community)
+    with pytest.raises(EmptyPage):
+        paginator.page(4)
+    with pytest.raises(EmptyPage):
+        paginator.page(0)
+    with pytest.raises(PageNotAnInteger):
+        paginator.page("a")
+
+
+@pytest.mark.django_db
+def test_cached_paginator_out_of_range_not_cached(
+    django_assert_num_queries, community: Community, listings
+) -> None:
+    with pytest.raises(EmptyPage):
+        get_paginator(community).page(10)
+    assert cache.keys("*counted_page.10*", version=get_cache_entry_version()) == []
+    # The count was cached, so further out of range pages are rejected
+    # without querying
+    with django_assert_num_queries(0):
+        with pytest.raises(EmptyPage):
+            get_paginator(community).page(11)
+    assert cache.keys("*counted_page.11*", version=get_cache_entry_version()) == []
+
+
+@pytest.mark.django_db
+def test_cached_paginator_empty(community: Community) -> None:
+    cache.clear()
+    paginator = get_paginator(community)
+    assert list(paginator.page(1).object_list) == []
+    assert paginator.count == 0
+    with pytest.raises(EmptyPage):
+        get_paginator(community, allow_empty_first_page=False).page(1)
+
+
+@pytest.mark.django_db
+def test_cached_paginator_pages_not_shared_locally(
+    settings, community: Community, listings
+) -> None:
+    settings.CACHE_LOCAL_MAX_ENTRIES = 10
+    settings.CACHE_LOCAL_TIMEOUT = 60
+    local_cache.clear()
+    try:
+        first = get_paginator(community).page(1).object_list[0]
+        first.package.name = "modified"
+        second = get_paginator(community).page(1).object_list[0]
+        assert second == first
+        assert second is not first
+        assert second.package.name != "modified"
+    finally:
+        local_cache.clear()
+
+
+@pytest.mark.django_db
+def test_cached_paginator_page_hit_single_lookup(
+    mocker, community: Community, listings
+) -> None:
+    get_paginator(community).page(1)
+    get_many = mocker.spy(cache, "get_many")
+    get = mocker.spy(cache, "get")
+    page = get_paginator(community).page(1)
+    assert list(page.object_list) == listings[:2]
+    assert get_many.call_count == 1
+    assert get.call_count == 0
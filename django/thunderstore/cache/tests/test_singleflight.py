@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import List
+
+from django.core.cache import cache
+
+from thunderstore.cache.cache import (
+    cache_get_or_set,
+    get_cache_entry_version,
+    get_cache_key,
+)
+from thunderstore.cache.enums import package_updated
+from thunderstore.cache.singleflight import SingleFlight
+
+
+def run_concurrently(fn, count: int) -> List:
+    results = [None] * count
+
+    def run(index: int) -> None:
+        results[index] = fn()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_single_flight_runs_function_once() -> None:
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"value": 1}
+
+    results = run_concurrently(lambda: flight.do("key", fn, timeout=5), 5)
+    assert len(calls) == 1
+    assert all(x == {"value": 1} for x in results)
+    # Waiters receive copies, so mutating a result doesn't affect the others
+    assert len({id(x) for x in results}) == 5
+    assert len(flight) == 0
+
+
+def test_single_flight_without_copy_shares_result() -> None:
+    flight = SingleFlight()
+
+    def fn():
+        time.sleep(0.2)
+        return {"value": 1}
+
+    results = run_concurrently(
+        lambda: flight.do("key", fn, timeout=5, copy_result=False), 3
+    )
+    assert len({id(x) for x in results}) == 1
+
+
+def test_single_flight_waiters_retry_on_failure() -> None:
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.2)
+        if len(calls) == 1:
+            raise ValueError("Failed")
+        return "value"
+
+    def call():
+        try:
+            return flight.do("key", fn, timeout=5)
+        except ValueError:
+            return "error"
+
+    results = run_concurrently(call, 3)
+    assert sorted(results) == ["error", "value", "value"]
+    assert len(calls) == 3
+
+
+def test_single_flight_waiters_give_up_after_timeout() -> None:
+    flight = SingleFlight()
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    leader = threading.Thread(target=lambda: flight.do("key", slow, timeout=5))
+    leader.start()
+    started.wait(5)
+    try:
+        assert flight.do("key", lambda: "fast", timeout=0.01) == "fast"
+    finally:
+        release.set()
+        leader.join()
+
+
+def test_cache_get_or_set_coalesces_misses() -> None:
+    key = get_cache_key(package_updated(1), "test", "singleflight", ())
+    cache.delete(key, version=get_cache_entry_version())
+    calls = []
+
+    def default():
+        calls.append(1)
+        time.sleep(0.2)
+        return ["value"]
+
+    results = run_concurrently(lambda: cache_get_or_set(key, default), 4)
+    assert len(calls) == 1
+    assert results == [["value"]] * 4
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from thunderstore.cache import cache as cache_module
+from thunderstore.cache.cache import (
+    _stale_cache_age,
+    cache_get_or_set,
+    get_cache_entry_version,
+    get_cache_key,
+    get_cache_metadata_key,
+    get_cached_value,
+    get_old_cache_key,
+    get_stale_cache_age,
+    schedule_cache_regeneration,
+)
+from thunderstore.cache.enums import package_updated
+from thunderstore.cache.middleware import CacheStaleAgeHeaderMiddleware
+from thunderstore.cache.tasks import invalidate_cache
+
+
+@pytest.fixture
+def swr_key() -> str:
+    cache.clear()
+    return get_cache_key(package_updated(1), "test", "swr", ())
+
+
+@pytest.fixture(autouse=True)
+def reset_stale_age():
+    token = _stale_cache_age.set(None)
+    yield
+    _stale_cache_age.reset(token)
+
+
+def test_stale_while_revalidate_serves_stale_value(mocker, swr_key: str) -> None:
+    spy = mocker.spy(cache_module, "schedule_cache_regeneration")
+    assert cache_get_or_set(swr_key, lambda: "first", expiry=60) == "first"
+    assert (
+        cache.get(get_cache_metadata_key(swr_key), version=get_cache_entry_version())
+        is not None
+    )
+    invalidate_cache(package_updated(1))
+    assert get_cached_value(swr_key) is None
+
+    result = cache_get_or_set(
+        swr_key, lambda: "second", expiry=60, stale_while_revalidate=True
+    )
+    assert result == "first"
+    assert get_stale_cache_age() is not None
+    spy.spy_return.join()
+    assert get_cached_value(swr_key) == "second"
+    assert get_cached_value(get_old_cache_key(swr_key)) == "second"
+
+
+def test_stale_while_revalidate_without_stale_value(mocker, swr_key: str) -> None:
+    spy = mocker.spy(cache_module, "schedule_cache_regeneration")
+    result = cache_get_or_set(
+        swr_key, lambda: "fresh", expiry=60, stale_while_revalidate=True
+    )
+    assert result == "fresh"
+    assert get_stale_cache_age() is None
+    spy.assert_not_called()
+
+
+def test_schedule_cache_regeneration_single_flight(swr_key: str) -> None:
+    lock = cache.lock(f"lock.cachegenerate.{swr_key}", timeout=5)
+    assert lock.acquire(blocking=False)
+    try:
+        assert schedule_cache_regeneration(swr_key, lambda: "value", 60, 120) is None
+    finally:
+        lock.release()
+    thread = schedule_cache_regeneration(swr_key, lambda: "value", 60, 120)
+    assert thread is not None
+    thread.join()
+    assert get_cached_value(swr_key) == "value"
+
+
+def test_schedule_cache_regeneration_closes_connections(mocker, swr_key: str) -> None:
+    close_old = mocker.patch.object(cache_module, "close_old_connections")
+    close_all = mocker.patch.object(cache_module.connections, "close_all")
+
+    def generator():
+        raise ValueError("Generation failed")
+
+    mocker.patch.object(cache_module, "capture_exception")
+    schedule_cache_regeneration(swr_key, generator, 60, 120).join()
+    close_old.assert_called_once()
+    close_all.assert_called_once()
+
+
+def test_cache_stale_age_header_middleware() -> None:
+    def get_response(request):
+        cache_module.record_stale_cache_age(12.5)
+        cache_module.record_stale_cache_age(3)
+        return HttpResponse()
+
+    middleware = CacheStaleAgeHeaderMiddleware(get_response)
+    response = middleware(RequestFactory().get("/"))
+    assert response["Django-Cache-Stale-Age"] == "12"
+    assert get_stale_cache_age() is None
+
+    middleware = CacheStaleAgeHeaderMiddleware(lambda request: HttpResponse())
+    response = middleware(RequestFactory().get("/"))
+    assert "Django-Cache-Stale-Age" not in response
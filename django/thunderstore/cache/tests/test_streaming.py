@@ -0,0 +1,37 @@
+import pytest
+
+from thunderstore.cache.streaming import RangeNotSatisfiable, parse_byte_range
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    (
+        ("bytes=0-99", (0, 99)),
+        ("bytes=10-", (10, 99)),
+        ("bytes=50-500", (50, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=-500", (0, 99)),
+        ("bytes=99-99", (99, 99)),
+        # Invalid and multiple ranges are ignored
+        ("bytes=10-5", None),
+        ("bytes=0-1,5-6", None),
+        ("bytes=-", None),
+        ("items=0-5", None),
+    ),
+)
+def test_parse_byte_range(header, expected) -> None:
+    assert parse_byte_range(header, 100) == expected
+
+
+@pytest.mark.parametrize(
+    ("header", "size"),
+    (
+        ("bytes=100-", 100),
+        ("bytes=100-200", 100),
+        ("bytes=-0", 100),
+        ("bytes=-5", 0),
+    ),
+)
+def test_parse_byte_range_not_satisfiable(header, size) -> None:
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range(header, size)
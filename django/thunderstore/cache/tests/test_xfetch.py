@@ -0,0 +1,73 @@
+import pytest
+from django.core.cache import cache
+
+from thunderstore.cache import cache as cache_module
+from thunderstore.cache.cache import (
+    CacheEntryMetadata,
+    cache_get_or_set,
+    get_cache_entry_version,
+    get_cache_key,
+    get_cache_metadata_key,
+    get_cached_value,
+    should_recompute_early,
+)
+from thunderstore.cache.enums import package_updated
+
+
+@pytest.fixture
+def xfetch_key() -> str:
+    cache.clear()
+    return get_cache_key(package_updated(1), "test", "xfetch", ())
+
+
+def test_should_recompute_early_without_expiry() -> None:
+    assert should_recompute_early(None) is False
+    metadata = CacheEntryMetadata(created_at=0, cost=10, expires_at=None)
+    assert should_recompute_early(metadata) is False
+
+
+@pytest.mark.parametrize(
+    ("random_value", "now", "expected"),
+    (
+        # -log(1 - 0.5) * 2 ~= 1.39 seconds ahead
+        (0.5, 98.0, False),
+        (0.5, 99.0, True),
+        (0.0, 99.9, False),
+        (0.0, 100.0, True),
+    ),
+)
+def test_should_recompute_early(
+    mocker, random_value: float, now: float, expected: bool
+) -> None:
+    mocker.patch.object(cache_module.random, "random", return_value=random_value)
+    metadata = CacheEntryMetadata(created_at=0, cost=2, expires_at=100)
+    assert should_recompute_early(metadata, now=now) is expected
+
+
+def test_cache_get_or_set_stores_metadata(xfetch_key: str) -> None:
+    cache_get_or_set(xfetch_key, lambda: "value", expiry=60)
+    metadata = cache.get(
+        get_cache_metadata_key(xfetch_key), version=get_cache_entry_version()
+    )
+    assert metadata.cost >= 0
+    assert metadata.expires_at == pytest.approx(metadata.created_at + 60)
+
+
+def test_cache_get_or_set_recomputes_early(mocker, xfetch_key: str) -> None:
+    cache_get_or_set(xfetch_key, lambda: "first", expiry=60)
+    mocker.patch.object(cache_module, "should_recompute_early", return_value=True)
+    assert cache_get_or_set(xfetch_key, lambda: "second", expiry=60) == "second"
+    assert get_cached_value(xfetch_key) == "second"
+
+
+def test_cache_get_or_set_early_recompute_failure(
+    mocker, settings, xfetch_key: str
+) -> None:
+    settings.ALWAYS_RAISE_EXCEPTIONS = False
+    cache_get_or_set(xfetch_key, lambda: "first", expiry=60)
+    mocker.patch.object(cache_module, "should_recompute_early", return_value=True)
+
+    def fail():
+        raise RuntimeError("Generation failed")
+
+    assert cache_get_or_set(xfetch_key, fail, expiry=60) == "first"
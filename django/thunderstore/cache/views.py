@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from thunderstore.cache.metrics import (
+    flush_cache_metrics,
+    get_cache_metrics,
+    render_prometheus_metrics,
+)
+
+
+def cache_metrics_view(request):
+    """
+    Prometheus scrape target for the cache metrics. Requires the
+    CACHE_METRICS_SHARED_SECRET as a bearer token.
+    """
+    secret = settings.CACHE_METRICS_SHARED_SECRET
+    if not secret:
+        raise Http404()
+    header = request.META.get("HTTP_AUTHORIZATION", "")
+    if not constant_time_compare(header, f"Bearer {secret}"):
+        return HttpResponse(status=401)
+    flush_cache_metrics()
+    return HttpResponse(
+        render_prometheus_metrics(get_cache_metrics()),
+        content_type="text/plain; version=0.0.4",
+    )
@@ -8,7 +8,12 @@ from django.urls import reverse
 from django.utils import timezone
 from django.utils.functional import cached_property
 
-from thunderstore.cache.enums import CacheBustCondition
+from thunderstore.cache.enums import (
+    CacheBustCondition,
+    community_packages_updated,
+    namespace_packages_updated,
+    package_updated,
+)
 from thunderstore.cache.tasks import invalidate_cache_on_commit_async
 from thunderstore.community.consts import PackageListingReviewStatus
 from thunderstore.core.mixins import TimestampMixin
@@ -251,13 +256,36 @@ class PackageListing(TimestampMixin, models.Model):
             return annotated
         return self.package.downloads
 
+    def get_cache_bust_conditions(self) -> List[str]:
+        # Packages this package depends on list their dependants, so their
+        # entries are busted as well like in Package.get_cache_bust_conditions
+        Package = self._meta.get_field("package").related_model
+        dependency_ids = (
+            Package.objects.filter(versions__dependants__package=self.package_id)
+            .values_list("id", flat=True)
+            .distinct()
+        )
+        return [
+            CacheBustCondition.any_package_updated,
+            package_updated(self.package_id),
+            community_packages_updated(self.community_id),
+            *(package_updated(x) for x in dependency_ids),
+            namespace_packages_updated(self.package.owner.name),
+        ]
+
     @staticmethod
     def post_save(sender, instance, created, **kwargs):
-        invalidate_cache_on_commit_async(CacheBustCondition.any_package_updated)
+        invalidate_cache_on_commit_async(*instance.get_cache_bust_conditions())
+
+    @staticmethod
+    def pre_delete(sender, instance, **kwargs):
+        # The package might be deleted along with the listing, in which case
+        # its versions and owner can't be found out once it's deleted
+        instance._cache_bust_conditions = instance.get_cache_bust_conditions()
 
     @staticmethod
     def post_delete(sender, instance, **kwargs):
-        invalidate_cache_on_commit_async(CacheBustCondition.any_package_updated)
+        invalidate_cache_on_commit_async(*instance._cache_bust_conditions)
 
     @property
     def is_waiting_for_approval(self):
@@ -328,4 +356,5 @@ class PackageListing(TimestampMixin, models.Model):
 
 
 signals.post_save.connect(PackageListing.post_save, sender=PackageListing)
+signals.pre_delete.connect(PackageListing.pre_delete, sender=PackageListing)
 signals.post_delete.connect(PackageListing.post_delete, sender=PackageListing)
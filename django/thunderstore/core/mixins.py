@@ -1,11 +1,16 @@
-from typing import Any
+from typing import Any, Dict, Iterable, List, Union
 
 from django.conf import settings
 from django.db import DEFAULT_DB_ALIAS, connections, models
 from django.db.models import Q
 from django.shortcuts import redirect
 
-from thunderstore.cache.storage import CACHE_STORAGE
+from thunderstore.cache.storage import (
+    CACHE_STORAGE,
+    CompressedStreamsWriter,
+    SavedStream,
+    save_compressed_streams,
+)
 
 
 class TimestampMixin(models.Model):
@@ -101,6 +106,43 @@ class S3FileMixin(SafeDeleteMixin):
     def on_safe_delete(self):
         self.data.delete()
 
+    @classmethod
+    def save_compressed_data(
+        cls,
+        filename: str,
+        content: Union[bytes, Iterable[bytes]],
+        encodings: List[str],
+    ) -> Dict[str, SavedStream]:
+        """
+        Compress and upload content for the data field in each of the given
+        encodings, without buffering it in full.
+
+        :param filename: The file name, which is suffixed by the encoding
+        :param content: The content, or an iterable producing it in chunks
+        :return: The saved files by encoding
+        """
+        field = cls._meta.get_field("data")
+        if isinstance(content, bytes):
+            content = (content,)
+        return save_compressed_streams(
+            field.storage, field.generate_filename(None, filename), content, encodings
+        )
+
+    @classmethod
+    def open_compressed_data(
+        cls, filename: str, encodings: List[str]
+    ) -> CompressedStreamsWriter:
+        """
+        Open files for the data field in each of the given encodings, for
+        writing content to as it's produced.
+
+        :param filename: The file name, which is suffixed by the encoding
+        """
+        field = cls._meta.get_field("data")
+        return CompressedStreamsWriter(
+            field.storage, field.generate_filename(None, filename), encodings
+        )
+
     class Meta:
         abstract = True
         indexes = [
@@ -29,7 +29,32 @@ env = environ.Env(
     DATABASE_QUERY_COUNT_HEADER=(bool, False),
     DATABASE_URL=(str, "sqlite:///database/default.db"),
     DISABLE_SERVER_SIDE_CURSORS=(bool, True),
+    CHUNKED_ENUMERATE_STRATEGY=(str, "auto"),
     DISABLED_CACHE_BUST_CONDITIONS=(list, []),
+    CACHE_STALE_WHILE_REVALIDATE=(bool, False),
+    CACHE_LOCAL_MAX_ENTRIES=(int, 0),
+    CACHE_LOCAL_TIMEOUT=(int, 5),
+    CACHE_LOCAL_GENERATION_CHECK_INTERVAL=(float, 1.0),
+    CACHE_CODEC=(str, "thunderstore.cache.codec.CompressingCodec"),
+    CACHE_COMPRESSION_THRESHOLD=(int, 16384),
+    CACHE_METRICS_ENABLED=(bool, True),
+    CACHE_METRICS_FLUSH_INTERVAL=(float, 10.0),
+    CACHE_METRICS_SHARED_SECRET=(str, ""),
+    CACHE_WARMING_ENABLED=(bool, False),
+    CACHE_WARMING_DELAY=(int, 5),
+    CACHE_WARMING_PAGE_COUNT=(int, 3),
+    API_V1_INCREMENTAL_INDEX_ENABLED=(bool, False),
+    API_V1_INDEX_FRAGMENT_TIMEOUT=(int, 60 * 60 * 24),
+    API_INDEX_REBUILD_INTERVAL=(int, 60 * 60 * 6),
+    API_INDEX_CONTENT_ENCODINGS=(list, []),
+    API_V1_PACKAGE_CHANGES_RETENTION=(int, 60 * 60 * 24 * 7),
+    API_V1_SHARDED_INDEX_ENABLED=(bool, False),
+    API_V1_INDEX_SHARD_SIZE=(int, 1000),
+    API_EXPERIMENTAL_SEGMENTED_INDEX_ENABLED=(bool, False),
+    API_EXPERIMENTAL_INDEX_COMPACTION_INTERVAL=(int, 60 * 60 * 24),
+    API_EXPERIMENTAL_FULL_INDEX_INTERVAL=(int, 60 * 60),
+    API_EXPERIMENTAL_COMMUNITY_INDEXES_ENABLED=(bool, False),
+    API_EXPERIMENTAL_BINARY_INDEX_ENABLED=(bool, False),
     SECRET_KEY=(str, ""),
     ALLOWED_HOSTS=(list, []),
     CORS_ALLOWED_ORIGINS=(list, []),
@@ -181,6 +206,9 @@ DATABASES = {"default": env.db()}
 DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = env.bool(
     "DISABLE_SERVER_SIDE_CURSORS",
 )
+# How large querysets are enumerated in chunks, see ChunkedEnumerateStrategy.
+# By default server-side cursors are used unless they've been disabled.
+CHUNKED_ENUMERATE_STRATEGY = env.str("CHUNKED_ENUMERATE_STRATEGY")
 
 DB_CERT_DIR = env.str("DB_CERT_DIR")
 DB_CLIENT_CERT = env.str("DB_CLIENT_CERT")
@@ -273,6 +301,7 @@ INSTALLED_APPS = plugin_registry.get_installed_apps(
 
 MIDDLEWARE = [
     "thunderstore.core.middleware.QueryCountHeaderMiddleware",
+    "thunderstore.cache.middleware.CacheStaleAgeHeaderMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "thunderstore.frontend.middleware.SocialAuthExceptionHandlerMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -455,6 +484,72 @@ if DEBUG_TOOLBAR_ENABLED:
 # Caching
 
 DISABLED_CACHE_BUST_CONDITIONS = env.list("DISABLED_CACHE_BUST_CONDITIONS")
+# Serve stale copies of invalidated listing pages while they're regenerated
+# in the background
+CACHE_STALE_WHILE_REVALIDATE = env.bool("CACHE_STALE_WHILE_REVALIDATE")
+# Process-local cache in front of Redis for hot keys, disabled if 0
+CACHE_LOCAL_MAX_ENTRIES = env.int("CACHE_LOCAL_MAX_ENTRIES")
+CACHE_LOCAL_TIMEOUT = env.int("CACHE_LOCAL_TIMEOUT")
+# How often a worker checks if cache bust conditions have been invalidated
+CACHE_LOCAL_GENERATION_CHECK_INTERVAL = env.float(
+    "CACHE_LOCAL_GENERATION_CHECK_INTERVAL"
+)
+# How cache_get_or_set entries are stored, see thunderstore.cache.codec
+CACHE_CODEC = env.str("CACHE_CODEC")
+# Payloads larger than this many bytes are compressed by the default codec
+CACHE_COMPRESSION_THRESHOLD = env.int("CACHE_COMPRESSION_THRESHOLD")
+# Hit, miss and regeneration metrics per cache key family. The counters are
+# buffered in each process and written to Redis every flush interval.
+CACHE_METRICS_ENABLED = env.bool("CACHE_METRICS_ENABLED")
+CACHE_METRICS_FLUSH_INTERVAL = env.float("CACHE_METRICS_FLUSH_INTERVAL")
+# Token required for scraping the cache metrics endpoint, disabled if empty
+CACHE_METRICS_SHARED_SECRET = env.str("CACHE_METRICS_SHARED_SECRET")
+# Regenerate the first pages of community package lists after they've been
+# invalidated, waiting for the delay (in seconds) to batch up invalidations
+CACHE_WARMING_ENABLED = env.bool("CACHE_WARMING_ENABLED")
+CACHE_WARMING_DELAY = env.int("CACHE_WARMING_DELAY")
+CACHE_WARMING_PAGE_COUNT = env.int("CACHE_WARMING_PAGE_COUNT")
+# Reuse the serialized JSON of unchanged package listings when rebuilding the
+# v1 package list indexes. Changes not covered by the fragment watermarks,
+# such as owner donation links, show up once the fragment expires.
+API_V1_INCREMENTAL_INDEX_ENABLED = env.bool("API_V1_INCREMENTAL_INDEX_ENABLED")
+API_V1_INDEX_FRAGMENT_TIMEOUT = env.int("API_V1_INDEX_FRAGMENT_TIMEOUT")
+# Package indexes are only rebuilt if their change watermarks differ, or at
+# least this often (in seconds) to pick up changes the watermarks don't cover
+API_INDEX_REBUILD_INTERVAL = env.int("API_INDEX_REBUILD_INTERVAL")
+# Encodings package indexes are stored in besides gzip, which is always used.
+# "br" requires the brotli package and "zstd" the zstandard package, which
+# aren't dependencies of their own. Encodings whose packages aren't installed
+# are skipped.
+API_INDEX_CONTENT_ENCODINGS = env.list("API_INDEX_CONTENT_ENCODINGS")
+# How long (in seconds) package changes are tracked for serving the changes to
+# v1 package lists. Clients asking for older changes must refresh in full.
+API_V1_PACKAGE_CHANGES_RETENTION = env.int("API_V1_PACKAGE_CHANGES_RETENTION")
+# Also build the v1 package lists as shards of this many listings and a
+# manifest of them, which clients can fetch in parallel and selectively
+API_V1_SHARDED_INDEX_ENABLED = env.bool("API_V1_SHARDED_INDEX_ENABLED")
+API_V1_INDEX_SHARD_SIZE = env.int("API_V1_INDEX_SHARD_SIZE")
+# Also build the experimental package index as a base segment and segments of
+# the changes since, compacted into a new base segment once the base is older
+# than the compaction interval (in seconds)
+API_EXPERIMENTAL_SEGMENTED_INDEX_ENABLED = env.bool(
+    "API_EXPERIMENTAL_SEGMENTED_INDEX_ENABLED"
+)
+API_EXPERIMENTAL_INDEX_COMPACTION_INTERVAL = env.int(
+    "API_EXPERIMENTAL_INDEX_COMPACTION_INTERVAL"
+)
+# While the segmented index is built, the full experimental package index is
+# only rebuilt once it's older than this (in seconds)
+API_EXPERIMENTAL_FULL_INDEX_INTERVAL = env.int("API_EXPERIMENTAL_FULL_INDEX_INTERVAL")
+# Whether the experimental package index is also built for each community
+API_EXPERIMENTAL_COMMUNITY_INDEXES_ENABLED = env.bool(
+    "API_EXPERIMENTAL_COMMUNITY_INDEXES_ENABLED"
+)
+# Whether the experimental package index is also built in the compact binary
+# format, which is served to clients asking for it in the Accept header
+API_EXPERIMENTAL_BINARY_INDEX_ENABLED = env.bool(
+    "API_EXPERIMENTAL_BINARY_INDEX_ENABLED"
+)
 REDIS_URL = env.str("REDIS_URL")
 if REDIS_URL:
     CACHES = {
@@ -464,6 +559,7 @@ if REDIS_URL:
             "TIMEOUT": 300,
             "OPTIONS": {
                 "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                "SERIALIZER": "thunderstore.cache.codec.CodecSerializer",
                 "IGNORE_EXCEPTIONS": True,
                 "SOCKET_CONNECT_TIMEOUT": 0.5,
                 "SOCKET_TIMEOUT": 5,
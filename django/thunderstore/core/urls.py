@@ -7,6 +7,7 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from thunderstore.cache.views import cache_metrics_view
 from thunderstore.community.urls import community_urls
 from thunderstore.frontend.views import (
     ManifestV1ValidatorView,
@@ -40,6 +41,7 @@ urlpatterns = [
     path("favicon.ico", FaviconView.as_view()),
     path("djangoadmin/", admin.site.urls),
     path("healthcheck/", healthcheck_view, name="healthcheck"),
+    path("metrics/cache/", cache_metrics_view, name="cache.metrics"),
     path("api/", include((api_urls, "api"), namespace="api")),
     path(
         "tools/markdown-preview/",
@@ -1,10 +1,11 @@
 from typing import Dict, List, Union
 
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework.test import APIClient
 
-from thunderstore.cache.enums import CacheBustCondition
+from thunderstore.cache.enums import community_packages_updated
 from thunderstore.cache.tasks import invalidate_cache
 from thunderstore.community.consts import PackageListingReviewStatus
 from thunderstore.community.factories import CommunitySiteFactory, PackageListingFactory
@@ -19,7 +20,7 @@ from thunderstore.repository.factories import (
 
 @pytest.fixture(scope="module", autouse=True)
 def clear_pagination_cache():
-    invalidate_cache(CacheBustCondition.any_package_updated)
+    cache.clear()
 
 
 @pytest.mark.django_db
@@ -314,7 +315,7 @@ def test_paginated_results_are_cached(api_client: APIClient) -> None:
     assert data["packages"][0]["download_count"] == 1
 
     # Manual cache busting should update the results.
-    invalidate_cache(CacheBustCondition.any_package_updated)
+    invalidate_cache(community_packages_updated(listing.community.pk))
 
     data = __query_api(api_client, listing.community.identifier)
 
@@ -354,7 +355,7 @@ def test_packages_can_be_ordered_by_download_count(api_client: APIClient) -> Non
     __assert_packages_by_listings(data, [listing3, listing2, listing1])
 
     # Changes should be visible after cache busting.
-    invalidate_cache(CacheBustCondition.any_package_updated)
+    invalidate_cache(community_packages_updated(site.community.pk))
 
     data = __query_api(
         api_client, site.community.identifier, "ordering=most-downloaded"
@@ -442,7 +443,7 @@ def test_page_index_error(api_client: APIClient) -> None:
     for i in range(25):
         PackageListingFactory(community_=site.community)
 
-    invalidate_cache(CacheBustCondition.any_package_updated)
+    invalidate_cache(community_packages_updated(site.community.pk))
     response = api_client.get(f"{url}?page=2")
 
     assert response.status_code == 200
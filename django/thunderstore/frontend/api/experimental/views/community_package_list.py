@@ -1,5 +1,6 @@
 from typing import Optional, OrderedDict
 
+from django.conf import settings
 from django.core.paginator import EmptyPage, Page
 from django.db.models import Count, Prefetch, Q, QuerySet, Sum
 from django.http import HttpRequest, HttpResponse
@@ -10,7 +11,8 @@ from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from thunderstore.cache.enums import CacheBustCondition
+from thunderstore.cache.enums import community_packages_updated
+from thunderstore.cache.metrics import record_cache_traffic
 from thunderstore.cache.pagination import CachedPaginator
 from thunderstore.community.consts import PackageListingReviewStatus
 from thunderstore.community.models import Community, PackageListingSection
@@ -21,6 +23,15 @@ from thunderstore.frontend.api.experimental.serializers.views import (
 )
 from thunderstore.repository.models import Package
 
+CYBERSTORM_PACKAGE_LIST_TARGET = "cyberstorm_package_list"
+
+ORDERING_FIELDS = {
+    "last-updated": "-date_updated",
+    "most-downloaded": "-total_downloads",
+    "newest": "-date_created",
+    "top-rated": "-total_rating",
+}
+
 
 class CommunityPackageListApiView(APIView):
     """
@@ -44,6 +55,17 @@ class CommunityPackageListApiView(APIView):
             return Response(qp.errors, status=status.HTTP_400_BAD_REQUEST)
 
         params: OrderedDict = qp.validated_data
+        if self.is_default_listing(params):
+            record_cache_traffic(
+                community_packages_updated(community.pk),
+                f"{CYBERSTORM_PACKAGE_LIST_TARGET}.{params['ordering']}",
+            )
+        package_page = self.get_page(community, params)
+        serializer = self.serialize_results(community, package_page)
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def get_page(self, community: Community, params: OrderedDict) -> Page:
         package_qs = self.get_queryset(community)
         package_qs = self.filter_deprecated(params["deprecated"], package_qs)
         package_qs = self.filter_nsfw(params["nsfw"], package_qs)
@@ -51,10 +73,23 @@ class CommunityPackageListApiView(APIView):
         package_qs = self.filter_by_section(params.get("section"), package_qs)
         package_qs = self.filter_by_query(params.get("q"), package_qs)
         package_qs = self.order_queryset(params["ordering"], package_qs)
-        package_page = self.paginate(params, package_qs)
-        serializer = self.serialize_results(community, package_page)
+        return self.paginate(community, params, package_qs)
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def is_default_listing(self, params: OrderedDict) -> bool:
+        """
+        Whether the listing is shown without any filters, which makes it a
+        candidate for cache warming.
+        """
+        return not any(
+            (
+                params["deprecated"],
+                params["nsfw"],
+                params["included_categories"],
+                params["excluded_categories"],
+                params.get("section"),
+                params.get("q"),
+            )
+        )
 
     def get_full_cache_vary(self, params: OrderedDict) -> str:
         """
@@ -205,16 +240,16 @@ class CommunityPackageListApiView(APIView):
         """
         Order results in requested order, defaulting to latest update.
         """
-        order_arg = {
-            "last-updated": "-date_updated",
-            "most-downloaded": "-total_downloads",
-            "newest": "-date_created",
-            "top-rated": "-total_rating",
-        }.get(ordering, "-date_updated")
+        order_arg = ORDERING_FIELDS.get(ordering, "-date_updated")
 
         return queryset.order_by("-is_pinned", "is_deprecated", order_arg)
 
-    def paginate(self, params: OrderedDict, queryset: QuerySet[Package]) -> Page:
+    def paginate(
+        self,
+        community: Community,
+        params: OrderedDict,
+        queryset: QuerySet[Package],
+    ) -> Page:
         """
         Slice queryset based on the requested page.
         """
@@ -223,7 +258,8 @@ class CommunityPackageListApiView(APIView):
             24,  # Should be divisible by 3 and 4
             cache_key="frontend.community_package_list.paginator",
             cache_vary=self.get_full_cache_vary(params),
-            cache_bust_condition=CacheBustCondition.any_package_updated,
+            cache_bust_condition=community_packages_updated(community.pk),
+            stale_while_revalidate=settings.CACHE_STALE_WHILE_REVALIDATE,
         )
 
         # PageNotAnInteger error won't be raised here since deserializer
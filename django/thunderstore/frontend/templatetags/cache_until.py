@@ -5,6 +5,7 @@ from thunderstore.cache.cache import (
     cache_get_or_set,
     get_cache_key,
 )
+from thunderstore.cache.enums import parameterize_cache_bust_condition
 
 register = Library()
 
@@ -51,6 +52,7 @@ class CacheNode(Node):
             ),
             default=lambda: self.nodelist.render(context),
             expiry=expire_time,
+            use_local_cache=True,
         )
 
 
@@ -89,3 +91,16 @@ def do_cache(parser, token):
         expiry=expiry,
         vary_on=[parser.compile_filter(t) for t in tokens[4:]],
     )
+
+
+@register.filter
+def parameterize(cache_bust_condition, parameter):
+    """
+    Bind a parameterized cache bust condition to a specific entity.
+    Usage::
+        {% load cache_until %}
+        {% cache_until "package_updated"|parameterize:package.pk [fragment_name] %}
+            .. some expensive processing ..
+        {% endcache %}
+    """
+    return parameterize_cache_bust_condition(cache_bust_condition, parameter)
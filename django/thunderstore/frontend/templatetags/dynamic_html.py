@@ -12,7 +12,10 @@ from thunderstore.frontend.models import DynamicHTML
 register = template.Library()
 
 
-@cache_function_result(cache_until=CacheBustCondition.dynamic_html_updated)
+@cache_function_result(
+    cache_until=CacheBustCondition.dynamic_html_updated,
+    use_local_cache=True,
+)
 def get_dynamic_html_content(
     community: Community, placement: str, user_flags: List[str]
 ) -> str:
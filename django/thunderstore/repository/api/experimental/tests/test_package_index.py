@@ -1,18 +1,43 @@
+import gzip
 import json
+from datetime import timedelta
+from typing import List
+from unittest import mock
 
 import pytest
 import requests
 from django.db import connection
 from django.db.models import F
 from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APIClient
 
+from thunderstore.community.factories import CommunityFactory, PackageListingFactory
+from thunderstore.repository.api.experimental.views import (
+    package_index as package_index_views,
+)
 from thunderstore.repository.api.experimental.views.package_index import (
     PackageIndexEntry,
+    iterate_package_index,
+    update_api_experimental_binary_package_index,
+    update_api_experimental_community_package_indexes,
     update_api_experimental_package_index,
+    update_api_experimental_package_index_segments,
 )
 from thunderstore.repository.factories import PackageVersionFactory
-from thunderstore.repository.models import PackageVersion
+from thunderstore.repository.models import (
+    APIExperimentalPackageIndexCache,
+    APIExperimentalPackageIndexManifest,
+    APIExperimentalPackageIndexSegment,
+    PackageChange,
+    PackageVersion,
+)
+from thunderstore.repository.package_formats import PackageFormats
+from thunderstore.repository.package_index_binary import (
+    BINARY_INDEX_CONTENT_TYPE,
+    decode_package_index,
+)
+from thunderstore.repository.tasks.caches import update_experimental_package_index
 
 
 @pytest.mark.django_db
@@ -45,4 +70,423 @@ def test_update_api_experimental_package_index_query_count():
     assert PackageVersion.objects.count() == 10
     with CaptureQueriesContext(connection) as context:
         update_api_experimental_package_index()
-    assert len(context) < 8
+    # The change watermark, the previous index, two batches of versions (the
+    # second one finding no more), creating the index and dropping stale ones
+    assert len(context) == 7
+
+
+@pytest.mark.django_db
+def test_update_api_experimental_package_index_skipped_if_unchanged():
+    [PackageVersionFactory() for _ in range(3)]
+    update_api_experimental_package_index()
+    latest = APIExperimentalPackageIndexCache.get_latest()
+    assert latest.watermark
+
+    with mock.patch(
+        "thunderstore.repository.api.experimental.views.package_index"
+        ".iterate_package_index"
+    ) as iterate:
+        update_api_experimental_package_index()
+    iterate.assert_not_called()
+    assert APIExperimentalPackageIndexCache.get_latest() == latest
+
+    # A changed watermark with identical content keeps the previous file
+    APIExperimentalPackageIndexCache.objects.filter(pk=latest.pk).update(
+        watermark="outdated"
+    )
+    update_api_experimental_package_index()
+    assert APIExperimentalPackageIndexCache.objects.count() == 1
+    latest.refresh_from_db()
+    assert latest.watermark != "outdated"
+
+    PackageVersionFactory()
+    update_api_experimental_package_index()
+    assert APIExperimentalPackageIndexCache.get_latest() != latest
+
+
+@pytest.mark.django_db
+def test_api_experimental_package_index_encoding(api_client: APIClient):
+    PackageVersionFactory()
+    update_api_experimental_package_index()
+    cache = APIExperimentalPackageIndexCache.get_latest()
+    gzip_url = cache.data.url
+    cache.encoded_variants = {
+        "zstd": {"name": "cache/variant.json.zst", "checksum_sha256": ""}
+    }
+    cache.save()
+
+    response = api_client.get(
+        "/api/experimental/package-index/", HTTP_ACCEPT_ENCODING="gzip, zstd"
+    )
+    assert response.status_code == 302
+    assert response["Location"].endswith("variant.json.zst")
+    assert "Accept-Encoding" in response["Vary"]
+    # The stored files can't be served uncompressed, so gzip is used instead
+    for accept_encoding in ("gzip", "", "identity"):
+        response = api_client.get(
+            "/api/experimental/package-index/",
+            HTTP_ACCEPT_ENCODING=accept_encoding,
+        )
+        assert response["Location"].endswith(gzip_url.split("/")[-1])
+
+
+def read_segment(segment: APIExperimentalPackageIndexSegment) -> List[dict]:
+    with gzip.GzipFile(fileobj=segment.data, mode="r") as f:
+        return [json.loads(x) for x in f.read().decode().split("\n") if x]
+
+
+@pytest.mark.django_db
+def test_api_experimental_package_index_segments(settings) -> None:
+    settings.DISABLE_TRANSACTION_CHECKS = True
+    versions = [PackageVersionFactory() for _ in range(3)]
+    update_api_experimental_package_index_segments()
+    manifest = APIExperimentalPackageIndexManifest.get_latest()
+    base = manifest.base
+    assert base.is_base
+    assert len(read_segment(base)) == 3
+
+    # Nothing has changed, so no delta is added
+    PackageChange.objects.all().delete()
+    update_api_experimental_package_index_segments()
+    assert APIExperimentalPackageIndexManifest.get_latest() == manifest
+    assert base.deltas.exists() is False
+
+    added = PackageVersionFactory()
+    versions[0].is_active = False
+    versions[0].save()
+    update_api_experimental_package_index_segments()
+    manifest = APIExperimentalPackageIndexManifest.get_latest()
+    assert manifest.base == base
+    delta = base.deltas.get()
+    with gzip.GzipFile(fileobj=manifest.data, mode="r") as f:
+        assert json.loads(f.read()) == {
+            "segments": [
+                {
+                    "type": "base",
+                    "url": base.data.url,
+                    "checksum_sha256": base.checksum_sha256,
+                },
+                {
+                    "type": "delta",
+                    "url": delta.data.url,
+                    "checksum_sha256": delta.checksum_sha256,
+                },
+            ]
+        }
+    changes = {(x["namespace"], x["name"]): x["entries"] for x in read_segment(delta)}
+    assert changes == {
+        (versions[0].package.namespace.name, versions[0].package.name): [],
+        (added.package.namespace.name, added.package.name): [
+            {
+                "namespace": added.package.namespace.name,
+                "name": added.name,
+                "version_number": added.version_number,
+                "file_format": added.format_spec,
+                "file_size": added.file_size,
+                "dependencies": [],
+            }
+        ],
+    }
+
+
+@pytest.mark.django_db
+def test_api_experimental_package_index_segments_compaction(settings) -> None:
+    settings.DISABLE_TRANSACTION_CHECKS = True
+    PackageVersionFactory()
+    update_api_experimental_package_index_segments()
+    base = APIExperimentalPackageIndexSegment.get_latest_base()
+    PackageVersionFactory()
+    update_api_experimental_package_index_segments()
+    assert base.deltas.count() == 1
+
+    settings.API_EXPERIMENTAL_INDEX_COMPACTION_INTERVAL = 60
+    APIExperimentalPackageIndexSegment.objects.update(
+        last_modified=timezone.now() - timedelta(hours=4)
+    )
+    APIExperimentalPackageIndexManifest.objects.update(
+        last_modified=timezone.now() - timedelta(hours=4)
+    )
+    update_api_experimental_package_index_segments()
+    compacted = APIExperimentalPackageIndexSegment.get_latest_base()
+    assert compacted != base
+    assert len(read_segment(compacted)) == 2
+    assert APIExperimentalPackageIndexManifest.get_latest().base == compacted
+    # The previous base and its deltas are dropped along with its manifests
+    assert list(APIExperimentalPackageIndexSegment.objects.all()) == [compacted]
+
+
+@pytest.mark.django_db
+def test_api_experimental_package_index_manifest_view(api_client: APIClient) -> None:
+    url = "/api/experimental/package-index/manifest/"
+    assert api_client.get(url).status_code == 503
+    PackageVersionFactory()
+    update_api_experimental_package_index_segments()
+    manifest = APIExperimentalPackageIndexManifest.get_latest()
+    response = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert response.status_code == 302
+    assert response["Location"].endswith(manifest.data.url.split("/")[-1])
+
+
+@pytest.mark.django_db
+def test_update_experimental_package_index_task_segments(settings) -> None:
+    PackageVersionFactory()
+    settings.API_EXPERIMENTAL_SEGMENTED_INDEX_ENABLED = False
+    update_experimental_package_index()
+    assert APIExperimentalPackageIndexManifest.objects.exists() is False
+    settings.API_EXPERIMENTAL_SEGMENTED_INDEX_ENABLED = True
+    update_experimental_package_index()
+    assert APIExperimentalPackageIndexManifest.objects.exists() is True
+
+
+@pytest.mark.django_db
+def test_update_experimental_package_index_task_full_index_interval(settings) -> None:
+    settings.DISABLE_TRANSACTION_CHECKS = True
+    settings.API_EXPERIMENTAL_FULL_INDEX_INTERVAL = 60 * 60
+    PackageVersionFactory()
+    update_experimental_package_index()
+    latest = APIExperimentalPackageIndexCache.get_latest()
+
+    # The full index is rebuilt on every run without the segmented index
+    PackageVersionFactory()
+    update_experimental_package_index()
+    assert APIExperimentalPackageIndexCache.get_latest() != latest
+    latest = APIExperimentalPackageIndexCache.get_latest()
+
+    # And only once it's older than the interval with it
+    settings.API_EXPERIMENTAL_SEGMENTED_INDEX_ENABLED = True
+    PackageVersionFactory()
+    update_experimental_package_index()
+    assert APIExperimentalPackageIndexCache.get_latest() == latest
+    APIExperimentalPackageIndexCache.objects.update(
+        last_modified=timezone.now() - timedelta(hours=2)
+    )
+    update_experimental_package_index()
+    assert APIExperimentalPackageIndexCache.get_latest() != latest
+
+
+@pytest.mark.django_db
+def test_update_experimental_package_index_task_communities(settings) -> None:
+    community = PackageListingFactory().community
+    settings.API_EXPERIMENTAL_COMMUNITY_INDEXES_ENABLED = False
+    update_experimental_package_index()
+    assert APIExperimentalPackageIndexCache.get_latest(community) is None
+    settings.API_EXPERIMENTAL_COMMUNITY_INDEXES_ENABLED = True
+    update_experimental_package_index()
+    assert APIExperimentalPackageIndexCache.get_latest(community) is not None
+
+
+@pytest.mark.django_db
+def test_update_experimental_package_index_task_binary(settings) -> None:
+    PackageVersionFactory()
+    settings.API_EXPERIMENTAL_BINARY_INDEX_ENABLED = False
+    update_experimental_package_index()
+    content_type = BINARY_INDEX_CONTENT_TYPE
+    assert (
+        APIExperimentalPackageIndexCache.get_latest(content_type=content_type) is None
+    )
+    settings.API_EXPERIMENTAL_BINARY_INDEX_ENABLED = True
+    update_experimental_package_index()
+    assert APIExperimentalPackageIndexCache.get_latest(content_type=content_type)
+
+
+@pytest.mark.django_db
+def test_package_index_entries_match_serializer() -> None:
+    dependencies = [PackageVersionFactory() for _ in range(3)]
+    version = PackageVersionFactory(format_spec=PackageFormats.get_active_format())
+    version.dependencies.set(dependencies)
+    PackageVersionFactory(is_active=False)
+
+    result = [json.loads(x) for x in b"".join(iterate_package_index()).splitlines()]
+
+    queryset = PackageVersion.objects.active().annotate(
+        namespace=F("package__namespace")
+    )
+    expected = [PackageIndexEntry(instance=x).data for x in queryset]
+    assert len(result) == len(expected) == 4
+    # The serializer doesn't order dependencies, so they're compared as sets
+    for entry in expected:
+        assert {**entry, "dependencies": set(entry["dependencies"])} in [
+            {**x, "dependencies": set(x["dependencies"])} for x in result
+        ]
+    assert sorted([x for x in result if x["dependencies"]][0]["dependencies"]) == [
+        x.full_version_name for x in dependencies
+    ]
+
+
+@pytest.mark.django_db
+def test_package_index_query_count_is_constant() -> None:
+    def count_queries() -> int:
+        with CaptureQueriesContext(connection) as context:
+            b"".join(iterate_package_index())
+        return len(context)
+
+    for _ in range(3):
+        PackageVersionFactory().dependencies.set([PackageVersionFactory()])
+    expected = count_queries()
+    for _ in range(10):
+        PackageVersionFactory().dependencies.set([PackageVersionFactory()])
+    assert count_queries() == expected
+
+
+@pytest.mark.django_db
+def test_api_experimental_community_package_indexes(settings) -> None:
+    settings.DISABLE_TRANSACTION_CHECKS = True
+    first, second, unlisted = CommunityFactory(), CommunityFactory(), CommunityFactory()
+    both = PackageListingFactory(community=first).package
+    PackageListingFactory(community=second, package=both)
+    PackageVersionFactory(package=both, version_number="2.0.0")
+    PackageListingFactory(community=second)
+    PackageVersionFactory()
+    update_api_experimental_package_index()
+    global_index = APIExperimentalPackageIndexCache.get_latest()
+
+    with CaptureQueriesContext(connection) as context:
+        update_api_experimental_community_package_indexes()
+    # The watermarks of all communities are computed in a single query
+    queries = [x["sql"] for x in context.captured_queries]
+    assert not [x for x in queries if x.startswith("SELECT COUNT(")]
+    assert len([x for x in queries if '_id" AS "community", COUNT(' in x]) == 1
+    # No index is built for communities without listed versions
+    assert APIExperimentalPackageIndexCache.get_latest(unlisted) is None
+    for community in (first, second):
+        cache = APIExperimentalPackageIndexCache.get_latest(community)
+        result = read_segment(cache)
+        expected = [
+            PackageIndexEntry(instance=x).data
+            for x in PackageVersion.objects.active()
+            .listed_in(community.identifier)
+            .annotate(namespace=F("package__namespace"))
+        ]
+        assert len(result) == len(expected)
+        for entry in expected:
+            assert entry in result
+    assert APIExperimentalPackageIndexCache.get_latest() == global_index
+
+    # Unchanged communities are skipped, and removed ones dropped
+    first_index = APIExperimentalPackageIndexCache.get_latest(first)
+    PackageListingFactory(community=second)
+    update_api_experimental_community_package_indexes()
+    assert APIExperimentalPackageIndexCache.get_latest(first) == first_index
+    assert (
+        APIExperimentalPackageIndexCache.objects.filter(community=second).count() == 2
+    )
+    first.delete()
+    update_api_experimental_community_package_indexes()
+    assert (
+        APIExperimentalPackageIndexCache.objects.filter(
+            is_community_index=True, community=None
+        ).exists()
+        is False
+    )
+    assert APIExperimentalPackageIndexCache.get_latest() == global_index
+
+
+@pytest.mark.django_db
+def test_api_experimental_community_package_index_view(
+    api_client: APIClient,
+) -> None:
+    community = PackageListingFactory().community
+    url = f"/api/experimental/community/{community.identifier}/package-index/"
+    assert api_client.get(url).status_code == 503
+    assert (
+        api_client.get("/api/experimental/community/unknown/package-index/").status_code
+        == 404
+    )
+
+    update_api_experimental_community_package_indexes()
+    cache = APIExperimentalPackageIndexCache.get_latest(community)
+    response = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert response.status_code == 302
+    assert response["Location"].endswith(cache.data.url.split("/")[-1])
+
+    # Communities without listed versions have an empty index
+    empty = CommunityFactory()
+    response = api_client.get(
+        f"/api/experimental/community/{empty.identifier}/package-index/"
+    )
+    assert response.status_code == 200
+    assert response.content == b""
+
+
+@pytest.mark.django_db
+def test_api_experimental_community_package_indexes_batched(mocker, settings) -> None:
+    settings.DISABLE_TRANSACTION_CHECKS = True
+    mocker.patch.object(package_index_views, "COMMUNITY_INDEX_BATCH_SIZE", 1)
+    build = mocker.spy(package_index_views, "build_community_package_indexes")
+    listings = [PackageListingFactory() for _ in range(3)]
+    watermarks = package_index_views.get_community_package_index_watermarks()
+    assert watermarks == {
+        x.community.pk: package_index_views.get_package_index_watermark(x.community)
+        for x in listings
+    }
+    update_api_experimental_community_package_indexes()
+    assert build.call_count == 3
+    for listing in listings:
+        cache = APIExperimentalPackageIndexCache.get_latest(listing.community)
+        assert [x["name"] for x in read_segment(cache)] == [listing.package.name]
+
+    # Indexes of communities which no longer have listed versions are emptied
+    listings[0].delete()
+    update_api_experimental_community_package_indexes()
+    cache = APIExperimentalPackageIndexCache.get_latest(listings[0].community)
+    assert read_segment(cache) == []
+    assert build.call_count == 4
+
+
+@pytest.mark.django_db
+def test_api_experimental_binary_package_index(api_client: APIClient, settings) -> None:
+    settings.DISABLE_TRANSACTION_CHECKS = True
+    PackageVersionFactory().dependencies.set([PackageVersionFactory()])
+    update_api_experimental_package_index()
+    url = "/api/experimental/package-index/"
+    accept = f"{BINARY_INDEX_CONTENT_TYPE}, application/json;q=0.5"
+    # The JSON index is served until the binary index is built
+    json_cache = APIExperimentalPackageIndexCache.get_latest()
+    response = api_client.get(url, HTTP_ACCEPT=accept)
+    assert response.status_code == 302
+    assert response["Location"].endswith(json_cache.data.url.split("/")[-1])
+
+    update_api_experimental_binary_package_index()
+    cache = APIExperimentalPackageIndexCache.get_latest(
+        content_type=BINARY_INDEX_CONTENT_TYPE
+    )
+    with gzip.GzipFile(fileobj=cache.data, mode="r") as f:
+        result = list(decode_package_index(f.read()))
+    expected = [json.loads(x) for x in b"".join(iterate_package_index()).splitlines()]
+    assert result == expected
+
+    for accept in (BINARY_INDEX_CONTENT_TYPE, accept):
+        response = api_client.get(url, HTTP_ACCEPT=accept)
+        assert response.status_code == 302
+        assert response["Location"].endswith(cache.data.url.split("/")[-1])
+        assert "Accept" in response["Vary"]
+    # The binary index is only served when asked for explicitly, and when
+    # it's preferred at least as much as JSON
+    for accept in (
+        "*/*",
+        "application/json",
+        "",
+        f"{BINARY_INDEX_CONTENT_TYPE};q=0",
+        f"{BINARY_INDEX_CONTENT_TYPE};q=0, */*",
+        f"{BINARY_INDEX_CONTENT_TYPE};q=0.5, application/json",
+    ):
+        response = api_client.get(url, HTTP_ACCEPT=accept)
+        assert response["Location"].endswith(
+            APIExperimentalPackageIndexCache.get_latest().data.url.split("/")[-1]
+        )
+
+    # The JSON and binary indexes are dropped separately
+    APIExperimentalPackageIndexCache.objects.update(
+        last_modified=timezone.now() - timedelta(hours=4)
+    )
+    PackageVersionFactory()
+    update_api_experimental_binary_package_index()
+    assert APIExperimentalPackageIndexCache.get_latest() is not None
+    binary = APIExperimentalPackageIndexCache.objects.filter(
+        content_type=BINARY_INDEX_CONTENT_TYPE
+    )
+    assert list(binary) == [
+        APIExperimentalPackageIndexCache.get_latest(
+            content_type=BINARY_INDEX_CONTENT_TYPE
+        )
+    ]
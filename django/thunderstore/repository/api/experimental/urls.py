@@ -9,7 +9,9 @@ from thunderstore.repository.api.experimental.views import (
     UploadPackageApiView,
 )
 from thunderstore.repository.api.experimental.views.package_index import (
+    CommunityPackageIndexApiView,
     PackageIndexApiView,
+    PackageIndexManifestApiView,
 )
 from thunderstore.repository.api.experimental.views.submit import SubmitPackageApiView
 from thunderstore.repository.api.experimental.views.submit_async import (
@@ -32,6 +34,16 @@ urls = [
         "current-user/", CurrentUserExperimentalApiView.as_view(), name="current-user"
     ),
     path("package-index/", PackageIndexApiView.as_view(), name="package-index"),
+    path(
+        "package-index/manifest/",
+        PackageIndexManifestApiView.as_view(),
+        name="package-index.manifest",
+    ),
+    path(
+        "community/<slug:community>/package-index/",
+        CommunityPackageIndexApiView.as_view(),
+        name="community.package-index",
+    ),
     path("package/", PackageListApiView.as_view(), name="package-list"),
     path("package/wikis/", PackageWikiListAPIView.as_view(), name="package-wiki-list"),
     path(
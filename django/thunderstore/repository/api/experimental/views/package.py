@@ -5,7 +5,7 @@ from rest_framework.generics import ListAPIView, RetrieveAPIView, get_object_or_
 from rest_framework.pagination import CursorPagination
 
 from thunderstore.cache.cache import ManualCacheCommunityMixin
-from thunderstore.cache.enums import CacheBustCondition
+from thunderstore.cache.enums import CacheBustCondition, namespace_packages_updated
 from thunderstore.repository.api.experimental.serializers import (
     PackageSerializerExperimental,
 )
@@ -69,9 +69,11 @@ class PackageDetailApiView(ManualCacheCommunityMixin, RetrieveAPIView):
     Get a single package
     """
 
-    cache_until = CacheBustCondition.any_package_updated
     serializer_class = PackageSerializerExperimental
 
+    def get_cache_until(self) -> str:
+        return namespace_packages_updated(self.kwargs["namespace"])
+
     def get_object(self):
         queryset = self.filter_queryset(self.get_queryset())
         try:
@@ -1,9 +1,27 @@
+import json
+from collections import defaultdict
+from datetime import timedelta
 from io import BytesIO
-from typing import List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from django.conf import settings
-from django.db.models import F
-from django.shortcuts import redirect
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import (
+    CharField,
+    Count,
+    F,
+    Max,
+    OuterRef,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Concat
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import serializers
 from rest_framework.exceptions import APIException
@@ -11,11 +29,30 @@ from rest_framework.renderers import JSONRenderer
 from rest_framework.views import APIView
 from sentry_sdk import capture_exception
 
+from thunderstore.cache.encoding import (
+    IDENTITY,
+    choose_content_encoding,
+    get_index_content_encodings,
+    parse_quality_values,
+)
+from thunderstore.community.models import Community, PackageListing
+from thunderstore.repository.cache import get_index_watermark
 from thunderstore.repository.models import (
+    PACKAGE_CHANGE_COMMIT_MARGIN,
     APIExperimentalPackageIndexCache,
+    APIExperimentalPackageIndexManifest,
+    APIExperimentalPackageIndexSegment,
+    PackageChange,
     PackageVersion,
-    PackageVersionQuerySet,
 )
+from thunderstore.repository.models.cache import PackageIndexCacheMixin
+from thunderstore.repository.package_index_binary import (
+    BINARY_INDEX_CONTENT_TYPE,
+    encode_package_index,
+)
+from thunderstore.repository.package_reference import PackageReference
+from thunderstore.utils.batch import batch
+from thunderstore.utils.queryset import chunked_enumerate
 
 
 class ServiceUnavailable(APIException):
@@ -41,41 +78,453 @@ class PackageIndexEntry(serializers.Serializer):
         return [x.full_version_name for x in instance.dependencies.all()]
 
 
-def serialize_package_index() -> bytes:
-    versions: PackageVersionQuerySet = (
-        PackageVersion.objects.active()
-        .annotate(namespace=F("package__namespace"))
-        .prefetch_related("dependencies", "dependencies__package")
+PACKAGE_INDEX_CHUNK_SIZE = 1000
+# How many community indexes are built at once, each keeping a file open
+COMMUNITY_INDEX_BATCH_SIZE = 50
+
+
+def get_dependencies_subquery() -> Subquery:
+    """
+    Aggregate the full version names of a package version's dependencies into
+    an array in the database, in the order the dependencies were added in.
+    """
+    return Subquery(
+        PackageVersion.dependencies.through.objects.filter(
+            from_packageversion=OuterRef("pk")
+        )
+        .order_by()
+        .values("from_packageversion")
+        .annotate(
+            value=ArrayAgg(
+                Concat(
+                    "to_packageversion__package__owner__name",
+                    Value("-"),
+                    "to_packageversion__package__name",
+                    Value("-"),
+                    "to_packageversion__version_number",
+                    output_field=CharField(),
+                ),
+                ordering="id",
+            )
+        )
+        .values("value")
+    )
+
+
+def get_package_index_rows() -> QuerySet:
+    """
+    Get the data of the package index entries as plain rows, so that the
+    index can be built without constructing model instances.
+    """
+    return PackageVersion.objects.active().values(
+        "id",
+        "date_created",
+        "name",
+        "version_number",
+        "format_spec",
+        "file_size",
+        namespace=F("package__namespace"),
+        dependency_names=get_dependencies_subquery(),
     )
+
+
+def get_package_index_entry(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the package index entry of a row, matching the output of
+    PackageIndexEntry.
+    """
+    return {
+        "namespace": row["namespace"],
+        "name": row["name"],
+        "version_number": row["version_number"],
+        "file_format": row["format_spec"],
+        "file_size": row["file_size"],
+        "dependencies": row["dependency_names"] or [],
+    }
+
+
+def iterate_package_index_entries() -> Iterator[Dict[str, Any]]:
+    rows = chunked_enumerate(
+        get_package_index_rows(),
+        PACKAGE_INDEX_CHUNK_SIZE,
+        keys=("date_created", "id"),
+    )
+    for row in rows:
+        yield get_package_index_entry(row)
+
+
+def iterate_package_index() -> Iterator[bytes]:
+    """
+    Serialize the package index as newline delimited JSON, one entry at a
+    time.
+    """
+    renderer = JSONRenderer()
+    for entry in iterate_package_index_entries():
+        yield renderer.render(entry) + b"\n"
+
+
+def iterate_package_index_delta(changes: QuerySet) -> Iterator[bytes]:
+    """
+    Serialize the changed packages of the segmented package index as newline
+    delimited JSON, one package at a time. Each entry lists the current index
+    entries of the package, replacing any previous entries of it. Removed
+    packages have no entries.
+    """
+    # Later changes overwrite earlier ones, leaving the latest names
+    names = dict(
+        changes.order_by("datetime_created").values_list(
+            "package_uuid4", "package_full_name"
+        )
+    )
+    rows = (
+        get_package_index_rows()
+        .filter(package__uuid4__in=names)
+        .annotate(package_uuid4=F("package__uuid4"))
+        .order_by("date_created", "id")
+    )
+    entries = defaultdict(list)
+    for row in rows:
+        entries[row["package_uuid4"]].append(get_package_index_entry(row))
     renderer = JSONRenderer()
-    result = BytesIO()
 
-    for entry in versions.chunked_enumerate():
-        result.write(renderer.render(PackageIndexEntry(instance=entry).data))
-        result.write(b"\n")
+    for uuid4, full_name in sorted(names.items(), key=lambda x: x[1]):
+        reference = PackageReference.parse(full_name)
+        yield renderer.render(
+            {
+                "namespace": reference.namespace,
+                "name": reference.name,
+                "entries": entries[uuid4],
+            }
+        ) + b"\n"
 
+
+def serialize_package_index() -> bytes:
+    result = BytesIO()
+    for chunk in iterate_package_index():
+        result.write(chunk)
     return result.getvalue()
 
 
+def get_package_index_watermark(community: Optional[Community] = None) -> str:
+    # Index entries never change, so tracking which versions are listed is
+    # enough. Count and ID sum can both stay the same when a new version is
+    # listed while others are unlisted, so the highest ID is included too.
+    queryset = PackageVersion.objects.active()
+    if community is not None:
+        queryset = queryset.listed_in(community.identifier)
+    return get_index_watermark(
+        queryset.aggregate(count=Count("id"), ids=Sum("id"), max_id=Max("id"))
+    )
+
+
+def get_community_package_index_watermarks() -> Dict[int, str]:
+    """
+    Get the package index watermarks of the communities with listed versions
+    in a single query, matching get_package_index_watermark.
+    """
+    rows = (
+        PackageVersion.objects.active()
+        .order_by()
+        .values(community=F("package__community_listings__community_id"))
+        .annotate(count=Count("id"), ids=Sum("id"), max_id=Max("id"))
+    )
+    result = {}
+    for row in rows:
+        community_id = row.pop("community")
+        if community_id is not None:
+            result[community_id] = get_index_watermark(row)
+    return result
+
+
+def is_full_package_index_due() -> bool:
+    """
+    Check if the full package index should be rebuilt. Clients can follow
+    the segmented index instead while it's built, so the full index is then
+    only rebuilt once per API_EXPERIMENTAL_FULL_INDEX_INTERVAL.
+    """
+    if not settings.API_EXPERIMENTAL_SEGMENTED_INDEX_ENABLED:
+        return True
+    latest = APIExperimentalPackageIndexCache.get_latest()
+    interval = timedelta(seconds=settings.API_EXPERIMENTAL_FULL_INDEX_INTERVAL)
+    return latest is None or latest.last_modified <= timezone.now() - interval
+
+
 def update_api_experimental_package_index() -> None:
     """Called periodically by a Celery background task"""
     try:
-        APIExperimentalPackageIndexCache.update(content=serialize_package_index())
+        watermark = get_package_index_watermark()
+        latest = APIExperimentalPackageIndexCache.get_latest()
+        if latest is None or latest.watermark != watermark:
+            APIExperimentalPackageIndexCache.update(
+                content=iterate_package_index(),
+                previous=latest,
+                watermark=watermark,
+            )
     except Exception as e:  # pragma: no cover
         capture_exception(e)
     APIExperimentalPackageIndexCache.drop_stale_cache()
 
 
+def update_api_experimental_binary_package_index() -> None:
+    """Called periodically by a Celery background task"""
+    try:
+        watermark = get_package_index_watermark()
+        latest = APIExperimentalPackageIndexCache.get_latest(
+            content_type=BINARY_INDEX_CONTENT_TYPE
+        )
+        if latest is None or latest.watermark != watermark:
+            APIExperimentalPackageIndexCache.create_from_content(
+                f"full-index-{timezone.now().isoformat()}.bin",
+                encode_package_index(iterate_package_index_entries()),
+                previous=latest,
+                watermark=watermark,
+                content_type=BINARY_INDEX_CONTENT_TYPE,
+            )
+    except Exception as e:  # pragma: no cover
+        capture_exception(e)
+    APIExperimentalPackageIndexCache.drop_stale_cache(
+        content_type=BINARY_INDEX_CONTENT_TYPE
+    )
+
+
+def get_community_ids_subquery() -> Subquery:
+    """
+    Aggregate the IDs of the communities a package version's package is
+    listed in into an array in the database, matching
+    PackageVersionQuerySet.listed_in.
+    """
+    return Subquery(
+        PackageListing.objects.filter(package=OuterRef("package_id"))
+        .order_by()
+        .values("package")
+        .annotate(value=ArrayAgg("community_id"))
+        .values("value")
+    )
+
+
+def update_api_experimental_community_package_indexes() -> None:
+    """
+    Build the package index of each community whose listed versions have
+    changed. Up to COMMUNITY_INDEX_BATCH_SIZE indexes are built in a single
+    pass over the versions listed in them, with each entry written to the
+    indexes of the communities it's listed in.
+
+    Called periodically by a Celery background task.
+    """
+    try:
+        watermarks = get_community_package_index_watermarks()
+        latest_indexes = APIExperimentalPackageIndexCache.get_latest_community_indexes()
+        outdated = []
+        for community in Community.objects.all().iterator():
+            watermark = watermarks.get(community.pk)
+            latest = latest_indexes.get(community.pk)
+            # Communities without listed versions only need an index if one
+            # with versions is being replaced
+            if watermark is None:
+                if latest is None:
+                    continue
+                watermark = get_package_index_watermark(community)
+            if latest is None or latest.watermark != watermark:
+                outdated.append((community, latest, watermark))
+        for communities in batch(COMMUNITY_INDEX_BATCH_SIZE, outdated):
+            build_community_package_indexes(communities)
+    except Exception as e:  # pragma: no cover
+        capture_exception(e)
+    for community in Community.objects.all().iterator():
+        APIExperimentalPackageIndexCache.drop_stale_cache(community)
+    APIExperimentalPackageIndexCache.drop_orphaned_community_indexes()
+
+
+def build_community_package_indexes(
+    communities: List[
+        Tuple[Community, Optional[APIExperimentalPackageIndexCache], str]
+    ],
+) -> None:
+    """
+    Build the package indexes of the given communities in a single pass over
+    the versions listed in them.
+
+    :param communities: The communities along with their latest index and
+        the watermark of the new index
+    """
+    timestamp = timezone.now()
+    writers = {}
+    try:
+        for community, _, _ in communities:
+            writers[
+                community.pk
+            ] = APIExperimentalPackageIndexCache.open_compressed_data(
+                f"index-{timestamp.isoformat()}-{community.identifier}.json",
+                get_index_content_encodings(),
+            )
+        renderer = JSONRenderer()
+        listed = PackageListing.objects.filter(community_id__in=writers).values(
+            "package_id"
+        )
+        rows = chunked_enumerate(
+            get_package_index_rows()
+            .filter(package_id__in=listed)
+            .annotate(community_ids=get_community_ids_subquery()),
+            PACKAGE_INDEX_CHUNK_SIZE,
+            keys=("date_created", "id"),
+        )
+        for row in rows:
+            line = renderer.render(get_package_index_entry(row)) + b"\n"
+            for community_id in row["community_ids"] or []:
+                if community_id in writers:
+                    writers[community_id].write(line)
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+
+    for community, latest, watermark in communities:
+        APIExperimentalPackageIndexCache.create_from_saved(
+            writers[community.pk].close(),
+            timestamp,
+            previous=latest,
+            watermark=watermark,
+            community=community,
+            is_community_index=True,
+        )
+
+
+def update_api_experimental_package_index_segment() -> APIExperimentalPackageIndexSegment:
+    """
+    Add a segment to the segmented package index. A new base segment is built
+    once the latest one is older than the compaction interval, or once it's
+    older than the package changes are tracked for. Otherwise a delta segment
+    of the packages changed since the previous segment is added, if any.
+
+    :return: The base segment the manifest should list
+    """
+    base = APIExperimentalPackageIndexSegment.get_latest_base()
+    compaction_interval = timedelta(
+        seconds=settings.API_EXPERIMENTAL_INDEX_COMPACTION_INTERVAL
+    )
+    if (
+        base is None
+        or base.last_modified < timezone.now() - compaction_interval
+        or base.last_modified < PackageChange.get_retention_cutoff()
+    ):
+        return APIExperimentalPackageIndexSegment.create_from_content(
+            f"index-base-{timezone.now().isoformat()}.json",
+            iterate_package_index(),
+        )
+
+    previous = base.get_segments()[-1]
+    changes = PackageChange.objects.filter(
+        datetime_created__gte=previous.last_modified - PACKAGE_CHANGE_COMMIT_MARGIN,
+    )
+    if changes.exists():
+        APIExperimentalPackageIndexSegment.create_from_content(
+            f"index-delta-{timezone.now().isoformat()}.json",
+            iterate_package_index_delta(changes),
+            base=base,
+        )
+    return base
+
+
+def update_api_experimental_package_index_segments() -> None:
+    """Called periodically by a Celery background task"""
+    try:
+        base = update_api_experimental_package_index_segment()
+        latest = APIExperimentalPackageIndexManifest.get_latest()
+        content = {
+            "segments": [
+                {
+                    "type": "base" if x.is_base else "delta",
+                    "url": x.data.url,
+                    "checksum_sha256": x.checksum_sha256,
+                }
+                for x in base.get_segments()
+            ],
+        }
+        APIExperimentalPackageIndexManifest.create_from_content(
+            f"index-manifest-{timezone.now().isoformat()}.json",
+            json.dumps(content).encode(),
+            previous=latest if latest and latest.base == base else None,
+            base=base,
+        )
+    except Exception as e:  # pragma: no cover
+        capture_exception(e)
+    APIExperimentalPackageIndexManifest.drop_stale_cache()
+    APIExperimentalPackageIndexSegment.drop_stale_cache()
+
+
+def redirect_to_package_index_file(request, cache: PackageIndexCacheMixin):
+    encoding = choose_content_encoding(
+        request.META.get("HTTP_ACCEPT_ENCODING"), cache.content_encodings
+    )
+    # The stored files can't be served decompressed, so clients which
+    # accept none of the encodings get the gzip variant
+    if encoding == IDENTITY:
+        encoding = "gzip"
+    file, _ = cache.get_encoded_file(encoding)
+    response = redirect(request.build_absolute_uri(file.url))
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+def accepts_binary_package_index(request) -> bool:
+    """
+    Check if the binary package index was asked for. It's only served to
+    clients asking for it explicitly, not to ones accepting any content, and
+    only if it's preferred at least as much as JSON.
+    """
+    accepted = parse_quality_values(request.META.get("HTTP_ACCEPT", ""))
+    quality = accepted.get(BINARY_INDEX_CONTENT_TYPE, 0.0)
+    json_quality = accepted.get(
+        "application/json", accepted.get("application/*", accepted.get("*/*", 0.0))
+    )
+    return quality > 0 and quality >= json_quality
+
+
+def get_package_index_response(request, community: Optional[Community] = None):
+    cache = None
+    if accepts_binary_package_index(request):
+        cache = APIExperimentalPackageIndexCache.get_latest(
+            community=community, content_type=BINARY_INDEX_CONTENT_TYPE
+        )
+    # The binary index is built separately, so the JSON index is served
+    # until it exists
+    if cache is None:
+        cache = APIExperimentalPackageIndexCache.get_latest(community=community)
+    if not cache:
+        # Indexes aren't built for communities without listed versions
+        if community is not None and not (
+            PackageVersion.objects.active().listed_in(community.identifier).exists()
+        ):
+            response = HttpResponse(b"", content_type="application/json")
+            patch_vary_headers(response, ("Accept",))
+            return response
+        raise ServiceUnavailable("Package index not yet built, try again later")
+    response = redirect_to_package_index_file(request, cache)
+    patch_vary_headers(response, ("Accept",))
+    return response
+
+
 HOSTNAME = f"{settings.PROTOCOL}{settings.PRIMARY_HOST}"
 DESCRIPTION = (
     "Response is a stream of newline delimited JSON.\n\n"
     "Download links are not included in the response. The client is expected to "
     "build them using the following pattern: "
     f"{HOSTNAME}/package/download/{{namespace}}/{{name}}/{{version_number}}/"
+    "\n\n"
+    "If built, the index is also available in a compact binary format by "
+    f"requesting {BINARY_INDEX_CONTENT_TYPE} in the Accept header. See "
+    "thunderstore.repository.package_index_binary for the format."
 )
 
 
-class PackageIndexApiView(APIView):
+class BasePackageIndexApiView(APIView):
+    def perform_content_negotiation(self, request, force=False):
+        # The binary index isn't rendered by a renderer, so clients asking for
+        # only it must not be rejected, see get_package_index_response
+        return super().perform_content_negotiation(request, force=True)
+
+
+class PackageIndexApiView(BasePackageIndexApiView):
     """
     Lists all known package versions across all communities in a stream of
     newline delimited JSON.
@@ -88,7 +537,50 @@ class PackageIndexApiView(APIView):
         operation_description=DESCRIPTION,
     )
     def get(self, request):
-        cache = APIExperimentalPackageIndexCache.get_latest()
-        if not cache:
+        return get_package_index_response(request)
+
+
+class CommunityPackageIndexApiView(BasePackageIndexApiView):
+    """
+    Lists all known package versions of packages listed in a community in a
+    stream of newline delimited JSON.
+    """
+
+    @swagger_auto_schema(
+        tags=["experimental"],
+        responses={200: PackageIndexEntry(many=True)},
+        operation_id="experimental.community.package-index",
+        operation_description=DESCRIPTION,
+    )
+    def get(self, request, community: str):
+        community = get_object_or_404(Community, identifier=community)
+        return get_package_index_response(request, community)
+
+
+MANIFEST_DESCRIPTION = (
+    "Response is a JSON manifest of the package index split into segments. "
+    "The first segment is a base segment in the same format as the package "
+    "index. Each following segment is a delta segment, which is a stream of "
+    "newline delimited JSON objects with the namespace, name and current "
+    "index entries of a changed package. The entries replace any previous "
+    "entries of the package, and removed packages have no entries. Segments "
+    "never change once created, so clients only need to download segments "
+    "they haven't already applied."
+)
+
+
+class PackageIndexManifestApiView(APIView):
+    """
+    Returns the manifest of the segmented package index.
+    """
+
+    @swagger_auto_schema(
+        tags=["experimental"],
+        operation_id="experimental.package-index.manifest",
+        operation_description=MANIFEST_DESCRIPTION,
+    )
+    def get(self, request):
+        manifest = APIExperimentalPackageIndexManifest.get_latest()
+        if not manifest:
             raise ServiceUnavailable("Package index not yet built, try again later")
-        return redirect(self.request.build_absolute_uri(cache.data.url))
+        return redirect_to_package_index_file(request, manifest)
@@ -4,7 +4,7 @@ from rest_framework.generics import RetrieveAPIView, get_object_or_404
 from rest_framework.response import Response
 
 from thunderstore.cache.cache import ManualCacheCommunityMixin
-from thunderstore.cache.enums import CacheBustCondition
+from thunderstore.cache.enums import namespace_packages_updated
 from thunderstore.repository.api.experimental.serializers import (
     MarkdownResponseSerializer,
     PackageVersionSerializerExperimental,
@@ -14,12 +14,13 @@ from thunderstore.repository.package_reference import PackageReference
 
 
 class PackageVersionDetailMixin(ManualCacheCommunityMixin, RetrieveAPIView):
-    cache_until = CacheBustCondition.any_package_updated
-
     @swagger_auto_schema(tags=["experimental"])
     def get(self, *args, **kwargs):
         return super().get(*args, **kwargs)
 
+    def get_cache_until(self) -> str:
+        return namespace_packages_updated(self.kwargs["namespace"])
+
     def get_object(self):
         queryset = self.filter_queryset(self.get_queryset())
         try:
@@ -0,0 +1,203 @@
+"""
+A faster equivalent of PackageListingSerializer for building the v1 package
+list. Rows are read with values() queries instead of model instances, using
+a constant amount of queries regardless of the amount of listings, and the
+output is identical to the serializer's.
+"""
+from collections import defaultdict
+from distutils.version import StrictVersion
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.db.models import Count, OuterRef, Subquery
+from django.urls import reverse
+
+from thunderstore.community.models import Community, PackageListing
+from thunderstore.frontend.url_reverse import get_community_url_reverse_args
+from thunderstore.repository.cache import order_package_listing_queryset
+from thunderstore.repository.models import PackageRating, PackageVersion
+
+VERSION_FIELDS = (
+    "id",
+    "package_id",
+    "name",
+    "description",
+    "icon",
+    "version_number",
+    "downloads",
+    "date_created",
+    "website_url",
+    "is_active",
+    "uuid4",
+    "file_size",
+)
+
+
+def get_listing_rows(ids: List[int]) -> List[Dict[str, Any]]:
+    ratings = (
+        PackageRating.objects.filter(package=OuterRef("package_id"))
+        .order_by()
+        .values("package")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return list(
+        order_package_listing_queryset(PackageListing.objects.filter(id__in=ids))
+        .annotate(rating_score=Subquery(ratings))
+        .values(
+            "id",
+            "has_nsfw_content",
+            "package_id",
+            "package__name",
+            "package__owner__name",
+            "package__owner__donation_link",
+            "package__date_created",
+            "package__date_updated",
+            "package__uuid4",
+            "package__is_pinned",
+            "package__is_deprecated",
+            "rating_score",
+        )
+    )
+
+
+def get_listing_categories(ids: List[int]) -> Dict[int, List[str]]:
+    result = defaultdict(list)
+    through = PackageListing.categories.through.objects.filter(
+        packagelisting_id__in=ids
+    ).values_list("packagelisting_id", "packagecategory__name")
+    for listing_id, name in through:
+        result[listing_id].append(name)
+    return result
+
+
+def get_package_versions(package_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Get the active versions of each package, ordered from the newest version
+    number to the oldest like Package.available_versions.
+    """
+    grouped = defaultdict(list)
+    versions = (
+        PackageVersion.objects.filter(package_id__in=package_ids, is_active=True)
+        .order_by("id")
+        .values(*VERSION_FIELDS)
+    )
+    for version in versions:
+        grouped[version["package_id"]].append(version)
+    return {
+        package_id: list(
+            reversed(sorted(rows, key=lambda x: StrictVersion(x["version_number"])))
+        )
+        for package_id, rows in grouped.items()
+    }
+
+
+def get_version_dependencies(version_ids: List[int]) -> Dict[int, List[str]]:
+    result = defaultdict(list)
+    through = (
+        PackageVersion.dependencies.through.objects.filter(
+            from_packageversion_id__in=version_ids
+        )
+        .order_by("id")
+        .values_list(
+            "from_packageversion_id",
+            "to_packageversion__package__owner__name",
+            "to_packageversion__package__name",
+            "to_packageversion__version_number",
+        )
+    )
+    for version_id, owner, name, version_number in through:
+        result[version_id].append(f"{owner}-{name}-{version_number}")
+    return result
+
+
+def get_package_url_prefix(community: Community) -> str:
+    site = community.main_site
+    hostname = settings.PRIMARY_HOST if site is None else site.site.domain
+    return f"{settings.PROTOCOL}{hostname}"
+
+
+def serialize_package_listings(
+    community: Community, ids: List[int]
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Serialize the given package listings of a community in the v1 package
+    list format.
+
+    :return: The serialized listings by listing ID, ordered the same way as
+        the package list
+    """
+    listings = get_listing_rows(ids)
+    categories = get_listing_categories(ids)
+    versions = get_package_versions([x["package_id"] for x in listings])
+    dependencies = get_version_dependencies(
+        [version["id"] for rows in versions.values() for version in rows]
+    )
+    icon_storage = PackageVersion._meta.get_field("icon").storage
+    url_prefix = get_package_url_prefix(community)
+    download_prefix = f"{settings.PROTOCOL}{settings.PRIMARY_HOST}"
+
+    result = {}
+    for listing in listings:
+        owner = listing["package__owner__name"]
+        name = listing["package__name"]
+        package_path = reverse(
+            **get_community_url_reverse_args(
+                community=community,
+                viewname="packages.detail",
+                kwargs={"owner": owner, "name": name},
+            )
+        )
+        entry = {
+            "name": name,
+            "full_name": f"{owner}-{name}",
+            "owner": owner,
+            "package_url": f"{url_prefix}{package_path}",
+        }
+        # Omitted if not set, see PackageListingSerializer.to_representation
+        if listing["package__owner__donation_link"]:
+            entry["donation_link"] = listing["package__owner__donation_link"]
+        entry.update(
+            {
+                "date_created": listing["package__date_created"],
+                "date_updated": listing["package__date_updated"],
+                "uuid4": listing["package__uuid4"],
+                "rating_score": listing["rating_score"] or 0,
+                "is_pinned": listing["package__is_pinned"],
+                "is_deprecated": listing["package__is_deprecated"],
+                "has_nsfw_content": listing["has_nsfw_content"],
+                "categories": set(categories.get(listing["id"], ())),
+                "versions": [
+                    {
+                        "name": version["name"],
+                        "full_name": f"{owner}-{name}-{version['version_number']}",
+                        "description": version["description"],
+                        "icon": (
+                            icon_storage.url(version["icon"])
+                            if version["icon"]
+                            else None
+                        ),
+                        "version_number": version["version_number"],
+                        "dependencies": dependencies.get(version["id"], []),
+                        "download_url": download_prefix
+                        + reverse(
+                            "old_urls:packages.download",
+                            kwargs={
+                                "owner": owner,
+                                "name": name,
+                                "version": version["version_number"],
+                            },
+                        ),
+                        "downloads": version["downloads"],
+                        "date_created": version["date_created"],
+                        "website_url": version["website_url"],
+                        "is_active": version["is_active"],
+                        "uuid4": version["uuid4"],
+                        "file_size": version["file_size"],
+                    }
+                    for version in versions.get(listing["package_id"], ())
+                ],
+            }
+        )
+        result[listing["id"]] = entry
+    return result
@@ -1,32 +1,173 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List
+
+import django
+from django.conf import settings
+from django.utils import timezone
+
 from thunderstore.community.models import Community, CommunitySite
 from thunderstore.core.utils import capture_exception
-from thunderstore.repository.api.v1.viewsets import serialize_package_list_for_community
-from thunderstore.repository.models.cache import APIV1PackageCache
+from thunderstore.repository.api.v1.viewsets import (
+    get_package_fragment_keys,
+    get_package_list_watermark,
+    iterate_package_list,
+    iterate_package_list_for_community,
+)
+from thunderstore.repository.cache import (
+    get_index_watermark,
+    get_package_listing_queryset,
+)
+from thunderstore.repository.models import PackageChange
+from thunderstore.repository.models.cache import (
+    APIV1PackageCache,
+    APIV1PackageIndexManifest,
+    APIV1PackageIndexShard,
+)
+from thunderstore.utils.batch import batch
 
 
-def update_api_v1_caches() -> None:
-    update_api_v1_indexes()
+def update_api_v1_caches(processes: int = 0) -> None:
+    if processes > 0:
+        update_api_v1_indexes_in_processes(processes)
+    else:
+        update_api_v1_indexes()
 
 
-def update_api_v1_indexes() -> None:
-    for site in CommunitySite.objects.iterator():
-        try:
-            APIV1PackageCache.update_for_community(
-                community=site.community,
-                content=serialize_package_list_for_community(
-                    community=site.community,
-                ),
-            )
-        except Exception as e:  # pragma: no cover
-            capture_exception(e)
-    for community in Community.objects.filter(sites=None).iterator():
-        try:
-            APIV1PackageCache.update_for_community(
-                community=community,
-                content=serialize_package_list_for_community(
-                    community=community,
-                ),
-            )
-        except Exception as e:  # pragma: no cover
-            capture_exception(e)
+def update_api_v1_index(community: Community) -> None:
+    watermark = get_package_list_watermark(community)
+    if settings.API_V1_SHARDED_INDEX_ENABLED:
+        update_api_v1_sharded_index(community, watermark)
+    latest = APIV1PackageCache.get_latest_for_community(
+        community_identifier=community.identifier
+    )
+    if latest is not None and latest.watermark == watermark:
+        return
+    APIV1PackageCache.update_for_community(
+        community=community,
+        content=iterate_package_list_for_community(
+            community=community,
+            incremental=settings.API_V1_INCREMENTAL_INDEX_ENABLED,
+        ),
+        previous=latest,
+        watermark=watermark,
+    )
+
+
+def get_api_v1_index_shard(
+    community: Community,
+    listing_ids: List[int],
+    reusable: Dict[str, APIV1PackageIndexShard],
+) -> APIV1PackageIndexShard:
+    """
+    Get the shard of the given package listings, reusing a shard of the
+    previous build if none of its listings have changed.
+    """
+    keys = get_package_fragment_keys(community, listing_ids)
+    watermark = get_index_watermark(
+        community.pk, *(keys[x] for x in listing_ids if x in keys)
+    )
+    if watermark in reusable:
+        return reusable[watermark]
+    return APIV1PackageIndexShard.create_from_content(
+        f"{timezone.now().isoformat()}-{community.identifier}-shard.json",
+        iterate_package_list(
+            community=community,
+            listing_ids=listing_ids,
+            incremental=settings.API_V1_INCREMENTAL_INDEX_ENABLED,
+        ),
+        watermark=watermark,
+        community=community,
+    )
+
+
+def update_api_v1_sharded_index(community: Community, watermark: str) -> None:
+    """
+    Build the package list of a community as fixed-size shards and a manifest
+    of them. The listings are sharded in the order of their IDs rather than
+    the package list order, so that package updates don't move listings from
+    one shard to another, and only the shards with changed listings are
+    rebuilt.
+    """
+    latest = APIV1PackageIndexManifest.get_latest_for_community(
+        community_identifier=community.identifier
+    )
+    if latest is not None and latest.watermark == watermark:
+        return
+    reusable = {}
+    if latest is not None:
+        reusable = {x.watermark: x for x in latest.shards.active()}
+    listing_ids = (
+        get_package_listing_queryset(community_identifier=community.identifier)
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+    shards = [
+        get_api_v1_index_shard(community, ids, reusable)
+        for ids in batch(settings.API_V1_INDEX_SHARD_SIZE, listing_ids)
+    ]
+    content = {
+        "shard_size": settings.API_V1_INDEX_SHARD_SIZE,
+        "shards": [
+            {"url": x.data.url, "checksum_sha256": x.checksum_sha256} for x in shards
+        ],
+    }
+    manifest = APIV1PackageIndexManifest.create_from_content(
+        f"{timezone.now().isoformat()}-{community.identifier}-manifest.json",
+        json.dumps(content).encode(),
+        previous=latest,
+        watermark=watermark,
+        community=community,
+    )
+    manifest.shards.set(shards)
+
+
+def update_api_v1_index_by_id(community_id: int) -> None:
+    try:
+        update_api_v1_index(Community.objects.get(pk=community_id))
+    except Exception as e:  # pragma: no cover
+        capture_exception(e)
+
+
+def get_api_v1_index_community_ids() -> List[int]:
+    """
+    Get the communities to build v1 indexes for, communities with sites first.
+    """
+    with_sites = CommunitySite.objects.order_by("pk").values_list(
+        "community_id", flat=True
+    )
+    without_sites = (
+        Community.objects.filter(sites=None).order_by("pk").values_list("pk", flat=True)
+    )
+    return list(dict.fromkeys([*with_sites, *without_sites]))
+
+
+def drop_stale_api_v1_data() -> None:
     APIV1PackageCache.drop_stale_cache()
+    APIV1PackageIndexManifest.drop_stale_cache()
+    APIV1PackageIndexShard.drop_stale_cache()
+    PackageChange.drop_expired()
+
+
+def update_api_v1_indexes() -> None:
+    for community_id in get_api_v1_index_community_ids():
+        update_api_v1_index_by_id(community_id)
+    drop_stale_api_v1_data()
+
+
+def update_api_v1_indexes_in_processes(processes: int) -> None:
+    """
+    Build the indexes of several communities at once in a pool of worker
+    processes. The workers are spawned rather than forked, as forked processes
+    would share the database, Redis and S3 connections of this process.
+    """
+    community_ids = get_api_v1_index_community_ids()
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=get_context("spawn"),
+        initializer=django.setup,
+    ) as executor:
+        for _ in executor.map(update_api_v1_index_by_id, community_ids):
+            pass
+    drop_stale_api_v1_data()
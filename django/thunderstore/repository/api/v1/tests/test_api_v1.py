@@ -5,6 +5,7 @@ from io import BytesIO
 from typing import Any, Optional
 
 import pytest
+from django.db.models import F
 from django.utils.http import http_date
 from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
@@ -13,6 +14,7 @@ from thunderstore.community.models import CommunitySite, PackageListing
 from thunderstore.core.factories import UserFactory
 from thunderstore.repository.api.v1.tasks import update_api_v1_caches
 from thunderstore.repository.api.v1.viewsets import PACKAGE_SERIALIZER
+from thunderstore.repository.models import PackageVersion
 from thunderstore.repository.models.cache import APIV1PackageCache
 
 
@@ -26,6 +28,7 @@ def test_api_v1_package_list(
     settings: Any,
 ) -> None:
     settings.PRIMARY_HOST = "example.org"
+    api_client.defaults["HTTP_ACCEPT_ENCODING"] = "gzip"
     active_package_listing.package.owner.donation_link = "https://example.org/"
     active_package_listing.package.owner.save()
     if old_urls:
@@ -52,7 +55,7 @@ def test_api_v1_package_list(
     assert response.status_code == 200
 
     # The response is gzipped
-    content = BytesIO(response.content)
+    content = BytesIO(b"".join(response.streaming_content))
     with gzip.GzipFile(fileobj=content, mode="r") as f:
         result = json.loads(f.read())
 
@@ -64,6 +67,13 @@ def test_api_v1_package_list(
     assert last_modified == http_date(int(cache.last_modified.timestamp()))
     assert response["Content-Type"] == cache.content_type
     assert response["Content-Encoding"] == cache.content_encoding
+    assert response["ETag"] == f'"{cache.checksum_sha256}"'
+    assert int(response["Content-Length"]) == content.getbuffer().nbytes
+
+    # Should get a 304 since the ETag matches
+    response = api_client.get(path=url, HTTP_IF_NONE_MATCH=f'"{cache.checksum_sha256}"')
+    assert response.status_code == 304
+    assert response["ETag"] == f'"{cache.checksum_sha256}"'
 
     # Should get a 304 since Last-Modified matches
     if old_urls:
@@ -80,8 +90,18 @@ def test_api_v1_package_list(
 
     # We need to sleep at least 0.5 seconds to ensure differing timestamp
     # TODO: Use freezegun or similar instead of sleeping
-    # TODO: Use ETag instead of just timestmap
     time.sleep(1)
+    # The cache is only rebuilt if the package list has changed
+    update_api_v1_caches()
+    assert (
+        APIV1PackageCache.get_latest_for_community(
+            community_identifier=active_package_listing.community.identifier
+        )
+        == cache
+    )
+    PackageVersion.objects.filter(package=active_package_listing.package).update(
+        downloads=F("downloads") + 1
+    )
     update_api_v1_caches()
     new_cache = APIV1PackageCache.get_latest_for_community(
         community_identifier=active_package_listing.community.identifier
@@ -112,6 +132,97 @@ def test_api_v1_package_list(
     )
 
 
+@pytest.mark.django_db
+def test_api_v1_package_list_range(
+    api_client: APIClient,
+    community_site: CommunitySite,
+    active_package_listing: PackageListing,
+) -> None:
+    url = f"/c/{community_site.community.identifier}/api/v1/package/"
+    api_client.defaults["HTTP_ACCEPT_ENCODING"] = "gzip"
+    update_api_v1_caches()
+    cache = APIV1PackageCache.get_latest_for_community(
+        community_identifier=community_site.community.identifier
+    )
+    etag = f'"{cache.checksum_sha256}"'
+    full = b"".join(api_client.get(url).streaming_content)
+
+    response = api_client.get(url, HTTP_RANGE="bytes=10-19")
+    assert response.status_code == 206
+    assert response["Content-Range"] == f"bytes 10-19/{len(full)}"
+    assert response["Content-Length"] == "10"
+    assert b"".join(response.streaming_content) == full[10:20]
+
+    response = api_client.get(url, HTTP_RANGE="bytes=-5", HTTP_IF_RANGE=etag)
+    assert response.status_code == 206
+    assert b"".join(response.streaming_content) == full[-5:]
+
+    # The full content is returned if it has changed since the range's ETag
+    response = api_client.get(url, HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"old"')
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == full
+
+    response = api_client.get(url, HTTP_RANGE=f"bytes={len(full)}-")
+    assert response.status_code == 416
+    assert response["Content-Range"] == f"bytes */{len(full)}"
+
+
+@pytest.mark.django_db
+def test_api_v1_package_list_identity_encoding(
+    api_client: APIClient,
+    community_site: CommunitySite,
+    active_package_listing: PackageListing,
+) -> None:
+    url = f"/c/{community_site.community.identifier}/api/v1/package/"
+    update_api_v1_caches()
+    cache = APIV1PackageCache.get_latest_for_community(
+        community_identifier=community_site.community.identifier
+    )
+    gzipped = b"".join(
+        api_client.get(url, HTTP_ACCEPT_ENCODING="gzip").streaming_content
+    )
+
+    # Clients not sending Accept-Encoding get an uncompressed response
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response
+    assert "Accept-Encoding" in response["Vary"]
+    assert b"".join(response.streaming_content) == gzip.decompress(gzipped)
+    etag = response["ETag"]
+    assert etag != f'"{cache.checksum_sha256}"'
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    # As do clients which accept none of the stored encodings
+    response = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip;q=0, unknown")
+    assert "Content-Encoding" not in response
+    assert b"".join(response.streaming_content) == gzip.decompress(gzipped)
+
+
+@pytest.mark.django_db
+def test_api_v1_package_list_encoded_variants(
+    api_client: APIClient,
+    community_site: CommunitySite,
+    active_package_listing: PackageListing,
+) -> None:
+    url = f"/c/{community_site.community.identifier}/api/v1/package/"
+    update_api_v1_caches()
+    cache = APIV1PackageCache.get_latest_for_community(
+        community_identifier=community_site.community.identifier
+    )
+    # Stand in for a variant whose compression library isn't installed here
+    file, checksum = cache.get_encoded_file("gzip")
+    cache.encoded_variants = {"br": {"name": file.name, "checksum_sha256": "br"}}
+    cache.save()
+    assert cache.content_encodings == ["br", "gzip"]
+
+    response = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate, br")
+    assert response["Content-Encoding"] == "br"
+    assert response["ETag"] == '"br"'
+    response = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip, br;q=0.5")
+    assert response["Content-Encoding"] == "gzip"
+    assert response["ETag"] == f'"{checksum}"'
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize("old_urls", (False, True))
 def test_api_v1_package_detail(
@@ -224,11 +335,11 @@ def test_api_v1_package_listing_serializer_donation_link_omission(
     active_package_listing.package.owner.donation_link = donation_link
     active_package_listing.package.owner.save()
     update_api_v1_caches()
-    response = api_client.get("/api/v1/package/")
+    response = api_client.get("/api/v1/package/", HTTP_ACCEPT_ENCODING="gzip")
     assert response.status_code == 200
 
     # The response is gzipped
-    content = BytesIO(response.content)
+    content = BytesIO(b"".join(response.streaming_content))
     with gzip.GzipFile(fileobj=content, mode="r") as f:
         result = json.loads(f.read())
 
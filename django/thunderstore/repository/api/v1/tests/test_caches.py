@@ -1,9 +1,13 @@
 import gzip
 import json
+from datetime import timedelta
 from typing import Any
 
 import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
 
+import thunderstore.repository.tasks.caches
 from thunderstore.community.factories import (
     CommunityFactory,
     CommunitySiteFactory,
@@ -12,7 +16,12 @@ from thunderstore.community.factories import (
 )
 from thunderstore.community.models import Community, CommunitySite, PackageListing
 from thunderstore.repository.api.v1.tasks import update_api_v1_caches
-from thunderstore.repository.models import APIV1PackageCache
+from thunderstore.repository.models import (
+    APIV1PackageCache,
+    APIV1PackageIndexManifest,
+    APIV1PackageIndexShard,
+)
+from thunderstore.repository.tasks.caches import update_api_caches
 
 
 @pytest.mark.django_db
@@ -139,3 +148,139 @@ def test_api_v1_cache_building_package_url_simple(
     with gzip.GzipFile(fileobj=cache.data, mode="r") as f:
         result = json.loads(f.read())
     assert result[0]["package_url"].startswith(expected_prefix)
+
+
+@pytest.mark.django_db
+def test_api_v1_cache_update_task_builds_communities_separately(mocker) -> None:
+    communities = [CommunitySiteFactory().community, CommunityFactory()]
+    for community in communities:
+        PackageListingFactory(community_=community)
+    build = mocker.spy(
+        thunderstore.repository.tasks.caches, "update_api_v1_index_by_id"
+    )
+    drop = mocker.spy(APIV1PackageCache, "drop_stale_cache")
+
+    update_api_caches.delay()
+
+    built = [x.args[0] for x in build.call_args_list]
+    assert set(x.pk for x in communities).issubset(built)
+    assert len(built) == len(set(built))
+    drop.assert_called_once()
+    for community in communities:
+        assert APIV1PackageCache.get_latest_for_community(community.identifier)
+
+
+class InProcessExecutor:
+    """
+    Runs the work of a process pool in this process, as worker processes
+    can't see the data of the test's transaction
+    """
+
+    def __init__(self, max_workers, mp_context, initializer):
+        self.max_workers = max_workers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def map(self, fn, iterable):
+        return map(fn, iterable)
+
+
+@pytest.mark.django_db
+def test_api_v1_cache_update_in_processes(mocker) -> None:
+    community = PackageListingFactory().community
+    executor = mocker.patch(
+        "thunderstore.repository.api.v1.tasks.ProcessPoolExecutor",
+        side_effect=InProcessExecutor,
+    )
+    update_api_v1_caches(processes=3)
+    assert executor.call_args.kwargs["max_workers"] == 3
+    assert APIV1PackageCache.get_latest_for_community(community.identifier)
+
+
+def read_cache_json(cache) -> Any:
+    with gzip.GzipFile(fileobj=cache.data, mode="r") as f:
+        return json.loads(f.read())
+
+
+@pytest.mark.django_db
+def test_api_v1_sharded_index(community_site: CommunitySite, settings: Any) -> None:
+    settings.DISABLE_TRANSACTION_CHECKS = True
+    settings.API_V1_SHARDED_INDEX_ENABLED = True
+    settings.API_V1_INDEX_SHARD_SIZE = 2
+    community = community_site.community
+    listings = [PackageListingFactory(community=community) for _ in range(5)]
+
+    update_api_v1_caches()
+    manifest = APIV1PackageIndexManifest.get_latest_for_community(community.identifier)
+    shards = sorted(manifest.shards.all(), key=lambda x: x.pk)
+    assert read_cache_json(manifest) == {
+        "shard_size": 2,
+        "shards": [
+            {"url": x.data.url, "checksum_sha256": x.checksum_sha256} for x in shards
+        ],
+    }
+    assert [{x["uuid4"] for x in read_cache_json(shard)} for shard in shards] == [
+        {str(x.package.uuid4) for x in listings[:2]},
+        {str(x.package.uuid4) for x in listings[2:4]},
+        {str(listings[4].package.uuid4)},
+    ]
+
+    # Only the shard of the changed listing is rebuilt
+    listings[3].has_nsfw_content = True
+    listings[3].save()
+    update_api_v1_caches()
+    updated = APIV1PackageIndexManifest.get_latest_for_community(community.identifier)
+    assert updated.pk != manifest.pk
+    updated_shards = sorted(updated.shards.all(), key=lambda x: x.pk)
+    assert [x.pk for x in updated_shards[:2]] == [shards[0].pk, shards[2].pk]
+    assert updated_shards[2].pk not in [x.pk for x in shards]
+    assert any(x["has_nsfw_content"] for x in read_cache_json(updated_shards[2]))
+
+
+@pytest.mark.django_db
+def test_api_v1_sharded_index_disabled(
+    active_package_listing: PackageListing, settings: Any
+) -> None:
+    settings.API_V1_SHARDED_INDEX_ENABLED = False
+    update_api_v1_caches()
+    assert APIV1PackageIndexManifest.objects.exists() is False
+    assert APIV1PackageIndexShard.objects.exists() is False
+
+
+@pytest.mark.django_db
+def test_api_v1_sharded_index_drop_stale(
+    active_package_listing: PackageListing, settings: Any
+) -> None:
+    settings.DISABLE_TRANSACTION_CHECKS = True
+    settings.API_V1_SHARDED_INDEX_ENABLED = True
+    update_api_v1_caches()
+    shard = APIV1PackageIndexShard.objects.get()
+    unused = APIV1PackageIndexShard.objects.create(
+        content_type="application/json",
+        content_encoding="gzip",
+        last_modified=timezone.now() - timedelta(hours=2),
+    )
+    update_api_v1_caches()
+    assert list(APIV1PackageIndexShard.objects.all()) == [shard]
+    assert APIV1PackageIndexShard.objects.filter(pk=unused.pk).exists() is False
+
+
+@pytest.mark.django_db
+def test_api_v1_package_shards_view(
+    api_client: APIClient,
+    community_site: CommunitySite,
+    active_package_listing: PackageListing,
+    settings: Any,
+) -> None:
+    url = f"/c/{community_site.community.identifier}/api/v1/package/shards/"
+    assert api_client.get(url).status_code == 503
+    settings.API_V1_SHARDED_INDEX_ENABLED = True
+    update_api_v1_caches()
+    response = api_client.get(url)
+    assert response.status_code == 200
+    result = json.loads(b"".join(response.streaming_content))
+    assert len(result["shards"]) == 1
@@ -0,0 +1,103 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from thunderstore.community.factories import (
+    PackageCategoryFactory,
+    PackageListingFactory,
+)
+from thunderstore.community.models import CommunitySite, PackageListing
+from thunderstore.repository.api.v1.fast_serializer import serialize_package_listings
+from thunderstore.repository.api.v1.serializers import PackageListingSerializer
+from thunderstore.repository.cache import order_package_listing_queryset
+from thunderstore.repository.factories import (
+    PackageRatingFactory,
+    PackageVersionFactory,
+)
+
+
+def render_with_serializer(community, ids) -> bytes:
+    queryset = order_package_listing_queryset(PackageListing.objects.filter(id__in=ids))
+    serializer = PackageListingSerializer(
+        queryset, many=True, context={"community": community}
+    )
+    return JSONRenderer().render(serializer.data)
+
+
+def render_with_fast_serializer(community, ids) -> bytes:
+    return JSONRenderer().render(
+        list(serialize_package_listings(community, ids).values())
+    )
+
+
+def create_listing(community, index: int, **version_kwargs) -> PackageListing:
+    return PackageListingFactory(
+        community_=community,
+        package_version_kwargs={"version_number": "1.0.0", **version_kwargs},
+        package_kwargs={"name": f"Package_{index}"},
+    )
+
+
+@pytest.mark.django_db
+def test_serialize_package_listings_matches_serializer(
+    community_site: CommunitySite,
+):
+    community = community_site.community
+    dependency = create_listing(community, 0)
+
+    # Donation link, category, dependency, rating and an inactive version
+    donated = create_listing(community, 1, icon="icons/custom.png")
+    donated.package.owner.donation_link = "https://example.org/donate"
+    donated.package.owner.save()
+    # The legacy serializer doesn't order categories or dependencies, so only
+    # one of each is used per listing and version to keep the output stable
+    donated.categories.add(PackageCategoryFactory(community=community, slug="a"))
+    newest = PackageVersionFactory(package=donated.package, version_number="1.10.0")
+    older = PackageVersionFactory(package=donated.package, version_number="1.2.0")
+    PackageVersionFactory(
+        package=donated.package, version_number="2.0.0", is_active=False
+    )
+    newest.dependencies.add(dependency.package.latest)
+    older.dependencies.add(
+        PackageVersionFactory(package=dependency.package, version_number="0.1.0")
+    )
+    PackageRatingFactory(package=donated.package)
+    PackageRatingFactory(package=donated.package)
+
+    # Pinned, deprecated and NSFW flags
+    flagged = create_listing(community, 2)
+    flagged.has_nsfw_content = True
+    flagged.save()
+    flagged.package.is_pinned = True
+    flagged.package.is_deprecated = True
+    flagged.package.save()
+
+    # Listings of packages without active versions are still listed
+    inactive = create_listing(community, 3)
+    inactive.package.versions.update(is_active=False)
+
+    ids = [x.id for x in (dependency, donated, flagged, inactive)]
+    expected = render_with_serializer(community, ids)
+    assert b"donation_link" in expected
+    assert b"/donate" in expected
+    assert b"icons/custom.png" in expected
+    assert b"-0.1.0" in expected
+    assert render_with_fast_serializer(community, ids) == expected
+
+
+@pytest.mark.django_db
+def test_serialize_package_listings_query_count(community_site: CommunitySite):
+    community = community_site.community
+    listings = [create_listing(community, i) for i in range(6)]
+    for listing in listings:
+        PackageVersionFactory(package=listing.package, version_number="2.0.0")
+    # Resolve and cache the community's main site before counting
+    serialize_package_listings(community, [])
+
+    with CaptureQueriesContext(connection) as small:
+        serialize_package_listings(community, [listings[0].id])
+    with CaptureQueriesContext(connection) as large:
+        result = serialize_package_listings(community, [x.id for x in listings])
+    assert len(result) == 6
+    assert len(large.captured_queries) == len(small.captured_queries)
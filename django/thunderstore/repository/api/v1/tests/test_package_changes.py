@@ -0,0 +1,209 @@
+from datetime import timedelta
+from typing import Any
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from thunderstore.community.factories import CommunityFactory, PackageListingFactory
+from thunderstore.community.models import CommunitySite, PackageListing
+from thunderstore.repository.api.v1.tasks import (
+    drop_stale_api_v1_data,
+    update_api_v1_caches,
+)
+from thunderstore.repository.api.v1.viewsets import (
+    get_package_list_changes,
+    get_package_list_etag_timestamp,
+    parse_package_changes_since,
+)
+from thunderstore.repository.models import PackageChange, PackageVersion
+from thunderstore.repository.models.cache import APIV1PackageCache
+from thunderstore.repository.models.package_change import PACKAGE_CHANGE_COMMIT_MARGIN
+
+
+def get_changes_url(community_site: CommunitySite) -> str:
+    return f"/c/{community_site.community.identifier}/api/v1/package/changes/"
+
+
+@pytest.mark.django_db
+def test_package_change_recorded(active_package_listing: PackageListing) -> None:
+    package = active_package_listing.package
+    PackageChange.objects.all().delete()
+
+    package.save()
+    active_package_listing.save()
+    package.versions.update(is_active=False)
+    package.versions.first().save()
+
+    changes = PackageChange.objects.order_by("pk")
+    assert all(x.package_uuid4 == package.uuid4 for x in changes)
+    assert all(x.package_full_name == package.full_package_name for x in changes)
+    assert changes.exclude(community=None).count() == 1
+    assert changes[1].community == active_package_listing.community
+
+
+@pytest.mark.django_db
+def test_package_change_not_recorded_for_downloads(
+    settings, active_package_listing: PackageListing
+) -> None:
+    settings.USE_LEGACY_PACKAGE_DOWNLOAD_METRICS = True
+    cache.clear()
+    version = active_package_listing.package.versions.first()
+    PackageChange.objects.all().delete()
+    PackageVersion.log_download_event(version, client_ip="127.0.0.1")
+    version.refresh_from_db()
+    assert version.downloads == 1
+    assert not PackageChange.objects.exists()
+
+
+@pytest.mark.django_db
+def test_package_list_changes(
+    community_site: CommunitySite,
+    active_package_listing: PackageListing,
+) -> None:
+    community = community_site.community
+    removed = PackageListingFactory(community=community)
+    other = PackageListingFactory(community=CommunityFactory())
+    since = timezone.now()
+
+    active_package_listing.package.save()
+    other.package.save()
+    removed_package = removed.package
+    removed.delete()
+
+    result = get_package_list_changes(community, since)
+    assert result["full_refresh_required"] is False
+    assert [str(x["uuid4"]) for x in result["updated"]] == [
+        str(active_package_listing.package.uuid4)
+    ]
+    # Changes to packages not listed in the community are omitted
+    assert result["removed"] == [
+        {
+            "uuid4": str(removed_package.uuid4),
+            "full_name": removed_package.full_package_name,
+        }
+    ]
+    timestamp = parse_package_changes_since(result["timestamp"])
+    assert timezone.now() - timestamp >= timedelta(minutes=1)
+
+
+@pytest.mark.django_db
+def test_package_list_changes_deactivated_package(
+    community_site: CommunitySite,
+    active_package_listing: PackageListing,
+) -> None:
+    since = timezone.now()
+    package = active_package_listing.package
+    package.is_active = False
+    package.save()
+
+    result = get_package_list_changes(community_site.community, since)
+    assert result["updated"] == []
+    assert [x["uuid4"] for x in result["removed"]] == [str(package.uuid4)]
+
+
+@pytest.mark.django_db
+def test_package_list_changes_full_refresh_required(
+    community_site: CommunitySite,
+    active_package_listing: PackageListing,
+    settings: Any,
+) -> None:
+    settings.API_V1_PACKAGE_CHANGES_RETENTION = 60
+    since = timezone.now() - timedelta(seconds=61)
+    result = get_package_list_changes(community_site.community, since)
+    assert result["full_refresh_required"] is True
+    assert result["updated"] == []
+
+
+@pytest.mark.django_db
+def test_package_change_drop_expired(
+    active_package_listing: PackageListing,
+    settings: Any,
+) -> None:
+    settings.API_V1_PACKAGE_CHANGES_RETENTION = 60
+    active_package_listing.package.save()
+    assert PackageChange.objects.exists()
+    PackageChange.objects.update(
+        datetime_created=timezone.now() - timedelta(seconds=61)
+    )
+    recent = PackageChange.objects.create(
+        package_uuid4=active_package_listing.package.uuid4,
+        package_full_name="Recent",
+    )
+    drop_stale_api_v1_data()
+    assert list(PackageChange.objects.all()) == [recent]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("format_since", (lambda x: x.isoformat(), http_date))
+def test_api_v1_package_changes_since(
+    api_client: APIClient,
+    community_site: CommunitySite,
+    active_package_listing: PackageListing,
+    format_since,
+) -> None:
+    since = timezone.now() - timedelta(seconds=1)
+    if format_since is http_date:
+        since = int(since.timestamp())
+    active_package_listing.package.save()
+
+    response = api_client.get(
+        get_changes_url(community_site), {"since": format_since(since)}
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["full_refresh_required"] is False
+    assert [x["full_name"] for x in result["updated"]] == [
+        active_package_listing.package.full_package_name
+    ]
+
+
+@pytest.mark.django_db
+def test_api_v1_package_changes_etag(
+    api_client: APIClient,
+    community_site: CommunitySite,
+    active_package_listing: PackageListing,
+) -> None:
+    update_api_v1_caches()
+    PackageChange.objects.all().delete()
+    cache = APIV1PackageCache.get_latest_for_community(
+        community_identifier=community_site.community.identifier
+    )
+    url = get_changes_url(community_site)
+    assert get_package_list_etag_timestamp(
+        community_site.community, f'"{cache.checksum_sha256}"'
+    ) == (cache.last_modified - PACKAGE_CHANGE_COMMIT_MARGIN)
+
+    response = api_client.get(url, {"etag": f'"{cache.checksum_sha256}"'})
+    assert response.status_code == 200
+    assert response.json()["full_refresh_required"] is False
+    assert response.json()["updated"] == []
+
+    active_package_listing.package.save()
+    response = api_client.get(url, {"etag": f'W/"{cache.checksum_sha256}"'})
+    assert len(response.json()["updated"]) == 1
+
+    response = api_client.get(url, {"etag": '"unknown"'})
+    assert response.json()["full_refresh_required"] is True
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("params", ({}, {"since": "yesterday"}))
+def test_api_v1_package_changes_invalid(
+    api_client: APIClient,
+    community_site: CommunitySite,
+    params,
+) -> None:
+    response = api_client.get(get_changes_url(community_site), params)
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_package_change_community_deleted(
+    active_package_listing: PackageListing,
+) -> None:
+    community = active_package_listing.community
+    community.delete()
+    assert PackageChange.objects.filter(community_id=community.pk).exists()
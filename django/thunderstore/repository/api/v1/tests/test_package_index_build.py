@@ -1,6 +1,9 @@
+import json
 from io import BytesIO
 
 import pytest
+from django.core.cache import cache
+from django.db.models import F
 from rest_framework.parsers import JSONParser
 
 from thunderstore.community.factories import PackageListingFactory
@@ -8,16 +11,97 @@ from thunderstore.community.models import CommunitySite
 from thunderstore.repository.api.v1.viewsets import (
     PACKAGE_SERIALIZER,
     SERIALIZER_BATCH_SIZE,
-    serialize_package_list_for_community,
+    get_package_list_watermark,
+    iterate_package_list_for_community,
+    render_package_fragments,
 )
+from thunderstore.repository.factories import PackageRatingFactory
+from thunderstore.repository.models import PackageVersion
 
 
 @pytest.mark.django_db
 def test_serialize_package_list_for_community(community_site: CommunitySite):
     for _ in range(int(SERIALIZER_BATCH_SIZE * 2.5)):
         PackageListingFactory(community=community_site.community)
-    result = serialize_package_list_for_community(community_site.community)
+    result = b"".join(iterate_package_list_for_community(community_site.community))
     buffer = BytesIO(result)
     buffer.seek(0)
     serializer = PACKAGE_SERIALIZER(data=JSONParser().parse(buffer), many=True)
     assert serializer.is_valid(raise_exception=True) is True
+
+
+@pytest.mark.django_db
+def test_serialize_package_list_for_community_invalid_batch(
+    mocker, community_site: CommunitySite
+):
+    PackageListingFactory(community=community_site.community)
+    mocker.patch(
+        "thunderstore.repository.api.v1.viewsets.get_package_fragments",
+        return_value=[b'{"broken": '],
+    )
+    chunks = iterate_package_list_for_community(
+        community_site.community, incremental=True
+    )
+    with pytest.raises(json.JSONDecodeError):
+        b"".join(chunks)
+
+
+@pytest.mark.django_db
+def test_serialize_package_list_for_community_incremental(
+    mocker, community_site: CommunitySite
+):
+    community = community_site.community
+    for _ in range(5):
+        PackageListingFactory(community=community)
+    cache.clear()
+    expected = b"".join(iterate_package_list_for_community(community))
+    assert b"".join(
+        iterate_package_list_for_community(community, incremental=True)
+    ) == (expected)
+
+    version = PackageVersion.objects.first()
+    PackageVersion.objects.filter(pk=version.pk).update(downloads=F("downloads") + 1)
+    render = mocker.patch(
+        "thunderstore.repository.api.v1.viewsets.render_package_fragments",
+        wraps=render_package_fragments,
+    )
+    result = b"".join(iterate_package_list_for_community(community, incremental=True))
+    mocker.stopall()
+    # Only the listing with changed download counts is serialized again
+    render.assert_called_once()
+    assert len(render.call_args[0][1]) == 1
+    assert result == b"".join(iterate_package_list_for_community(community))
+    assert result != expected
+
+
+@pytest.mark.django_db
+def test_package_list_watermark_tracks_replaced_ratings(
+    community_site: CommunitySite,
+):
+    community = community_site.community
+    listing = PackageListingFactory(community=community)
+    rating = PackageRatingFactory(package=listing.package)
+    watermark = get_package_list_watermark(community)
+    assert get_package_list_watermark(community) == watermark
+
+    # The rating count stays the same
+    rating.delete()
+    PackageRatingFactory(package=listing.package)
+    assert get_package_list_watermark(community) != watermark
+
+
+@pytest.mark.django_db
+def test_package_list_watermark_tracks_package_changes(
+    community_site: CommunitySite,
+):
+    community = community_site.community
+    listing = PackageListingFactory(community=community)
+    watermark = get_package_list_watermark(community)
+
+    # Changes of packages not listed in the community are ignored
+    PackageListingFactory().package.deprecate()
+    assert get_package_list_watermark(community) == watermark
+
+    # Deprecation doesn't update any of the tracked timestamps
+    listing.package.deprecate()
+    assert get_package_list_watermark(community) != watermark
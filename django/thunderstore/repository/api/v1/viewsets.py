@@ -1,29 +1,48 @@
 import json
-from io import BytesIO
-from typing import Any, Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Q, QuerySet, Subquery, Sum
 from django.http import HttpResponse
-from django.utils.cache import get_conditional_response
-from django.utils.http import http_date
+from django.utils import timezone as django_timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_http_date_safe
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import viewsets
 from rest_framework.authentication import BasicAuthentication, SessionAuthentication
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
+from thunderstore.cache.cache import get_cache_key
+from thunderstore.cache.encoding import CONTENT_ENCODINGS
+from thunderstore.cache.enums import CacheBustCondition
+from thunderstore.cache.streaming import get_encoded_file_response
 from thunderstore.community.models import Community, PackageListing
 from thunderstore.core.types import HttpRequestType
+from thunderstore.repository.api.v1.fast_serializer import serialize_package_listings
 from thunderstore.repository.api.v1.serializers import PackageListingSerializer
 from thunderstore.repository.cache import (
+    get_index_watermark,
     get_package_listing_queryset,
-    order_package_listing_queryset,
 )
 from thunderstore.repository.mixins import CommunityMixin
-from thunderstore.repository.models import Package, PackageRating
-from thunderstore.repository.models.cache import APIV1PackageCache
+from thunderstore.repository.models import (
+    PACKAGE_CHANGE_COMMIT_MARGIN,
+    Package,
+    PackageChange,
+    PackageRating,
+    PackageVersion,
+)
+from thunderstore.repository.models.cache import (
+    APIV1PackageCache,
+    APIV1PackageIndexManifest,
+)
 from thunderstore.repository.permissions import ensure_can_rate_package
 from thunderstore.utils.batch import batch
 
@@ -31,43 +50,291 @@ PACKAGE_SERIALIZER = PackageListingSerializer
 SERIALIZER_BATCH_SIZE = 200
 
 
-def serialize_package_list_for_community(community: Community) -> bytes:
+PACKAGE_FRAGMENT_CACHE_TYPE = "api.v1.package_listing"
+
+
+def package_aggregate_subquery(queryset: QuerySet, aggregate) -> Subquery:
+    return Subquery(
+        queryset.filter(package=OuterRef("package_id"))
+        .order_by()
+        .values("package")
+        .annotate(value=aggregate)
+        .values("value")
+    )
+
+
+def get_package_fragment_keys(community: Community, ids: List[int]) -> Dict[int, str]:
+    """
+    Build the fragment cache keys of the given package listings. The keys vary
+    on watermarks of the data included in the serialized listing, so any
+    change to those results in a different key.
+    """
+    versions = PackageVersion.objects.all()
+    watermarks = (
+        PackageListing.objects.filter(id__in=ids)
+        .annotate(
+            downloads_watermark=package_aggregate_subquery(versions, Sum("downloads")),
+            versions_watermark=package_aggregate_subquery(
+                versions, Count("id", filter=Q(is_active=True))
+            ),
+            rating_watermark=package_aggregate_subquery(
+                PackageRating.objects.all(), Count("id")
+            ),
+        )
+        .values_list(
+            "id",
+            "datetime_updated",
+            "has_nsfw_content",
+            "package__date_updated",
+            "package__latest_id",
+            "package__is_pinned",
+            "package__is_deprecated",
+            "downloads_watermark",
+            "versions_watermark",
+            "rating_watermark",
+        )
+    )
+    return {
+        row[0]: get_cache_key(
+            cache_bust_condition=CacheBustCondition.background_update_only,
+            cache_type=PACKAGE_FRAGMENT_CACHE_TYPE,
+            key=row[0],
+            vary_on=(community.pk, *row[1:]),
+        )
+        for row in watermarks
+    }
+
+
+def render_package_fragments(community: Community, ids: List[int]) -> Dict[int, bytes]:
+    renderer = JSONRenderer()
+    return {
+        listing_id: renderer.render(data)
+        for listing_id, data in serialize_package_listings(community, ids).items()
+    }
+
+
+def get_package_fragments(community: Community, ids: List[int]) -> List[bytes]:
+    """
+    Get the serialized JSON of the given package listings in the given order,
+    only serializing the listings which have changed since they were cached.
+    Listings which no longer exist are omitted.
+    """
+    keys = get_package_fragment_keys(community, ids)
+    fragments = cache.get_many(keys.values())
+    missing = [x for x in keys if keys[x] not in fragments]
+    if missing:
+        rendered = {
+            keys[listing_id]: fragment
+            for listing_id, fragment in render_package_fragments(
+                community, missing
+            ).items()
+        }
+        cache.set_many(rendered, timeout=settings.API_V1_INDEX_FRAGMENT_TIMEOUT)
+        fragments.update(rendered)
+    return [fragments[keys[x]] for x in ids if keys.get(x) in fragments]
+
+
+def get_package_list_watermark(community: Community) -> str:
+    """
+    Cheaply fingerprint the data the package list of a community is built
+    from. Changes to packages and listings are tracked through their
+    timestamps and the latest package change recorded for them, while
+    downloads and ratings are tracked through totals.
+    Row counts alone can stay the same when rows are both added and removed,
+    so the highest IDs are included as well, as new rows always get new IDs.
+    """
+    listings = get_package_listing_queryset(
+        community_identifier=community.identifier
+    ).order_by()
+    package_ids = listings.values("package_id")
+    return get_index_watermark(
+        listings.aggregate(
+            count=Count("id"),
+            ids=Sum("id"),
+            max_id=Max("id"),
+            listings_updated=Max("datetime_updated"),
+            packages_updated=Max("package__date_updated"),
+        ),
+        PackageVersion.objects.filter(package_id__in=package_ids).aggregate(
+            count=Count("id", filter=Q(is_active=True)),
+            ids=Sum("id", filter=Q(is_active=True)),
+            max_id=Max("id"),
+            downloads=Sum("downloads"),
+        ),
+        PackageRating.objects.filter(package_id__in=package_ids).aggregate(
+            count=Count("id"),
+            ids=Sum("id"),
+            max_id=Max("id"),
+        ),
+        PackageChange.objects.filter(
+            Q(community=community)
+            | Q(community=None, package_uuid4__in=listings.values("package__uuid4"))
+        ).aggregate(latest=Max("id")),
+    )
+
+
+def iterate_package_list_for_community(
+    community: Community,
+    incremental: bool = False,
+) -> Iterator[bytes]:
+    """
+    Serialize the package list of a community as JSON chunks, one batch of
+    listings at a time.
+
+    :param incremental: Reuse the cached JSON of listings which haven't
+        changed since the previous build
+    """
     listing_ids = get_package_listing_queryset(
         community_identifier=community.identifier
     ).values_list("id", flat=True)
+    return iterate_package_list(community, listing_ids, incremental)
+
+
+def iterate_package_list(
+    community: Community,
+    listing_ids: Iterable[int],
+    incremental: bool = False,
+) -> Iterator[bytes]:
+    """
+    Serialize the given package listings of a community as a JSON array in
+    chunks, one batch of listings at a time.
+
+    :param incremental: Reuse the cached JSON of listings which haven't
+        changed since the previous build
+    """
     batch_size = SERIALIZER_BATCH_SIZE
     renderer = JSONRenderer()
-    result = BytesIO()
 
-    result.write(b"[")
-    for index, ids in enumerate(batch(batch_size, listing_ids)):
-        queryset = order_package_listing_queryset(
-            PackageListing.objects.filter(id__in=ids)
-        )
-        serializer = PACKAGE_SERIALIZER(
-            queryset,
-            many=True,
-            context={
-                "community": community,
-            },
-        )
+    yield b"["
+    is_empty = True
+    for ids in batch(batch_size, listing_ids):
+        if incremental:
+            content = b",".join(get_package_fragments(community, ids))
+        else:
+            listings = list(serialize_package_listings(community, ids).values())
+            # Skip the first and last byte as those are [ and ]
+            content = renderer.render(listings)[1:-1]
+
+        # A batch might be empty if its listings were removed during the build
+        if not content:
+            continue
+
+        # Include a sanity check since we're manually piecing together json
+        # which could lead to format bugs. Better to fail entirely than return
+        # broken json as it would be bad to overwrite the cached working
+        # version with a broken one. The whole document can't be checked at
+        # once as it's never held in memory in full.
+        json.loads(b"[" + content + b"]")
+
+        if not is_empty:
+            yield b","
+        yield content
+        is_empty = False
+
+    yield b"]"
+
 
-        if index != 0:
-            result.write(b",")
+def parse_package_changes_since(value: str) -> Optional[datetime]:
+    """
+    Parse the point in time package list changes are requested since, given
+    either as an ISO 8601 timestamp or an HTTP date.
+    """
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        since = None
+    if since is not None:
+        if django_timezone.is_naive(since):
+            since = django_timezone.make_aware(since, timezone.utc)
+        return since
+    timestamp = parse_http_date_safe(value)
+    if timestamp is not None:
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return None
 
-        # Skip the first and last byte as those are [ and ]
-        result.write(renderer.render(serializer.data)[1:-1])
 
-    result.write(b"]")
+def get_package_list_etag_timestamp(
+    community: Community, etag: str
+) -> Optional[datetime]:
+    """
+    Find when the package list of a community with the given ETag was built.
+    Only package lists which are still stored can be found.
+    """
+    checksum = etag.strip()
+    if checksum.startswith("W/"):
+        checksum = checksum[2:]
+    checksum = checksum.strip('"')
+    checksum = checksum.split("-", 1)[0]
+    if not checksum:
+        return None
+    query = Q(checksum_sha256=checksum)
+    for encoding in CONTENT_ENCODINGS:
+        query |= Q(**{f"encoded_variants__{encoding}__checksum_sha256": checksum})
+    cache = (
+        APIV1PackageCache.objects.filter(community=community)
+        .filter(query)
+        .order_by("last_modified")
+        .first()
+    )
+    if cache is None:
+        return None
+    # Changes committed late may not have been included in the package list
+    return cache.last_modified - PACKAGE_CHANGE_COMMIT_MARGIN
 
-    # Include a sanity check since we're manually piecing together json which
-    # could lead to format bugs. Better to fail entirely than return broken json
-    # as it would be bad to overwrite the cached working version with a broken
-    # one.
-    result.seek(0)
-    json.load(result)
 
-    return result.getvalue()
+def get_package_list_changes(community: Community, since: datetime) -> Dict[str, Any]:
+    """
+    Get the listings of a community's package list which have been added or
+    updated since the given point in time, and the packages which have been
+    removed from it. Changes older than the change retention period aren't
+    known, in which case a full refresh of the package list is required.
+    Changes to download counts alone aren't included.
+    """
+    timestamp = django_timezone.now() - PACKAGE_CHANGE_COMMIT_MARGIN
+    if since < PackageChange.get_retention_cutoff():
+        return {
+            "timestamp": timestamp.isoformat(),
+            "full_refresh_required": True,
+            "updated": [],
+            "removed": [],
+        }
+
+    changes = (
+        PackageChange.objects.filter(datetime_created__gte=since)
+        .filter(Q(community=None) | Q(community=community))
+        .order_by("datetime_created")
+    )
+    # Later changes overwrite earlier ones, leaving the latest names
+    names = dict(changes.values_list("package_uuid4", "package_full_name"))
+    listed = dict(
+        get_package_listing_queryset(community_identifier=community.identifier)
+        .filter(package__uuid4__in=names)
+        .order_by()
+        .values_list("package__uuid4", "id")
+    )
+    # Packages which have only changed for other communities aren't removed
+    # from this community's package list unless they've been listed in it
+    unlisted = set(names) - set(listed)
+    removed = set(
+        changes.filter(package_uuid4__in=unlisted, community=community).values_list(
+            "package_uuid4", flat=True
+        )
+    ) | set(
+        PackageListing.objects.filter(
+            community=community, package__uuid4__in=unlisted
+        ).values_list("package__uuid4", flat=True)
+    )
+    return {
+        "timestamp": timestamp.isoformat(),
+        "full_refresh_required": False,
+        "updated": list(
+            serialize_package_listings(community, list(listed.values())).values()
+        ),
+        "removed": [
+            {"uuid4": str(uuid4), "full_name": names[uuid4]}
+            for uuid4 in sorted(removed, key=lambda x: names[x])
+        ],
+    }
 
 
 class PackageViewSet(
@@ -99,22 +366,62 @@ class PackageViewSet(
         )
         if not cache or not cache.data:
             return self.get_no_cache_response()
-        last_modified = int(cache.last_modified.timestamp())
-
-        # TODO: Add ETag support if useful
-        # Check if we can return a 304 response, otherwise return full content
-        response = get_conditional_response(request, last_modified=last_modified)
-        if response is None:
-            # TODO: Stream directly from the S3 backend instead of buffering
-            # TODO: Should we support decompressing for non-gzip capable clients?
-            response = HttpResponse(
-                content=cache.data,
-                content_type=cache.content_type,
-            )
-            response["Last-Modified"] = http_date(last_modified)
-            response["Content-Encoding"] = cache.content_encoding
+        return get_encoded_file_response(
+            request,
+            files={x: cache.get_encoded_file(x) for x in cache.content_encodings},
+            content_type=cache.content_type,
+            last_modified=int(cache.last_modified.timestamp()),
+        )
+
+    @swagger_auto_schema(tags=["v1"])
+    @action(detail=False, methods=["get"])
+    def shards(self, request: HttpRequestType, *args: Any, **kwargs: Any):
+        """
+        Get the manifest of the package list split into shards, listing the
+        URL and checksum of each shard. The listings are split into shards
+        by when they were created rather than in the package list order.
+        """
+        manifest = APIV1PackageIndexManifest.get_latest_for_community(
+            community_identifier=self.community_identifier
+        )
+        if not manifest or not manifest.data:
+            return self.get_no_cache_response()
+        return get_encoded_file_response(
+            request,
+            files={x: manifest.get_encoded_file(x) for x in manifest.content_encodings},
+            content_type=manifest.content_type,
+            last_modified=int(manifest.last_modified.timestamp()),
+        )
 
-        return response
+    @swagger_auto_schema(tags=["v1"])
+    @action(detail=False, methods=["get"])
+    def changes(
+        self,
+        request: HttpRequestType,
+        community_identifier: Optional[str] = None,
+    ) -> Response:
+        """
+        Get the changes to the package list since a point in time, given as
+        the `since` query parameter, or since the package list with the ETag
+        given as the `etag` query parameter was built. The `timestamp` of the
+        response can be used as `since` for the next request.
+        """
+        since = None
+        if "since" in request.query_params:
+            since = parse_package_changes_since(request.query_params["since"])
+            if since is None:
+                raise ValidationError({"since": ["Invalid timestamp"]})
+        elif "etag" in request.query_params:
+            since = get_package_list_etag_timestamp(
+                self.community, request.query_params["etag"]
+            )
+            if since is None:
+                # The package list is no longer known, so neither is what
+                # has changed since it
+                since = datetime.min.replace(tzinfo=timezone.utc)
+        else:
+            raise ValidationError({"since": ["Either since or etag is required"]})
+        return Response(get_package_list_changes(self.community, since))
 
     @swagger_auto_schema(deprecated=True, tags=["v1"])
     def retrieve(self, *args: Any, **kwargs: Any) -> Response:
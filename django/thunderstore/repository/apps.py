@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RepositoryAppConfig(AppConfig):
     name = "thunderstore.repository"
     label = "repository"
+
+    def ready(self):
+        # Connects the cache warming signal receivers
+        from thunderstore.repository import cache_warming  # noqa: F401
@@ -1,3 +1,8 @@
+import hashlib
+import time
+from typing import Any
+
+from django.conf import settings
 from django.db.models import QuerySet
 
 from thunderstore.community.models import PackageListing, Q
@@ -34,3 +39,15 @@ def get_package_listing_queryset(community_identifier: str) -> QuerySet[PackageL
             .exclude(~Q(community__identifier=community_identifier)),
         ),
     )
+
+
+def get_index_watermark(*values: Any) -> str:
+    """
+    Build a change watermark for a package index from values which change
+    whenever the index content does. The watermark also changes once per
+    rebuild interval, which bounds how long changes the values don't cover
+    can go unnoticed.
+    """
+    interval = max(settings.API_INDEX_REBUILD_INTERVAL, 1)
+    rebuild_generation = int(time.time() // interval)
+    return hashlib.sha256(repr((rebuild_generation, *values)).encode()).hexdigest()
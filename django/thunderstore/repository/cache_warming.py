@@ -0,0 +1,123 @@
+from typing import Callable, Dict, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.dispatch import receiver
+from django.http import HttpRequest, QueryDict
+from rest_framework.exceptions import ParseError
+
+from thunderstore.cache.enums import (
+    CacheBustCondition,
+    community_packages_updated,
+    split_cache_bust_condition,
+)
+from thunderstore.cache.metrics import pop_cache_traffic
+from thunderstore.cache.signals import cache_invalidated
+from thunderstore.community.models import Community
+from thunderstore.frontend.api.experimental.serializers.views import (
+    PackageSearchQueryParameterSerializer,
+)
+from thunderstore.frontend.api.experimental.views.community_package_list import (
+    CYBERSTORM_PACKAGE_LIST_TARGET,
+    ORDERING_FIELDS,
+    CommunityPackageListApiView,
+)
+from thunderstore.repository.views.repository import (
+    PACKAGE_LIST_TARGET,
+    PackageListView,
+)
+
+
+def get_warming_pending_key(community_id: int) -> str:
+    return f"cachewarm.pending.{community_id}"
+
+
+def warm_package_list(community: Community, ordering: str, page_count: int) -> None:
+    request = HttpRequest()
+    request.GET = QueryDict(mutable=True)
+    request.GET["ordering"] = ordering
+    view = PackageListView()
+    view.setup(request, community_identifier=community.identifier)
+    paginator = view.get_paginator(view.get_queryset(), view.paginate_by)
+    for number in range(1, page_count + 1):
+        try:
+            paginator.page(number)
+        except EmptyPage:
+            break
+
+
+def warm_cyberstorm_package_list(
+    community: Community, ordering: str, page_count: int
+) -> None:
+    view = CommunityPackageListApiView()
+    view.kwargs = {"community_identifier": community.identifier}
+    for number in range(1, page_count + 1):
+        params = PackageSearchQueryParameterSerializer(
+            data={"ordering": ordering, "page": number}
+        )
+        params.is_valid(raise_exception=True)
+        try:
+            view.get_page(community, params.validated_data)
+        except ParseError:
+            # Past the last page
+            break
+
+
+WARMERS: Dict[str, Callable[[Community, str, int], None]] = {
+    PACKAGE_LIST_TARGET: warm_package_list,
+    CYBERSTORM_PACKAGE_LIST_TARGET: warm_cyberstorm_package_list,
+}
+
+
+def get_warming_targets() -> List[Tuple[str, str]]:
+    """
+    :return: The (target, ordering) pairs which are warmed for each community
+    """
+    package_list_orderings = [x[0] for x in PackageListView().get_ordering_choices()]
+    return [(PACKAGE_LIST_TARGET, x) for x in package_list_orderings] + [
+        (CYBERSTORM_PACKAGE_LIST_TARGET, x) for x in ORDERING_FIELDS
+    ]
+
+
+def warm_community_package_lists(community_id: int) -> None:
+    """
+    Regenerate the first pages of a community's unfiltered package lists,
+    starting from the orderings which saw the most traffic before the caches
+    were invalidated.
+    """
+    cache.delete(get_warming_pending_key(community_id))
+    community = Community.objects.filter(pk=community_id).first()
+    if community is None:
+        return
+
+    traffic = pop_cache_traffic(community_packages_updated(community_id))
+    targets = sorted(
+        get_warming_targets(),
+        key=lambda x: traffic.get(f"{x[0]}.{x[1]}", 0),
+        reverse=True,
+    )
+    for target, ordering in targets:
+        WARMERS[target](community, ordering, settings.CACHE_WARMING_PAGE_COUNT)
+
+
+@receiver(cache_invalidated)
+def schedule_community_package_list_warming(
+    cache_bust_condition: str, **kwargs
+) -> None:
+    from thunderstore.repository.tasks import warm_community_package_list_caches
+
+    if not settings.CACHE_WARMING_ENABLED:
+        return
+    base, parameter = split_cache_bust_condition(cache_bust_condition)
+    if base != CacheBustCondition.community_packages_updated:
+        return
+
+    # Invalidations arrive in bursts when many listings are updated at once,
+    # so only a single warming is scheduled for each burst
+    community_id = int(parameter)
+    delay = settings.CACHE_WARMING_DELAY
+    if cache.add(get_warming_pending_key(community_id), True, timeout=delay + 60):
+        warm_community_package_list_caches.apply_async(
+            args=(community_id,), countdown=delay
+        )
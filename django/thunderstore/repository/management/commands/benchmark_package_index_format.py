@@ -0,0 +1,66 @@
+import gzip
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from django.core.management.base import BaseCommand
+
+from thunderstore.repository.api.experimental.views.package_index import (
+    iterate_package_index,
+    iterate_package_index_entries,
+)
+from thunderstore.repository.package_index_binary import (
+    decode_package_index,
+    encode_package_index,
+)
+
+
+def decode_json_index(data: bytes) -> List[Dict[str, Any]]:
+    return [json.loads(x) for x in data.splitlines()]
+
+
+def decode_binary_index(data: bytes) -> List[Dict[str, Any]]:
+    return list(decode_package_index(data))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the sizes and parse times of the newline delimited JSON and "
+        "binary experimental package indexes, built from the package versions "
+        "in the database."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def measure(
+        self,
+        name: str,
+        data: bytes,
+        decode: Callable[[bytes], List[Dict[str, Any]]],
+        repeat: int,
+    ) -> List[Dict[str, Any]]:
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = decode(data)
+            durations.append(time.perf_counter() - start)
+        compressed = len(gzip.compress(data))
+        self.stdout.write(
+            f"{name}: {len(data)} bytes, {compressed} bytes gzipped, "
+            f"parsed in {min(durations):.3f} s (best of {repeat})"
+        )
+        return result
+
+    def handle(self, *args, **kwargs) -> None:
+        repeat = kwargs["repeat"]
+        json_index = b"".join(iterate_package_index())
+        binary_index = b"".join(encode_package_index(iterate_package_index_entries()))
+
+        json_entries = self.measure("JSON", json_index, decode_json_index, repeat)
+        binary_entries = self.measure(
+            "Binary", binary_index, decode_binary_index, repeat
+        )
+        if json_entries != binary_entries:
+            self.stderr.write("The decoded indexes differ")
+        self.stdout.write(f"{len(json_entries)} entries")
@@ -0,0 +1,107 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from thunderstore.community.models import Community, PackageListing
+from thunderstore.repository.api.v1.fast_serializer import serialize_package_listings
+from thunderstore.repository.api.v1.viewsets import (
+    PACKAGE_SERIALIZER,
+    SERIALIZER_BATCH_SIZE,
+)
+from thunderstore.repository.cache import (
+    order_package_listing_queryset,
+    prefetch_package_listing_queryset,
+)
+from thunderstore.repository.models import Namespace, Package, PackageVersion, Team
+from thunderstore.utils.batch import batch
+
+BULK_CREATE_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares PackageListingSerializer with the values() based serializer "
+        "used for building the v1 package list. The data is created in a "
+        "transaction which is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument("--listing-count", type=int, default=50000)
+        parser.add_argument("--versions-per-package", type=int, default=3)
+
+    def populate(self, listing_count: int, versions_per_package: int) -> Community:
+        prefix = f"Benchmark_{uuid.uuid4().hex[:8]}"
+        community = Community.objects.create(name=prefix, identifier=prefix)
+        team = Team.objects.create(name=prefix, donation_link="https://example.org")
+        namespace = Namespace.objects.create(name=prefix, team=team)
+        packages = Package.objects.bulk_create(
+            (
+                Package(owner=team, namespace=namespace, name=f"Package_{index}")
+                for index in range(listing_count)
+            ),
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
+        PackageVersion.objects.bulk_create(
+            (
+                PackageVersion(
+                    package=package,
+                    name=package.name,
+                    version_number=f"1.{minor}.0",
+                    description="Benchmark package",
+                    readme="",
+                    file=f"benchmark/{package.name}-{minor}.zip",
+                    file_size=1024,
+                    icon=f"benchmark/{package.name}-{minor}.png",
+                )
+                for package in packages
+                for minor in range(versions_per_package)
+            ),
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
+        PackageListing.objects.bulk_create(
+            (PackageListing(community=community, package=x) for x in packages),
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
+        return community
+
+    def serialize_legacy(self, community: Community, ids) -> bytes:
+        queryset = order_package_listing_queryset(
+            prefetch_package_listing_queryset(
+                PackageListing.objects.filter(id__in=ids)
+            ),
+        )
+        serializer = PACKAGE_SERIALIZER(
+            queryset, many=True, context={"community": community}
+        )
+        return JSONRenderer().render(serializer.data)
+
+    def serialize_fast(self, community: Community, ids) -> bytes:
+        listings = serialize_package_listings(community, ids)
+        return JSONRenderer().render(list(listings.values()))
+
+    def measure(self, name: str, community: Community, fn) -> None:
+        ids = order_package_listing_queryset(
+            PackageListing.objects.filter(community=community)
+        ).values_list("id", flat=True)
+        size = 0
+        start = time.perf_counter()
+        for chunk in batch(SERIALIZER_BATCH_SIZE, ids):
+            size += len(fn(community, chunk))
+        duration = time.perf_counter() - start
+        self.stdout.write(f"{name}: {duration:.2f} s ({size} bytes)")
+
+    def handle(self, *args, **kwargs) -> None:
+        if not settings.DEBUG:
+            raise CommandError("Only executable in debug environments")
+
+        listing_count = kwargs["listing_count"]
+        with transaction.atomic():
+            self.stdout.write(f"Populating {listing_count} package listings")
+            community = self.populate(listing_count, kwargs["versions_per_package"])
+            self.measure("PackageListingSerializer", community, self.serialize_legacy)
+            self.measure("serialize_package_listings", community, self.serialize_fast)
+            transaction.set_rollback(True)
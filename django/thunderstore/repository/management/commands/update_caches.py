@@ -6,7 +6,15 @@ from thunderstore.repository.api.v1.tasks import update_api_v1_caches
 class Command(BaseCommand):
     help = "Updates repository specific caches"
 
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=0,
+            help="Build community indexes in a pool of this many processes",
+        )
+
     def handle(self, *args, **kwargs):
         print("Updating caches")
-        update_api_v1_caches()
+        update_api_v1_caches(processes=kwargs["processes"])
         print("Caches updated!")
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.7 on 2026-10-18 19:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0046_add_submission_cleanup_schedule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="apiexperimentalpackageindexcache",
+            name="checksum_sha256",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="apiv1packagecache",
+            name="checksum_sha256",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.7 on 2026-10-18 19:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0047_add_cache_checksums"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="apiexperimentalpackageindexcache",
+            name="watermark",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="apiv1packagecache",
+            name="watermark",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
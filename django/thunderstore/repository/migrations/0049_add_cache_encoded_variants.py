@@ -0,0 +1,23 @@
+# Generated by Django 3.1.7 on 2026-10-18 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0048_add_cache_watermarks"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="apiexperimentalpackageindexcache",
+            name="encoded_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="apiv1packagecache",
+            name="encoded_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
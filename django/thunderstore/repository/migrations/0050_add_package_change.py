@@ -0,0 +1,45 @@
+# Generated by Django 3.1.7 on 2026-10-18 20:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0026_schedule_aggregated_fields_refresh"),
+        ("repository", "0049_add_cache_encoded_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PackageChange",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("package_uuid4", models.UUIDField()),
+                ("package_full_name", models.CharField(max_length=256)),
+                (
+                    "datetime_created",
+                    models.DateTimeField(auto_now_add=True, db_index=True),
+                ),
+                (
+                    "community",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="package_changes",
+                        to="community.community",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,141 @@
+# Generated by Django 3.1.7 on 2026-10-18 20:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+import thunderstore.core.mixins
+import thunderstore.utils.makemigrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0026_schedule_aggregated_fields_refresh"),
+        ("repository", "0050_add_package_change"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="APIV1PackageIndexShard",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_deleted", models.BooleanField(default=False)),
+                (
+                    "data",
+                    models.FileField(
+                        blank=True,
+                        null=True,
+                        storage=thunderstore.utils.makemigrations.StubStorage(),
+                        upload_to=thunderstore.core.mixins.get_package_cache_filepath,
+                    ),
+                ),
+                ("content_type", models.TextField()),
+                ("content_encoding", models.TextField()),
+                ("last_modified", models.DateTimeField()),
+                (
+                    "checksum_sha256",
+                    models.CharField(blank=True, editable=False, max_length=64),
+                ),
+                (
+                    "watermark",
+                    models.CharField(blank=True, editable=False, max_length=64),
+                ),
+                (
+                    "encoded_variants",
+                    models.JSONField(blank=True, default=dict, editable=False),
+                ),
+                (
+                    "community",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="package_list_shards",
+                        to="community.community",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="APIV1PackageIndexManifest",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_deleted", models.BooleanField(default=False)),
+                (
+                    "data",
+                    models.FileField(
+                        blank=True,
+                        null=True,
+                        storage=thunderstore.utils.makemigrations.StubStorage(),
+                        upload_to=thunderstore.core.mixins.get_package_cache_filepath,
+                    ),
+                ),
+                ("content_type", models.TextField()),
+                ("content_encoding", models.TextField()),
+                ("last_modified", models.DateTimeField()),
+                (
+                    "checksum_sha256",
+                    models.CharField(blank=True, editable=False, max_length=64),
+                ),
+                (
+                    "watermark",
+                    models.CharField(blank=True, editable=False, max_length=64),
+                ),
+                (
+                    "encoded_variants",
+                    models.JSONField(blank=True, default=dict, editable=False),
+                ),
+                (
+                    "community",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="package_list_manifests",
+                        to="community.community",
+                    ),
+                ),
+                (
+                    "shards",
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name="manifests",
+                        to="repository.APIV1PackageIndexShard",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name="apiv1packageindexshard",
+            index=models.Index(
+                fields=["last_modified"], name="repository__last_mo_3643f8_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="apiv1packageindexmanifest",
+            index=models.Index(
+                fields=["last_modified"], name="repository__last_mo_b50d74_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,130 @@
+# Generated by Django 3.1.7 on 2026-10-18 21:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+import thunderstore.core.mixins
+import thunderstore.utils.makemigrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("repository", "0051_add_api_v1_package_index_shards"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="APIExperimentalPackageIndexSegment",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_deleted", models.BooleanField(default=False)),
+                (
+                    "data",
+                    models.FileField(
+                        blank=True,
+                        null=True,
+                        storage=thunderstore.utils.makemigrations.StubStorage(),
+                        upload_to=thunderstore.core.mixins.get_package_cache_filepath,
+                    ),
+                ),
+                ("content_type", models.TextField()),
+                ("content_encoding", models.TextField()),
+                ("last_modified", models.DateTimeField()),
+                (
+                    "checksum_sha256",
+                    models.CharField(blank=True, editable=False, max_length=64),
+                ),
+                (
+                    "watermark",
+                    models.CharField(blank=True, editable=False, max_length=64),
+                ),
+                (
+                    "encoded_variants",
+                    models.JSONField(blank=True, default=dict, editable=False),
+                ),
+                (
+                    "base",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="deltas",
+                        to="repository.apiexperimentalpackageindexsegment",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="APIExperimentalPackageIndexManifest",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_deleted", models.BooleanField(default=False)),
+                (
+                    "data",
+                    models.FileField(
+                        blank=True,
+                        null=True,
+                        storage=thunderstore.utils.makemigrations.StubStorage(),
+                        upload_to=thunderstore.core.mixins.get_package_cache_filepath,
+                    ),
+                ),
+                ("content_type", models.TextField()),
+                ("content_encoding", models.TextField()),
+                ("last_modified", models.DateTimeField()),
+                (
+                    "checksum_sha256",
+                    models.CharField(blank=True, editable=False, max_length=64),
+                ),
+                (
+                    "watermark",
+                    models.CharField(blank=True, editable=False, max_length=64),
+                ),
+                (
+                    "encoded_variants",
+                    models.JSONField(blank=True, default=dict, editable=False),
+                ),
+                (
+                    "base",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="manifests",
+                        to="repository.apiexperimentalpackageindexsegment",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name="apiexperimentalpackageindexsegment",
+            index=models.Index(
+                fields=["last_modified"], name="repository__last_mo_17f730_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="apiexperimentalpackageindexmanifest",
+            index=models.Index(
+                fields=["last_modified"], name="repository__last_mo_5c9c64_idx"
+            ),
+        ),
+    ]
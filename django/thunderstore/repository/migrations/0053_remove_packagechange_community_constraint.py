@@ -0,0 +1,27 @@
+# Generated by Django 3.1.7 on 2026-10-18 21:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0026_schedule_aggregated_fields_refresh"),
+        ("repository", "0052_add_api_experimental_package_index_segments"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="packagechange",
+            name="community",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="package_changes",
+                to="community.community",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.1.7 on 2026-10-18 21:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("community", "0026_schedule_aggregated_fields_refresh"),
+        ("repository", "0053_remove_packagechange_community_constraint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="apiexperimentalpackageindexcache",
+            name="community",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="package_index_cache",
+                to="community.community",
+            ),
+        ),
+        migrations.AddField(
+            model_name="apiexperimentalpackageindexcache",
+            name="is_community_index",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -2,6 +2,7 @@ from .cache import *
 from .discord_bot import *
 from .namespace import *
 from .package import *
+from .package_change import *
 from .package_download import *
 from .package_rating import *
 from .package_version import *
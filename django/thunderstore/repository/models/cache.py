@@ -1,56 +1,296 @@
-import gzip
-import io
-from datetime import timedelta
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
-from django.core.files.base import ContentFile
 from django.db import models
+from django.db.models.fields.files import FieldFile
 from django.utils import timezone
 
+from thunderstore.cache.encoding import CONTENT_ENCODINGS, get_index_content_encodings
+from thunderstore.cache.storage import SavedStream
 from thunderstore.community.models import Community
 from thunderstore.core.mixins import S3FileMixin
 
 
-class APIExperimentalPackageIndexCache(S3FileMixin):
-    @classmethod
-    def get_latest(cls) -> Optional["APIExperimentalPackageIndexCache"]:
-        return cls.objects.active().order_by("-last_modified").first()
+class PackageIndexCacheMixin(S3FileMixin):
+    # Checksum of the stored (compressed) file
+    checksum_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    # Fingerprint of the data the file was built from, which allows skipping
+    # the build if nothing has changed
+    watermark = models.CharField(max_length=64, blank=True, editable=False)
+    # The file names and checksums of the content in other encodings than the
+    # data field's, by encoding
+    encoded_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    @property
+    def content_encodings(self) -> List[str]:
+        """
+        The encodings the content is available in, in order of preference.
+        """
+        return [
+            x
+            for x in CONTENT_ENCODINGS
+            if x == self.content_encoding or x in self.encoded_variants
+        ]
+
+    def get_encoded_file(self, encoding: str) -> Tuple[FieldFile, str]:
+        """
+        Get the file of the content in the given encoding.
+
+        :return: The file and its checksum
+        """
+        if encoding == self.content_encoding:
+            return self.data, self.checksum_sha256
+        variant = self.encoded_variants[encoding]
+        file = FieldFile(self, self._meta.get_field("data"), variant["name"])
+        return file, variant["checksum_sha256"]
+
+    def on_safe_delete(self):
+        super().on_safe_delete()
+        storage = self._meta.get_field("data").storage
+        for variant in self.encoded_variants.values():
+            storage.delete(variant["name"])
 
     @classmethod
-    def update(cls, content: bytes) -> "APIExperimentalPackageIndexCache":
-        gzipped = io.BytesIO()
-        with gzip.GzipFile(fileobj=gzipped, mode="wb") as f:
-            f.write(content)
+    def create_from_content(
+        cls,
+        filename: str,
+        content: Union[bytes, Iterable[bytes]],
+        previous: Optional["PackageIndexCacheMixin"] = None,
+        watermark: str = "",
+        content_type: str = "application/json",
+        **kwargs,
+    ):
+        """
+        Upload the content in each of the index content encodings and create
+        an entry for it. If the content is identical to the previous entry's,
+        the previous entry is kept instead so that clients don't have to
+        download it again.
+
+        :param filename: The file name, which is suffixed by the encoding
+        """
         timestamp = timezone.now()
-        file = ContentFile(
-            # TODO: This is immediately passed to BytesIO again, meaning
-            #       we're just wasting memory. Find a way to pass this to
-            #       the Django model without the inefficiency.
-            gzipped.getvalue(),
-            name=f"full-index-{timestamp.isoformat()}.json.gz",
+        saved = cls.save_compressed_data(
+            filename, content, get_index_content_encodings()
         )
+        return cls.create_from_saved(
+            saved,
+            timestamp,
+            previous=previous,
+            watermark=watermark,
+            content_type=content_type,
+            **kwargs,
+        )
+
+    @classmethod
+    def create_from_saved(
+        cls,
+        saved: Dict[str, SavedStream],
+        timestamp: datetime,
+        previous: Optional["PackageIndexCacheMixin"] = None,
+        watermark: str = "",
+        content_type: str = "application/json",
+        **kwargs,
+    ):
+        """
+        Create an entry for content already saved in each of the index content
+        encodings, see create_from_content.
+
+        :param timestamp: When building the content was started
+        """
+        saved = dict(saved)
+        primary = saved.pop("gzip")
+        variants = {
+            encoding: {"name": x.name, "checksum_sha256": x.checksum_sha256}
+            for encoding, x in saved.items()
+        }
+        if (
+            previous is not None
+            and previous.checksum_sha256 == primary.checksum_sha256
+            and set(previous.encoded_variants) == set(variants)
+        ):
+            storage = cls._meta.get_field("data").storage
+            for name in (primary.name, *(x["name"] for x in variants.values())):
+                storage.delete(name)
+            previous.watermark = watermark
+            previous.save(update_fields=("watermark",))
+            return previous
         return cls.objects.create(
-            data=file,
-            content_type="application/json",
+            data=primary.name,
+            checksum_sha256=primary.checksum_sha256,
+            encoded_variants=variants,
+            watermark=watermark,
+            content_type=content_type,
             content_encoding="gzip",
             last_modified=timestamp,
+            **kwargs,
+        )
+
+    class Meta(S3FileMixin.Meta):
+        abstract = True
+
+
+class APIExperimentalPackageIndexCache(PackageIndexCacheMixin):
+    # The community the index is limited to. Community indexes are flagged
+    # separately so that those of deleted communities aren't mistaken for the
+    # global index.
+    community = models.ForeignKey(
+        "community.Community",
+        related_name="package_index_cache",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
+    is_community_index = models.BooleanField(default=False)
+
+    @classmethod
+    def get_latest(
+        cls,
+        community: Optional[Community] = None,
+        content_type: str = "application/json",
+    ) -> Optional["APIExperimentalPackageIndexCache"]:
+        return (
+            cls.objects.active()
+            .filter(
+                community=community,
+                is_community_index=community is not None,
+                content_type=content_type,
+            )
+            .order_by("-last_modified")
+            .first()
         )
 
     @classmethod
-    def drop_stale_cache(cls):
-        latest = cls.get_latest()
+    def get_latest_community_indexes(
+        cls, content_type: str = "application/json"
+    ) -> Dict[int, "APIExperimentalPackageIndexCache"]:
+        """
+        Get the latest index of every community which has one, by community ID.
+        """
+        latest = (
+            cls.objects.active()
+            .filter(is_community_index=True, content_type=content_type)
+            .exclude(community=None)
+            .order_by("community_id", "-last_modified")
+            .distinct("community_id")
+        )
+        return {x.community_id: x for x in latest}
+
+    @classmethod
+    def update(
+        cls,
+        content: Union[bytes, Iterable[bytes]],
+        previous: Optional["APIExperimentalPackageIndexCache"] = None,
+        watermark: str = "",
+    ) -> "APIExperimentalPackageIndexCache":
+        return cls.create_from_content(
+            f"full-index-{timezone.now().isoformat()}.json",
+            content,
+            previous=previous,
+            watermark=watermark,
+        )
+
+    @classmethod
+    def drop_stale_cache(
+        cls,
+        community: Optional[Community] = None,
+        content_type: str = "application/json",
+    ):
+        latest = cls.get_latest(community=community, content_type=content_type)
         if latest is None:
             return
         # We don't immediately delete the old files as doing so will also
         # remove them from the CDN, and there might still be active use
         # for them due to other levels of caching.
         cutoff = latest.last_modified - timedelta(hours=3)
+        stale = cls.objects.filter(
+            last_modified__lte=cutoff,
+            community=community,
+            is_community_index=community is not None,
+            content_type=content_type,
+        )
+        for entry in stale.iterator():
+            entry.delete()
+
+    @classmethod
+    def drop_orphaned_community_indexes(cls):
+        stale = cls.objects.filter(community=None, is_community_index=True)
+        for entry in stale.iterator():
+            entry.delete()
+
+
+class APIExperimentalPackageIndexSegment(PackageIndexCacheMixin):
+    """
+    A segment of the segmented experimental package index. Base segments list
+    every active package version, while each delta segment lists the current
+    versions of the packages changed since the previous segment of the same
+    base. Segments are never modified once created.
+    """
+
+    base = models.ForeignKey(
+        "self",
+        related_name="deltas",
+        on_delete=models.PROTECT,
+        blank=True,
+        null=True,
+    )
+
+    @property
+    def is_base(self) -> bool:
+        return self.base_id is None
+
+    @classmethod
+    def get_latest_base(cls) -> Optional["APIExperimentalPackageIndexSegment"]:
+        return cls.objects.active().filter(base=None).order_by("-last_modified").first()
+
+    def get_segments(self) -> List["APIExperimentalPackageIndexSegment"]:
+        """
+        Get this base segment and its delta segments in the order they're
+        applied in.
+        """
+        return [self, *self.deltas.active().order_by("last_modified")]
+
+    @classmethod
+    def drop_stale_cache(cls):
+        latest = cls.get_latest_base()
+        if latest is None:
+            return
+        # Files of bases still listed in a manifest might be in use
+        cutoff = latest.last_modified - timedelta(hours=3)
+        stale = cls.objects.filter(base=None, manifests=None, last_modified__lte=cutoff)
+        for base in stale.iterator():
+            for entry in base.deltas.all().iterator():
+                entry.delete()
+            base.delete()
+
+
+class APIExperimentalPackageIndexManifest(PackageIndexCacheMixin):
+    """
+    The manifest of the segmented experimental package index, listing the
+    URLs and checksums of its segments.
+    """
+
+    base = models.ForeignKey(
+        "repository.APIExperimentalPackageIndexSegment",
+        related_name="manifests",
+        on_delete=models.PROTECT,
+    )
+
+    @classmethod
+    def get_latest(cls) -> Optional["APIExperimentalPackageIndexManifest"]:
+        return cls.objects.active().order_by("-last_modified").first()
+
+    @classmethod
+    def drop_stale_cache(cls):
+        latest = cls.get_latest()
+        if latest is None:
+            return
+        cutoff = latest.last_modified - timedelta(hours=3)
         stale = cls.objects.filter(last_modified__lte=cutoff)
         for entry in stale.iterator():
             entry.delete()
 
 
-class APIV1PackageCache(S3FileMixin):
+class APIV1PackageCache(PackageIndexCacheMixin):
     community = models.ForeignKey(
         "community.Community",
         related_name="package_list_cache",
@@ -76,25 +316,90 @@ class APIV1PackageCache(S3FileMixin):
 
     @classmethod
     def update_for_community(
-        cls, community: Community, content: bytes
+        cls,
+        community: Community,
+        content: Union[bytes, Iterable[bytes]],
+        previous: Optional["APIV1PackageCache"] = None,
+        watermark: str = "",
     ) -> "APIV1PackageCache":
-        gzipped = io.BytesIO()
-        with gzip.GzipFile(fileobj=gzipped, mode="wb") as f:
-            f.write(content)
-        timestamp = timezone.now()
-        file = ContentFile(
-            # TODO: This is immediately passed to BytesIO again, meaning
-            #       we're just wasting memory. Find a way to pass this to
-            #       the Django model without the inefficiency.
-            gzipped.getvalue(),
-            name=f"{timestamp.isoformat()}-{community.identifier}.json.gz",
-        )
-        return cls.objects.create(
+        return cls.create_from_content(
+            f"{timezone.now().isoformat()}-{community.identifier}.json",
+            content,
+            previous=previous,
+            watermark=watermark,
             community=community,
-            data=file,
-            content_type="application/json",
-            content_encoding="gzip",
-            last_modified=timestamp,
+        )
+
+    @classmethod
+    def drop_stale_cache(cls):
+        for community in Community.objects.all().iterator():
+            latest = cls.get_latest_for_community(
+                community_identifier=community.identifier
+            )
+            if latest is None:
+                continue
+            cutoff = latest.last_modified - timedelta(hours=1)
+            stale = cls.objects.filter(last_modified__lte=cutoff, community=community)
+            for entry in stale.iterator():
+                entry.delete()
+        for entry in cls.objects.filter(community=None).iterator():
+            entry.delete()
+
+
+class APIV1PackageIndexShard(PackageIndexCacheMixin):
+    """
+    A fixed-size part of the sharded v1 package list of a community. Shards
+    are kept for as long as they're part of a stored manifest, as unchanged
+    shards are reused between builds.
+    """
+
+    community = models.ForeignKey(
+        "community.Community",
+        related_name="package_list_shards",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
+
+    @classmethod
+    def drop_stale_cache(cls):
+        # New shards are only added to a manifest once all of the shards of a
+        # build have been created, so recent ones are kept regardless
+        cutoff = timezone.now() - timedelta(hours=1)
+        stale = cls.objects.filter(manifests=None, last_modified__lte=cutoff)
+        for entry in stale.iterator():
+            entry.delete()
+
+
+class APIV1PackageIndexManifest(PackageIndexCacheMixin):
+    """
+    The manifest of the sharded v1 package list of a community, listing the
+    URLs and checksums of its shards.
+    """
+
+    community = models.ForeignKey(
+        "community.Community",
+        related_name="package_list_manifests",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+    )
+    shards = models.ManyToManyField(
+        "repository.APIV1PackageIndexShard",
+        related_name="manifests",
+        blank=True,
+    )
+
+    @classmethod
+    def get_latest_for_community(
+        cls,
+        community_identifier: str,
+    ) -> Optional["APIV1PackageIndexManifest"]:
+        return (
+            cls.objects.active()
+            .filter(community__identifier=community_identifier)
+            .order_by("-last_modified")
+            .first()
         )
 
     @classmethod
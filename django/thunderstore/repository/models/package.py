@@ -1,19 +1,24 @@
 import re
 import uuid
 from distutils.version import StrictVersion
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, List, Optional
 
 from django.conf import settings
 from django.contrib.sites.models import Site
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.db import models
-from django.db.models import Case, Q, Sum, When, signals
+from django.db.models import Case, CharField, Q, Sum, Value, When, signals
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.functional import cached_property
 
 from thunderstore.cache.cache import cache_function_result
-from thunderstore.cache.enums import CacheBustCondition
+from thunderstore.cache.enums import (
+    CacheBustCondition,
+    community_packages_updated,
+    namespace_packages_updated,
+    package_updated,
+)
 from thunderstore.cache.tasks import invalidate_cache_on_commit_async
 from thunderstore.core.enums import OptionalBoolChoice
 from thunderstore.core.types import UserType
@@ -38,7 +43,7 @@ def get_package_dependants(package_pk: int):
     ).active()
 
 
-@cache_function_result(CacheBustCondition.any_package_updated)
+@cache_function_result(package_updated)
 def get_package_dependants_list(package_pk: int):
     return list(get_package_dependants(package_pk))
 
@@ -318,14 +323,49 @@ class Package(models.Model):
     def __str__(self):
         return self.full_package_name
 
+    def get_cache_bust_conditions(self) -> List[str]:
+        """
+        Get the cache bust conditions of every cache entry which might contain
+        data of this package. This includes the entries of packages this
+        package depends on, as those list their dependants.
+        """
+        # The communities and dependencies are fetched in a single query
+        community_ids = self.community_listings.order_by().values_list(
+            Value("community", output_field=CharField()), "community_id"
+        )
+        dependency_ids = (
+            Package.objects.filter(versions__dependants__package=self)
+            .order_by()
+            .values_list(Value("package", output_field=CharField()), "id")
+        )
+        related = community_ids.union(dependency_ids)
+        return [
+            CacheBustCondition.any_package_updated,
+            package_updated(self.pk),
+            namespace_packages_updated(self.owner.name),
+            *(package_updated(x) for kind, x in related if kind == "package"),
+            *(
+                community_packages_updated(x)
+                for kind, x in related
+                if kind == "community"
+            ),
+        ]
+
     @staticmethod
     def post_save(sender, instance, created, **kwargs):
-        invalidate_cache_on_commit_async(CacheBustCondition.any_package_updated)
+        invalidate_cache_on_commit_async(*instance.get_cache_bust_conditions())
+
+    @staticmethod
+    def pre_delete(sender, instance, **kwargs):
+        # The listings and versions are deleted before the package, so the
+        # conditions can't be found out anymore once it's deleted
+        instance._cache_bust_conditions = instance.get_cache_bust_conditions()
 
     @staticmethod
     def post_delete(sender, instance, **kwargs):
-        invalidate_cache_on_commit_async(CacheBustCondition.any_package_updated)
+        invalidate_cache_on_commit_async(*instance._cache_bust_conditions)
 
 
 signals.post_save.connect(Package.post_save, sender=Package)
+signals.pre_delete.connect(Package.pre_delete, sender=Package)
 signals.post_delete.connect(Package.post_delete, sender=Package)
@@ -0,0 +1,107 @@
+from datetime import timedelta
+from typing import TYPE_CHECKING, Optional
+
+from django.conf import settings
+from django.db import models
+from django.db.models import signals
+from django.utils import timezone
+
+if TYPE_CHECKING:
+    from thunderstore.repository.models import Package
+
+# Changes are recorded before the transactions they're part of are committed,
+# so changes are followed from this far before the previous check to not miss
+# changes committed late. Changes within the margin are seen twice.
+PACKAGE_CHANGE_COMMIT_MARGIN = timedelta(minutes=1)
+
+
+class PackageChange(models.Model):
+    """
+    A record of a package having changed in a way which is visible in the v1
+    package lists, used for serving the changes to a package list since a
+    point in time. Changes of download counts alone aren't recorded.
+
+    Changes which only concern the package's listing in a single community
+    are recorded for that community, other changes for all communities.
+    """
+
+    package_uuid4 = models.UUIDField()
+    package_full_name = models.CharField(max_length=256)
+    # Deleting a community deletes its listings, which records changes for
+    # the community as it's being deleted. Those are left behind until they
+    # expire instead of failing the deletion, so there's no constraint.
+    community = models.ForeignKey(
+        "community.Community",
+        related_name="package_changes",
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        blank=True,
+        null=True,
+    )
+    datetime_created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.package_full_name} changed at {self.datetime_created}"
+
+    @classmethod
+    def record(cls, package: "Package", community_id: Optional[int] = None) -> None:
+        cls.objects.create(
+            package_uuid4=package.uuid4,
+            package_full_name=package.full_package_name,
+            community_id=community_id,
+        )
+
+    @classmethod
+    def get_retention_cutoff(cls):
+        """
+        Get the point in time before which changes are no longer tracked.
+        """
+        return timezone.now() - timedelta(
+            seconds=settings.API_V1_PACKAGE_CHANGES_RETENTION
+        )
+
+    @classmethod
+    def drop_expired(cls) -> None:
+        cls.objects.filter(datetime_created__lt=cls.get_retention_cutoff()).delete()
+
+    @staticmethod
+    def on_package_change(sender, instance, **kwargs):
+        PackageChange.record(instance)
+
+    @staticmethod
+    def on_package_related_change(sender, instance, update_fields=None, **kwargs):
+        # Download counts are updated on every download, which is not worth
+        # recording a change for
+        if update_fields and set(update_fields) <= {"downloads"}:
+            return
+        PackageChange.record(instance.package)
+
+    @staticmethod
+    def on_package_listing_change(sender, instance, **kwargs):
+        PackageChange.record(instance.package, instance.community_id)
+
+
+# The senders are given as model names as some of the models can't be
+# imported here without circular imports
+signals.post_save.connect(PackageChange.on_package_change, sender="repository.Package")
+signals.post_delete.connect(
+    PackageChange.on_package_change, sender="repository.Package"
+)
+signals.post_save.connect(
+    PackageChange.on_package_related_change, sender="repository.PackageVersion"
+)
+signals.post_delete.connect(
+    PackageChange.on_package_related_change, sender="repository.PackageVersion"
+)
+signals.post_save.connect(
+    PackageChange.on_package_related_change, sender="repository.PackageRating"
+)
+signals.post_delete.connect(
+    PackageChange.on_package_related_change, sender="repository.PackageRating"
+)
+signals.post_save.connect(
+    PackageChange.on_package_listing_change, sender="community.PackageListing"
+)
+signals.post_delete.connect(
+    PackageChange.on_package_listing_change, sender="community.PackageListing"
+)
@@ -22,6 +22,7 @@ from thunderstore.repository.models import (
 )
 from thunderstore.repository.package_formats import PackageFormats
 from thunderstore.utils.decorators import run_after_commit
+from thunderstore.utils.queryset import chunked_enumerate
 from thunderstore.webhooks.models.release import Webhook
 
 
@@ -39,25 +40,13 @@ class PackageVersionQuerySet(models.QuerySet):
 
     def chunked_enumerate(self, chunk_size=1000) -> Iterator["PackageVersion"]:
         """
-        Enumerate over all the results without fetching everything at once.
-        Instead, cursor based pagination with deterministic ordering is used
-        to fetch each chunk separately, thus saving on memory.
-
-        Server-side cursors would be a better option if the environment allows
-        for it, but connection poolers generally make that impossible.
+        Enumerate over all the results without fetching everything at once,
+        ordered by creation time.
 
         :param chunk_size: The amount of items fetched at once in each chunk
         :return: Iterator of all the results
         """
-        qs = self.order_by("date_created", "id")
-        cursor = Q()
-        while page := list(qs.filter(cursor)[:chunk_size]):
-            cursor = Q(
-                date_created__gte=page[-1].date_created,
-                id__gt=page[-1].id,
-            )
-            for entry in page:
-                yield entry
+        return chunked_enumerate(self, chunk_size, keys=("date_created", "id"))
 
     def listed_in(self, community_identifier: str):
         return self.exclude(
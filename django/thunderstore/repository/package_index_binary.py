@@ -0,0 +1,145 @@
+"""
+A compact binary encoding of the package index.
+
+The content starts with the MAGIC bytes and is followed by a sequence of
+records, each starting with a record type byte. Integers are unsigned and
+little endian.
+
+A STRING record adds a string to the string table, and is written before the
+first record referring to it:
+
+    u32 length, followed by length bytes of UTF-8
+
+An ENTRY record is a package index entry, with the strings referred to by
+their position in the string table plus one, zero meaning none:
+
+    u32 namespace
+    u32 name
+    u32 version_number
+    u32 file_format
+    u64 file_size
+    u32 dependency count, followed by a u32 string for each dependency
+
+Namespaces, names, version numbers and dependency references repeat across
+entries, so each of them is stored only once.
+"""
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+MAGIC = b"TSPI\x01"
+BINARY_INDEX_CONTENT_TYPE = "application/vnd.thunderstore.package-index"
+
+STRING_RECORD = ord("S")
+ENTRY_RECORD = ord("E")
+STRING_PREFIX = bytes((STRING_RECORD,))
+ENTRY_PREFIX = bytes((ENTRY_RECORD,))
+
+LENGTH = struct.Struct("<I")
+ENTRY = struct.Struct("<IIIIQI")
+
+
+class PackageIndexDecodeError(Exception):
+    pass
+
+
+class BinaryPackageIndexEncoder:
+    """
+    Encodes package index entries one at a time, keeping track of the
+    strings already written.
+    """
+
+    def __init__(self):
+        self.strings: Dict[str, int] = {}
+
+    def get_string_ref(self, value: Optional[str], output: List[bytes]) -> int:
+        if value is None:
+            return 0
+        ref = self.strings.get(value)
+        if ref is None:
+            ref = self.strings[value] = len(self.strings) + 1
+            data = value.encode()
+            output.append(STRING_PREFIX + LENGTH.pack(len(data)) + data)
+        return ref
+
+    def encode(self, entry: Dict[str, Any]) -> bytes:
+        """
+        Encode an entry in the format of PackageIndexEntry, preceded by the
+        strings it introduces.
+        """
+        output = []
+        refs = [
+            self.get_string_ref(entry[x], output)
+            for x in ("namespace", "name", "version_number", "file_format")
+        ]
+        dependencies = [self.get_string_ref(x, output) for x in entry["dependencies"]]
+        output.append(
+            ENTRY_PREFIX
+            + ENTRY.pack(*refs, entry["file_size"], len(dependencies))
+            + struct.pack(f"<{len(dependencies)}I", *dependencies)
+        )
+        return b"".join(output)
+
+
+def encode_package_index(entries: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    encoder = BinaryPackageIndexEncoder()
+    yield MAGIC
+    for entry in entries:
+        yield encoder.encode(entry)
+
+
+def decode_package_index(data: bytes) -> Iterator[Dict[str, Any]]:
+    """
+    Reference decoder of the binary package index, producing entries in the
+    format of PackageIndexEntry.
+    """
+    if not data.startswith(MAGIC):
+        raise PackageIndexDecodeError("Not a binary package index")
+    # Index zero stands for none
+    strings: List[Optional[str]] = [None]
+    position = len(MAGIC)
+    size = len(data)
+    unpack_length = LENGTH.unpack_from
+    unpack_entry = ENTRY.unpack_from
+    try:
+        while position < size:
+            record = data[position]
+            position += 1
+            if record == ENTRY_RECORD:
+                (
+                    namespace,
+                    name,
+                    version_number,
+                    file_format,
+                    file_size,
+                    dependency_count,
+                ) = unpack_entry(data, position)
+                position += ENTRY.size
+                if dependency_count:
+                    dependencies = [
+                        strings[x]
+                        for x in struct.unpack_from(
+                            f"<{dependency_count}I", data, position
+                        )
+                    ]
+                    position += dependency_count * LENGTH.size
+                else:
+                    dependencies = []
+                yield {
+                    "namespace": strings[namespace],
+                    "name": strings[name],
+                    "version_number": strings[version_number],
+                    "file_format": strings[file_format],
+                    "file_size": file_size,
+                    "dependencies": dependencies,
+                }
+            elif record == STRING_RECORD:
+                (length,) = unpack_length(data, position)
+                position += LENGTH.size
+                if position + length > size:
+                    raise PackageIndexDecodeError("Truncated binary package index")
+                strings.append(data[position : position + length].decode())
+                position += length
+            else:
+                raise PackageIndexDecodeError(f"Unknown record type {record}")
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise PackageIndexDecodeError("Malformed binary package index") from e
@@ -1,10 +1,20 @@
-from celery import shared_task
+from celery import chord, shared_task
+from django.conf import settings
 
 from thunderstore.core.settings import CeleryQueues
 from thunderstore.repository.api.experimental.views.package_index import (
+    is_full_package_index_due,
+    update_api_experimental_binary_package_index,
+    update_api_experimental_community_package_indexes,
     update_api_experimental_package_index,
+    update_api_experimental_package_index_segments,
 )
-from thunderstore.repository.api.v1.tasks import update_api_v1_caches
+from thunderstore.repository.api.v1.tasks import (
+    drop_stale_api_v1_data,
+    get_api_v1_index_community_ids,
+    update_api_v1_index_by_id,
+)
+from thunderstore.repository.cache_warming import warm_community_package_lists
 
 
 @shared_task(
@@ -12,7 +22,32 @@ from thunderstore.repository.api.v1.tasks import update_api_v1_caches
     queue=CeleryQueues.BackgroundCache,
 )
 def update_api_caches():
-    update_api_v1_caches()
+    # Each community is built by a task of its own, so that a slow community
+    # doesn't delay the others. Stale caches are dropped once all are done.
+    header = [
+        update_api_v1_community_index.si(community_id)
+        for community_id in get_api_v1_index_community_ids()
+    ]
+    if not header:
+        drop_stale_api_v1_caches.delay()
+        return
+    chord(header)(drop_stale_api_v1_caches.si())
+
+
+@shared_task(
+    name="thunderstore.repository.tasks.update_api_v1_community_index",
+    queue=CeleryQueues.BackgroundCache,
+)
+def update_api_v1_community_index(community_id: int):
+    update_api_v1_index_by_id(community_id)
+
+
+@shared_task(
+    name="thunderstore.repository.tasks.drop_stale_api_v1_caches",
+    queue=CeleryQueues.BackgroundCache,
+)
+def drop_stale_api_v1_caches():
+    drop_stale_api_v1_data()
 
 
 @shared_task(
@@ -22,4 +57,19 @@ def update_api_caches():
     time_limit=60 * 60 * 24,
 )
 def update_experimental_package_index():
-    update_api_experimental_package_index()
+    if is_full_package_index_due():
+        update_api_experimental_package_index()
+    if settings.API_EXPERIMENTAL_SEGMENTED_INDEX_ENABLED:
+        update_api_experimental_package_index_segments()
+    if settings.API_EXPERIMENTAL_COMMUNITY_INDEXES_ENABLED:
+        update_api_experimental_community_package_indexes()
+    if settings.API_EXPERIMENTAL_BINARY_INDEX_ENABLED:
+        update_api_experimental_binary_package_index()
+
+
+@shared_task(
+    name="thunderstore.repository.tasks.warm_community_package_list_caches",
+    queue=CeleryQueues.BackgroundCache,
+)
+def warm_community_package_list_caches(community_id: int):
+    warm_community_package_lists(community_id)
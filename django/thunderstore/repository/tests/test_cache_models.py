@@ -1,4 +1,5 @@
 import gzip
+import os
 from datetime import timedelta
 from typing import Any
 
@@ -92,6 +93,35 @@ def test_api_v1_packge_cache_update_for_community(community: Community) -> None:
     assert result == content
 
 
+@pytest.mark.django_db
+def test_api_v1_package_cache_update_for_community_streamed(
+    community: Community,
+) -> None:
+    # Incompressible content large enough to be uploaded in multiple parts
+    chunks = [os.urandom(1024 * 1024) for _ in range(12)]
+    latest = APIV1PackageCache.update_for_community(community, content=iter(chunks))
+    with gzip.GzipFile(fileobj=latest.data, mode="r") as f:
+        result = f.read()
+    assert result == b"".join(chunks)
+
+
+@pytest.mark.django_db
+def test_api_v1_package_cache_update_for_community_stream_failure(
+    mocker, community: Community
+) -> None:
+    def content():
+        yield b"["
+        raise ValueError("Serialization failed")
+
+    storage = APIV1PackageCache._meta.get_field("data").storage
+    delete = mocker.patch.object(storage, "delete", wraps=storage.delete)
+    with pytest.raises(ValueError, match="Serialization failed"):
+        APIV1PackageCache.update_for_community(community, content=content())
+    delete.assert_called_once()
+    assert not storage.exists(delete.call_args[0][0])
+    assert APIV1PackageCache.objects.filter(community=community).count() == 0
+
+
 @pytest.mark.django_db
 def test_api_v1_package_cache_drop_stale_cache(
     freezer: FrozenDateTimeFactory, settings: Any
@@ -0,0 +1,94 @@
+import pytest
+from django.core.cache import cache
+
+from thunderstore.cache.cache import get_cache_key, get_cached_value
+from thunderstore.cache.enums import community_packages_updated
+from thunderstore.cache.metrics import flush_cache_metrics, record_cache_traffic
+from thunderstore.cache.tasks import invalidate_cache
+from thunderstore.community.models import PackageListing
+from thunderstore.frontend.api.experimental.views.community_package_list import (
+    CYBERSTORM_PACKAGE_LIST_TARGET,
+)
+from thunderstore.repository import cache_warming
+from thunderstore.repository.cache_warming import (
+    get_warming_pending_key,
+    get_warming_targets,
+    warm_community_package_lists,
+)
+from thunderstore.repository.views.repository import PACKAGE_LIST_TARGET
+
+
+def get_package_list_page_key(listing: PackageListing, ordering: str) -> str:
+    identifier = listing.community.identifier
+    vary = f"all.{identifier}..{ordering}.[].[].False.False."
+    return get_cache_key(
+        community_packages_updated(listing.community.pk),
+        "key",
+        "repository.package_list.paginator.counted_page.1",
+        vary,
+    )
+
+
+@pytest.mark.django_db
+def test_warm_community_package_lists(
+    settings, active_package_listing: PackageListing
+) -> None:
+    settings.CACHE_WARMING_PAGE_COUNT = 2
+    cache.clear()
+    warm_community_package_lists(active_package_listing.community.pk)
+    for ordering in ("last-updated", "newest", "most-downloaded", "top-rated"):
+        key = get_package_list_page_key(active_package_listing, ordering)
+        assert get_cached_value(key) == (1, [active_package_listing])
+
+
+@pytest.mark.django_db
+def test_warm_community_package_lists_missing_community() -> None:
+    warm_community_package_lists(2**31 - 1)
+
+
+@pytest.mark.django_db
+def test_warm_community_package_lists_prioritized_by_traffic(
+    mocker, settings, active_package_listing: PackageListing
+) -> None:
+    settings.CACHE_METRICS_ENABLED = True
+    community = active_package_listing.community
+    condition = community_packages_updated(community.pk)
+    record_cache_traffic(condition, f"{CYBERSTORM_PACKAGE_LIST_TARGET}.newest")
+    record_cache_traffic(condition, f"{PACKAGE_LIST_TARGET}.top-rated")
+    record_cache_traffic(condition, f"{PACKAGE_LIST_TARGET}.top-rated")
+    flush_cache_metrics()
+
+    calls = []
+    mocker.patch.dict(
+        cache_warming.WARMERS,
+        {
+            PACKAGE_LIST_TARGET: lambda c, o, n: calls.append((PACKAGE_LIST_TARGET, o)),
+            CYBERSTORM_PACKAGE_LIST_TARGET: lambda c, o, n: calls.append(
+                (CYBERSTORM_PACKAGE_LIST_TARGET, o)
+            ),
+        },
+    )
+    warm_community_package_lists(community.pk)
+    assert calls[:2] == [
+        (PACKAGE_LIST_TARGET, "top-rated"),
+        (CYBERSTORM_PACKAGE_LIST_TARGET, "newest"),
+    ]
+    assert sorted(calls) == sorted(get_warming_targets())
+
+
+@pytest.mark.parametrize("enabled", (False, True))
+def test_invalidation_schedules_warming_once(mocker, settings, enabled: bool) -> None:
+    settings.CACHE_WARMING_ENABLED = enabled
+    cache.delete(get_warming_pending_key(5))
+    apply_async = mocker.patch(
+        "thunderstore.repository.tasks.warm_community_package_list_caches.apply_async"
+    )
+    invalidate_cache(community_packages_updated(5))
+    invalidate_cache(community_packages_updated(5))
+    invalidate_cache("any_package_updated")
+    if enabled:
+        apply_async.assert_called_once_with(
+            args=(5,), countdown=settings.CACHE_WARMING_DELAY
+        )
+    else:
+        apply_async.assert_not_called()
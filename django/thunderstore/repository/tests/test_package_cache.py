@@ -1,6 +1,14 @@
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
-from thunderstore.cache.enums import CacheBustCondition
+from thunderstore.cache.enums import (
+    CacheBustCondition,
+    community_packages_updated,
+    namespace_packages_updated,
+    package_updated,
+)
+from thunderstore.repository.factories import PackageVersionFactory
 
 
 @pytest.mark.django_db
@@ -21,7 +29,11 @@ def test_package_cache_is_invalidated_on_version_hidden(package_version, mocker)
     )
     package_version.is_active = False
     package_version.save()
-    mocked_invalidate_cache.assert_called_with(CacheBustCondition.any_package_updated)
+    mocked_invalidate_cache.assert_called_with(
+        CacheBustCondition.any_package_updated,
+        package_updated(package_version.package.pk),
+        namespace_packages_updated(package_version.package.owner.name),
+    )
 
 
 @pytest.mark.django_db
@@ -30,4 +42,62 @@ def test_package_cache_is_invalidated_on_listing_delete(active_package_listing,
         "thunderstore.community.models.package_listing.invalidate_cache_on_commit_async"
     )
     active_package_listing.delete()
-    mocked_invalidate_cache.assert_called_with(CacheBustCondition.any_package_updated)
+    mocked_invalidate_cache.assert_called_with(
+        CacheBustCondition.any_package_updated,
+        package_updated(active_package_listing.package.pk),
+        community_packages_updated(active_package_listing.community.pk),
+        namespace_packages_updated(active_package_listing.package.owner.name),
+    )
+
+
+@pytest.mark.django_db
+def test_package_cache_invalidates_dependencies(package_version, mocker):
+    dependant = PackageVersionFactory()
+    dependant.dependencies.add(package_version)
+    assert package_updated(package_version.package.pk) in (
+        dependant.package.get_cache_bust_conditions()
+    )
+
+
+@pytest.mark.django_db
+def test_package_listing_cache_invalidates_dependencies(
+    package_version, active_package_listing
+):
+    active_package_listing.package.latest.dependencies.add(package_version)
+    assert package_updated(package_version.package.pk) in (
+        active_package_listing.get_cache_bust_conditions()
+    )
+
+
+@pytest.mark.django_db
+def test_package_cache_bust_conditions_query_count(
+    package_version, active_package_listing
+):
+    package = active_package_listing.package
+    package.latest.dependencies.add(package_version)
+    package = type(package).objects.select_related("owner").get(pk=package.pk)
+    with CaptureQueriesContext(connection) as context:
+        conditions = package.get_cache_bust_conditions()
+    assert len(context) == 1
+    assert package_updated(package_version.package.pk) in conditions
+    assert community_packages_updated(active_package_listing.community.pk) in (
+        conditions
+    )
+
+
+@pytest.mark.django_db
+def test_package_cache_is_invalidated_on_package_delete(
+    package_version, active_package_listing, mocker
+):
+    package = active_package_listing.package
+    package.latest.dependencies.add(package_version)
+    mocked_invalidate_cache = mocker.patch(
+        "thunderstore.repository.models.package.invalidate_cache_on_commit_async"
+    )
+    package.delete()
+    # The listings and dependencies are looked up before they're deleted
+    conditions = mocked_invalidate_cache.call_args[0]
+    assert package_updated(package_version.package.pk) in conditions
+    assert community_packages_updated(active_package_listing.community.pk) in (
+        conditions
+    )
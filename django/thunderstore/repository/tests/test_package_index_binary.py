@@ -0,0 +1,66 @@
+import pytest
+
+from thunderstore.repository.package_index_binary import (
+    ENTRY,
+    MAGIC,
+    PackageIndexDecodeError,
+    decode_package_index,
+    encode_package_index,
+)
+
+ENTRIES = [
+    {
+        "namespace": "Team",
+        "name": "Package",
+        "version_number": "1.0.0",
+        "file_format": None,
+        "file_size": 1024,
+        "dependencies": [],
+    },
+    {
+        "namespace": "Team",
+        "name": "Package",
+        "version_number": "1.1.0",
+        "file_format": "thunderstore.io:v0.2",
+        "file_size": 2**40,
+        "dependencies": ["Team-Package-1.0.0", "Other-Päckage-1.0.0"],
+    },
+    {
+        "namespace": "Other",
+        "name": "Package",
+        "version_number": "1.0.0",
+        "file_format": "thunderstore.io:v0.2",
+        "file_size": 0,
+        "dependencies": ["Team-Package-1.0.0"],
+    },
+]
+
+
+def test_package_index_binary_round_trip() -> None:
+    data = b"".join(encode_package_index(ENTRIES))
+    assert data.startswith(MAGIC)
+    assert list(decode_package_index(data)) == ENTRIES
+    assert list(decode_package_index(MAGIC)) == []
+
+
+def test_package_index_binary_strings_deduplicated() -> None:
+    data = b"".join(encode_package_index(ENTRIES))
+    assert data.count(b"Team") == 2
+    assert data.count(b"Package") == 2
+    assert data.count(b"1.0.0") == 3
+
+
+@pytest.mark.parametrize(
+    "data",
+    (
+        b"",
+        b"TSPI\x02",
+        MAGIC + b"X",
+        MAGIC + b"S\x05\x00\x00\x00abc",
+        MAGIC + b"E\x01\x00",
+        MAGIC + b"E" + ENTRY.pack(1, 0, 0, 0, 0, 0),
+    ),
+)
+def test_package_index_binary_malformed(data: bytes) -> None:
+    with pytest.raises(PackageIndexDecodeError):
+        list(decode_package_index(data))
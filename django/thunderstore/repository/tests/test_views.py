@@ -15,7 +15,7 @@ from rest_framework.test import APIClient
 from conftest import TestUserTypes
 from thunderstore.core.factories import UserFactory
 
-from ...cache.enums import CacheBustCondition
+from ...cache.enums import community_packages_updated
 from ...cache.tasks import invalidate_cache
 from ...community.consts import PackageListingReviewStatus
 from ...community.factories import CommunitySiteFactory, SiteFactory
@@ -81,7 +81,7 @@ def test_package_list_view(client, community_site, ordering: str, old_urls: bool
             review_status=PackageListingReviewStatus.rejected,
         )
 
-    invalidate_cache(cache_bust_condition=CacheBustCondition.any_package_updated)
+    invalidate_cache(community_packages_updated(community_site.community.pk))
 
     if old_urls:
         base_url = reverse("old_urls:packages.list")
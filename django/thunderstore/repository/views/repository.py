@@ -18,7 +18,12 @@ from django.views.generic.list import ListView
 from ipware import get_client_ip
 
 from thunderstore.cache.cache import cache_function_result
-from thunderstore.cache.enums import CacheBustCondition
+from thunderstore.cache.enums import (
+    community_packages_updated,
+    namespace_packages_updated,
+    package_updated,
+)
+from thunderstore.cache.metrics import record_cache_traffic
 from thunderstore.cache.pagination import CachedPaginator
 from thunderstore.community.consts import PackageListingReviewStatus
 from thunderstore.community.models import (
@@ -44,6 +49,8 @@ from thunderstore.repository.views.mixins import PackageTabsMixin
 # Should be divisible by 4 and 3
 MODS_PER_PAGE = 24
 
+PACKAGE_LIST_TARGET = "package_list"
+
 
 @method_decorator(ensure_csrf_cookie, name="dispatch")
 class PackageListSearchView(CommunityMixin, ListView):
@@ -60,6 +67,9 @@ class PackageListSearchView(CommunityMixin, ListView):
     def get_cache_vary(self):
         return ""
 
+    def get_cache_bust_condition(self) -> str:
+        return community_packages_updated(self.community.pk)
+
     def get_categories(self):
         return PackageCategory.objects.exclude(~Q(community=self.community))
 
@@ -307,9 +317,10 @@ class PackageListSearchView(CommunityMixin, ListView):
             per_page,
             cache_key="repository.package_list.paginator",
             cache_vary=self.get_full_cache_vary(),
-            cache_bust_condition=CacheBustCondition.any_package_updated,
+            cache_bust_condition=self.get_cache_bust_condition(),
             orphans=orphans,
             allow_empty_first_page=allow_empty_first_page,
+            stale_while_revalidate=settings.CACHE_STALE_WHILE_REVALIDATE,
         )
 
     def get_context_data(self, *args, **kwargs):
@@ -320,6 +331,7 @@ class PackageListSearchView(CommunityMixin, ListView):
         context["nsfw_included"] = self.get_is_nsfw_included()
         context["deprecated_included"] = self.get_is_deprecated_included()
         context["cache_vary"] = self.get_full_cache_vary()
+        context["cache_bust_condition"] = self.get_cache_bust_condition()
         context["page_title"] = self.get_page_title()
         context["ordering_modes"] = self.get_ordering_choices()
         context["sections"] = self.section_choices
@@ -350,6 +362,30 @@ class PackageListView(PackageListSearchView):
     def get_cache_vary(self):
         return "all"
 
+    def is_default_listing(self) -> bool:
+        """
+        Whether the listing is shown without any filters, which makes it a
+        candidate for cache warming.
+        """
+        return not any(
+            (
+                self.get_search_query(),
+                self.get_included_categories(),
+                self.get_excluded_categories(),
+                self.get_is_nsfw_included(),
+                self.get_is_deprecated_included(),
+                "section" in self.request.GET,
+            )
+        )
+
+    def get_context_data(self, *args, **kwargs):
+        if self.is_default_listing():
+            record_cache_traffic(
+                self.get_cache_bust_condition(),
+                f"{PACKAGE_LIST_TARGET}.{self.get_active_ordering()}",
+            )
+        return super().get_context_data(*args, **kwargs)
+
 
 @method_decorator(ensure_csrf_cookie, name="dispatch")
 class PackageListByOwnerView(PackageListSearchView):
@@ -425,8 +461,16 @@ class PackageListByDependencyView(PackageListSearchView):
     def get_cache_vary(self):
         return f"dependencies-{self.package_listing.package.id}"
 
+    def get_cache_bust_condition(self) -> str:
+        # Dependants bust the caches of the packages they depend on
+        return package_updated(self.package_listing.package.id)
+
 
-@cache_function_result(cache_until=CacheBustCondition.any_package_updated)
+@cache_function_result(
+    cache_until=lambda namespace, name, community: namespace_packages_updated(
+        namespace
+    ),
+)
 def get_package_listing_or_404(
     namespace: str,
     name: str,
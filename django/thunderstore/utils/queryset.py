@@ -0,0 +1,115 @@
+from typing import Any, Iterator, Optional, Sequence
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q, QuerySet, prefetch_related_objects
+
+from thunderstore.utils.batch import batch
+
+# Rows fetched from a server-side cursor at once. Server-side cursors have no
+# per-query overhead, so this can be larger than a keyset pagination page.
+SERVER_SIDE_CURSOR_ITERSIZE = 10000
+
+
+class ChunkedEnumerateStrategy:
+    # Use a server-side cursor if the database connection supports it
+    AUTO = "auto"
+    # Fetch the results a page at a time with keyset pagination
+    KEYSET = "keyset"
+    # Fetch the results through a server-side cursor
+    SERVER_SIDE_CURSOR = "server_side_cursor"
+
+    options = (AUTO, KEYSET, SERVER_SIDE_CURSOR)
+
+
+def can_use_server_side_cursor(queryset: QuerySet) -> bool:
+    """
+    Check if the results of the queryset can be streamed through a
+    server-side cursor. Connection poolers in transaction pooling mode break
+    server-side cursors, so they must be disabled for such connections.
+    """
+    connection = connections[queryset.db]
+    return (
+        connection.vendor == "postgresql"
+        and connection.features.can_use_chunked_reads
+        and not connection.settings_dict.get("DISABLE_SERVER_SIDE_CURSORS")
+    )
+
+
+def get_row_value(row: Any, key: str) -> Any:
+    return row[key] if isinstance(row, dict) else getattr(row, key)
+
+
+def get_keyset_filter(keys: Sequence[str], row: Any) -> Q:
+    """
+    Build a filter for the rows which come after the given row when ordered
+    by the keys.
+    """
+    result = Q()
+    equal = Q()
+    for key in keys:
+        value = get_row_value(row, key)
+        result |= equal & Q(**{f"{key}__gt": value})
+        equal &= Q(**{key: value})
+    return result
+
+
+def iterate_by_keyset(
+    queryset: QuerySet, chunk_size: int, keys: Sequence[str]
+) -> Iterator[Any]:
+    queryset = queryset.order_by(*keys)
+    cursor = Q()
+    while page := list(queryset.filter(cursor)[:chunk_size]):
+        cursor = get_keyset_filter(keys, page[-1])
+        yield from page
+
+
+def iterate_by_server_side_cursor(
+    queryset: QuerySet, chunk_size: int, keys: Sequence[str]
+) -> Iterator[Any]:
+    # Querysets don't prefetch related objects when iterated this way, so
+    # they're prefetched for each chunk separately instead
+    lookups = queryset._prefetch_related_lookups
+    results = queryset.order_by(*keys).iterator(chunk_size=SERVER_SIDE_CURSOR_ITERSIZE)
+    if not lookups or queryset._fields is not None:
+        yield from results
+        return
+    for chunk in batch(chunk_size, results):
+        prefetch_related_objects(chunk, *lookups)
+        yield from chunk
+
+
+def chunked_enumerate(
+    queryset: QuerySet,
+    chunk_size: int = 1000,
+    keys: Sequence[str] = ("pk",),
+    strategy: Optional[str] = None,
+) -> Iterator[Any]:
+    """
+    Enumerate over all the results of a queryset without fetching everything
+    at once. A server-side cursor is used if the database connection allows
+    for it, and keyset pagination with deterministic ordering otherwise, as
+    connection poolers generally make server-side cursors impossible.
+
+    Works for querysets of model instances as well as of values() rows.
+
+    :param chunk_size: The amount of items fetched at once in each page
+    :param keys: The fields the results are ordered by, which must uniquely
+        identify each result and can't be null. Values querysets must
+        include them.
+    :param strategy: The ChunkedEnumerateStrategy to use, defaulting to the
+        CHUNKED_ENUMERATE_STRATEGY setting
+    :return: Iterator of all the results
+    """
+    strategy = strategy or settings.CHUNKED_ENUMERATE_STRATEGY
+    if strategy not in ChunkedEnumerateStrategy.options:
+        raise ValueError(f"Unknown chunked enumerate strategy: {strategy}")
+    if strategy == ChunkedEnumerateStrategy.AUTO:
+        if can_use_server_side_cursor(queryset):
+            strategy = ChunkedEnumerateStrategy.SERVER_SIDE_CURSOR
+        else:
+            strategy = ChunkedEnumerateStrategy.KEYSET
+
+    if strategy == ChunkedEnumerateStrategy.SERVER_SIDE_CURSOR:
+        return iterate_by_server_side_cursor(queryset, chunk_size, keys)
+    return iterate_by_keyset(queryset, chunk_size, keys)
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from thunderstore.repository.factories import PackageVersionFactory
+from thunderstore.repository.models import PackageVersion
+from thunderstore.utils.queryset import (
+    ChunkedEnumerateStrategy,
+    can_use_server_side_cursor,
+    chunked_enumerate,
+)
+
+
+@pytest.fixture()
+def server_side_cursors(monkeypatch):
+    monkeypatch.setitem(connection.settings_dict, "DISABLE_SERVER_SIDE_CURSORS", False)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "strategy",
+    (ChunkedEnumerateStrategy.KEYSET, ChunkedEnumerateStrategy.SERVER_SIDE_CURSOR),
+)
+def test_chunked_enumerate(strategy: str) -> None:
+    versions = [PackageVersionFactory() for _ in range(7)]
+    # Creation times and IDs are ordered differently, and some are equal
+    now = timezone.now()
+    for i, version in enumerate(versions):
+        date_created = now - timedelta(minutes=i // 2)
+        PackageVersion.objects.filter(pk=version.pk).update(date_created=date_created)
+    expected = list(
+        PackageVersion.objects.order_by("date_created", "id").values_list(
+            "id", flat=True
+        )
+    )
+
+    queryset = PackageVersion.objects.prefetch_related("dependencies")
+    result = list(
+        chunked_enumerate(queryset, 3, ("date_created", "id"), strategy=strategy)
+    )
+    assert [x.pk for x in result] == expected
+    assert all("dependencies" in x._prefetched_objects_cache for x in result)
+
+    rows = PackageVersion.objects.values("id", "date_created", "name")
+    result = list(chunked_enumerate(rows, 3, ("date_created", "id"), strategy=strategy))
+    assert [x["id"] for x in result] == expected
+
+
+@pytest.mark.django_db
+def test_chunked_enumerate_keyset_query_count() -> None:
+    for _ in range(7):
+        PackageVersionFactory()
+    with CaptureQueriesContext(connection) as context:
+        list(chunked_enumerate(PackageVersion.objects.all(), 3, strategy="keyset"))
+    # Three pages and an empty one
+    assert len(context) == 4
+
+
+@pytest.mark.django_db
+def test_chunked_enumerate_auto_strategy(settings, server_side_cursors) -> None:
+    settings.CHUNKED_ENUMERATE_STRATEGY = ChunkedEnumerateStrategy.AUTO
+    PackageVersionFactory()
+    assert can_use_server_side_cursor(PackageVersion.objects.all()) is True
+    with CaptureQueriesContext(connection) as context:
+        assert len(list(chunked_enumerate(PackageVersion.objects.all(), 1))) == 1
+    assert len(context) == 1
+
+
+def test_can_use_server_side_cursor_disabled(monkeypatch) -> None:
+    monkeypatch.setitem(connection.settings_dict, "DISABLE_SERVER_SIDE_CURSORS", True)
+    assert can_use_server_side_cursor(PackageVersion.objects.all()) is False
+
+
+def test_chunked_enumerate_unknown_strategy() -> None:
+    with pytest.raises(ValueError, match="Unknown chunked enumerate strategy"):
+        chunked_enumerate(PackageVersion.objects.all(), strategy="unknown")